@@ -0,0 +1,175 @@
+"""
+Micro-benchmarks for the order-book hot path: time per call, throughput and peak
+memory of the list parser, the book/spread helpers and the monitor metrics on
+synthetic `bitfinex-maker-kit list` output from 10 to 1,000,000 rows.
+
+    python3 benchmarks/bench_hot_path.py --output results.json
+    python3 benchmarks/bench_hot_path.py --rows 10 1000 --compare results.json --threshold 0.25
+
+With --compare, exits 1 when any case is slower than the baseline by more than
+--threshold (fractional, on seconds per call) for the same function and row count.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from bench_list_parsers import as_table, synthetic_rows  # noqa: E402
+from hleper_functions.helper_functions_monitor import (  # noqa: E402
+    calculate_asset_metrics,
+    calculate_liquidity,
+    depth_profile,
+)
+from hleper_functions.helper_functions_spread import (  # noqa: E402
+    compute_spread_percent_mid,
+    parse_orders_from_text,
+    split_filter_sort_orders,
+)
+from hleper_functions.order_book import OrderBook  # noqa: E402
+
+DEFAULT_ROWS = [10, 100, 1000, 10000, 100000, 1000000]
+MID_PRICE = 0.01605
+
+
+def time_per_call(fn: Callable[[], Any], repeat: int, min_time_s: float) -> Dict[str, float]:
+    """
+    Best-of-repeat seconds per call; each sample loops fn until it ran for min_time_s,
+    so sub-microsecond calls are not dominated by timer resolution.
+    """
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time_s or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time_s / elapsed) + 1))
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / loops)
+    return {"sec_per_call": best, "calls": loops}
+
+
+def peak_memory(fn: Callable[[], Any]) -> int:
+    """
+    Peak bytes allocated by Python during one call (tracemalloc; numpy buffers included).
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def row_cases(n: int) -> Dict[str, Callable[[], Any]]:
+    rows = synthetic_rows(n)
+    table = as_table(rows)
+    orders = parse_orders_from_text(table)
+    assert len(orders) == n, f"parsed {len(orders)} of {n} rows"
+    return {
+        "parse_orders_from_text": lambda: parse_orders_from_text(table),
+        "split_filter_sort_orders": lambda: split_filter_sort_orders(orders, 15.0),
+        "calculate_liquidity": lambda: calculate_liquidity(orders, MID_PRICE, 2.0),
+        "depth_profile": lambda: depth_profile(orders, MID_PRICE),
+        "order_book_from_orders": lambda: OrderBook.from_orders(orders, 15.0),
+    }
+
+
+def scalar_cases() -> Dict[str, Callable[[], Any]]:
+    return {
+        "compute_spread_percent_mid": lambda: compute_spread_percent_mid(0.016, 0.0161),
+        "calculate_asset_metrics": lambda: calculate_asset_metrics(1000.0, 50.0, MID_PRICE),
+    }
+
+
+def run(rows_list: List[int], repeat: int, min_time_s: float, with_memory: bool) -> List[Dict[str, Any]]:
+    results = []
+
+    def measure(name: str, rows: Optional[int], fn: Callable[[], Any]) -> None:
+        timing = time_per_call(fn, repeat, min_time_s)
+        result = {
+            "name": name,
+            "rows": rows,
+            "sec_per_call": timing["sec_per_call"],
+            "calls_per_sample": timing["calls"],
+            "rows_per_s": (rows / timing["sec_per_call"]) if rows else None,
+            "peak_mem_bytes": peak_memory(fn) if with_memory else None,
+        }
+        results.append(result)
+        rate = f"{result['rows_per_s']:14,.0f} rows/s" if rows else " " * 21
+        mem = f"{result['peak_mem_bytes'] / 1024:12,.1f} KiB" if with_memory else ""
+        print(f"{name:<27} rows={str(rows or '-'):<8} {result['sec_per_call'] * 1e6:14,.2f} us  {rate}{mem}")
+
+    for name, fn in scalar_cases().items():
+        measure(name, None, fn)
+    for n in rows_list:
+        for name, fn in row_cases(n).items():
+            measure(name, n, fn)
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, threshold: float) -> int:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["name"], r["rows"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    for r in results:
+        base = baseline.get((r["name"], r["rows"]))
+        if base is None:
+            continue
+        ratio = r["sec_per_call"] / base["sec_per_call"]
+        if ratio > 1.0 + threshold:
+            regressions += 1
+            print(f"REGRESSION {r['name']} rows={r['rows']}: {ratio:.2f}x baseline", file=sys.stderr)
+    print(f"compared against {baseline_path}: {regressions} regression(s) above +{threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--repeat", type=int, default=5, help="timing samples per case (best is kept)")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per timing sample")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory pass")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown vs baseline (0.2 = +20%%)")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat, args.min_time, not args.no_memory)
+    if args.output:
+        report = {
+            "meta": {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+                "repeat": args.repeat,
+                "min_time_s": args.min_time,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        return compare(results, args.compare, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Throughput of the list-output parsers: the regex table parser on a full string
+(parse_orders_from_text) versus the line-streaming parser for the table, JSON Lines
+and CSV formats (iter_orders_from_lines).
+
+    python3 benchmarks/bench_list_parsers.py --rows 1000 100000
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hleper_functions.helper_functions_spread import iter_orders_from_lines, parse_orders_from_text  # noqa: E402
+
+
+def synthetic_rows(n: int) -> List[dict]:
+    rows = []
+    for i in range(n):
+        side = "BUY" if i % 2 == 0 else "SELL"
+        # Ladder fanning out from 0.016 / 0.0161, spread over at most ±50%
+        step = (i // 2) / max(n, 1)
+        price = 0.016 * (1 - step) if side == "BUY" else 0.0161 * (1 + step)
+        rows.append({"id": 100000000 + i, "type": "EXCHANGE LIMIT", "side": side, "amount": 10.0 + i % 50, "price": round(price, 8)})
+    return rows
+
+
+def as_table(rows: List[dict]) -> str:
+    lines = ["ID          TYPE             SIDE   AMOUNT      PRICE        CREATED"]
+    for r in rows:
+        lines.append(f"{r['id']:<11} {r['type']:<16} {r['side']:<6} {r['amount']:<11} {r['price']:<12.8f} 2025-01-01 12:00:00")
+    return "\n".join(lines) + "\n"
+
+
+def as_json_lines(rows: List[dict]) -> str:
+    return "".join(json.dumps(r) + "\n" for r in rows)
+
+
+def as_csv(rows: List[dict]) -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=["id", "type", "side", "amount", "price"])
+    writer.writeheader()
+    writer.writerows(rows)
+    return buf.getvalue()
+
+
+def best_of(fn: Callable[[], int], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for n in args.rows:
+        rows = synthetic_rows(n)
+        table, jsonl, csv_text = as_table(rows), as_json_lines(rows), as_csv(rows)
+        cases = {
+            "regex_text": lambda: len(parse_orders_from_text(table)),
+            "stream_table": lambda: sum(1 for _ in iter_orders_from_lines(io.StringIO(table), "table")),
+            "stream_json": lambda: sum(1 for _ in iter_orders_from_lines(io.StringIO(jsonl), "json")),
+            "stream_csv": lambda: sum(1 for _ in iter_orders_from_lines(io.StringIO(csv_text), "csv")),
+        }
+        for name, fn in cases.items():
+            parsed = fn()
+            assert parsed == n, f"{name} parsed {parsed} of {n} rows"
+            secs = best_of(fn, args.repeat)
+            print(f"{name:<13} rows={n:<8} {secs * 1000:9.2f} ms  {n / secs:12,.0f} rows/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Orders container versus the list of order dicts: time per call and peak memory of
+parsing `bitfinex-maker-kit list` output, split_filter_sort_orders, depth_profile and
+OrderBook.from_orders, plus the bytes each representation keeps alive. Both shapes
+are checked to give the same results before anything is timed.
+
+    python3 benchmarks/bench_orders.py --rows 1000 100000
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_hot_path import MID_PRICE, peak_memory, time_per_call  # noqa: E402
+from bench_list_parsers import as_table, synthetic_rows  # noqa: E402
+from hleper_functions.helper_functions_monitor import depth_profile  # noqa: E402
+from hleper_functions.helper_functions_spread import (  # noqa: E402
+    parse_orders_columns,
+    parse_orders_from_text,
+    split_filter_sort_orders,
+)
+from hleper_functions.order_book import OrderBook  # noqa: E402
+from hleper_functions.orders import Orders  # noqa: E402
+
+MIN_AMOUNT = 20.0
+
+
+def retained_bytes(build: Callable[[], Any]) -> int:
+    """Bytes still allocated once build() returns, i.e. what holding its result costs."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+        del kept
+        return size
+    finally:
+        tracemalloc.stop()
+
+
+def check_equivalent(dicts: List[dict], orders: Orders) -> None:
+    assert orders.to_dicts() == dicts, "parsed rows differ"
+    assert split_filter_sort_orders(orders, MIN_AMOUNT) == split_filter_sort_orders(dicts, MIN_AMOUNT)
+    assert depth_profile(orders, MID_PRICE) == depth_profile(dicts, MID_PRICE)
+    a, b = OrderBook.from_orders(orders, MIN_AMOUNT), OrderBook.from_orders(dicts, MIN_AMOUNT)
+    assert (a.best_bid, a.best_ask, len(a)) == (b.best_bid, b.best_ask, len(b))
+
+
+def cases(n: int) -> Dict[str, Dict[str, Callable[[], Any]]]:
+    text = as_table(synthetic_rows(n))
+    dicts = parse_orders_from_text(text)
+    orders = parse_orders_columns(text)
+    check_equivalent(dicts, orders)
+    return {
+        "parse": {"dicts": lambda: parse_orders_from_text(text), "orders": lambda: parse_orders_columns(text)},
+        "split_filter_sort_orders": {
+            "dicts": lambda: split_filter_sort_orders(dicts, MIN_AMOUNT),
+            "orders": lambda: split_filter_sort_orders(orders, MIN_AMOUNT),
+        },
+        "depth_profile": {"dicts": lambda: depth_profile(dicts, MID_PRICE), "orders": lambda: depth_profile(orders, MID_PRICE)},
+        "OrderBook.from_orders": {
+            "dicts": lambda: OrderBook.from_orders(dicts, MIN_AMOUNT),
+            "orders": lambda: OrderBook.from_orders(orders, MIN_AMOUNT),
+        },
+    }, text
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5, help="timing samples per case (best is kept)")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per timing sample")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'case':<26} {'dicts ms':>10} {'orders ms':>10} {'speedup':>8} {'dicts peak':>11} {'orders peak':>12}")
+    for n in args.rows:
+        by_case, text = cases(n)
+        for name, impls in by_case.items():
+            secs = {k: time_per_call(fn, args.repeat, args.min_time)["sec_per_call"] for k, fn in impls.items()}
+            peaks = {k: peak_memory(fn) for k, fn in impls.items()}
+            print(
+                f"{n:>8}  {name:<26} {secs['dicts'] * 1e3:>10.3f} {secs['orders'] * 1e3:>10.3f} "
+                f"{secs['dicts'] / secs['orders']:>7.1f}x {peaks['dicts'] / 1e6:>9.2f}MB {peaks['orders'] / 1e6:>10.2f}MB"
+            )
+        kept_dicts = retained_bytes(lambda: parse_orders_from_text(text))
+        kept_orders = retained_bytes(lambda: parse_orders_columns(text))
+        print(
+            f"{n:>8}  {'retained':<26} {kept_dicts / 1e6:>9.2f}MB {kept_orders / 1e6:>9.2f}MB "
+            f"{kept_dicts / max(kept_orders, 1):>7.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Price formatting: the original put_order.format_bitfinex_price (Decimal + log10 +
+string passes per call) against hleper_functions.price_precision, per price and
+for whole arrays of prices.
+
+    python3 benchmarks/bench_price_precision.py
+    python3 benchmarks/bench_price_precision.py --sizes 100 10000 --output results.json
+
+The legacy function lives verbatim in benchmarks/legacy_price_format.py. The
+property tests comparing it with the current implementation are in
+tests/test_price_precision.py.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from bench_hot_path import time_per_call  # noqa: E402
+from hleper_functions.price_precision import format_price, format_prices, snap_prices  # noqa: E402
+from legacy_price_format import format_bitfinex_price as legacy_format_bitfinex_price  # noqa: E402
+
+DEFAULT_SIZES = [1, 100, 10000, 100000]
+
+
+def random_prices(n: int, seed: int) -> List[float]:
+    """Log-uniform positive prices from 1e-9 to 1e9 with 1 to 12 significant digits."""
+    rng = random.Random(seed)
+    return [float(f"{10 ** rng.uniform(-9, 9):.{rng.randint(1, 12)}g}") for _ in range(n)]
+
+
+def cases(n: int, seed: int) -> Dict[str, Callable[[], Any]]:
+    prices = random_prices(n, seed)
+    array = np.asarray(prices)
+    return {
+        "legacy_format_bitfinex_price": lambda: [legacy_format_bitfinex_price(p) for p in prices],
+        "format_price": lambda: [format_price(p) for p in prices],
+        "format_prices": lambda: format_prices(array),
+        "snap_prices": lambda: snap_prices(array),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="prices per call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5, help="timing samples per case (best is kept)")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per timing sample")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        for name, fn in cases(n, args.seed).items():
+            timing = time_per_call(fn, args.repeat, args.min_time)
+            per_price = timing["sec_per_call"] / n
+            results.append({"name": name, "prices": n, "sec_per_call": timing["sec_per_call"], "sec_per_price": per_price})
+            print(f"{name:<30} prices={n:<8} {timing['sec_per_call'] * 1e6:14,.2f} us  {per_price * 1e9:10,.1f} ns/price")
+    if args.output:
+        report = {
+            "meta": {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+                "min_time_s": args.min_time,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
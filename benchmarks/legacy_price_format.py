@@ -0,0 +1,48 @@
+# flake8: noqa
+"""
+Reference copy of put_order.format_bitfinex_price as it was before
+hleper_functions.price_precision replaced it. The function below is kept
+byte-identical to the original (including its unused `shift` local and the
+function-level `import math`), so lint is told to skip this file. It is used by
+benchmarks/bench_price_precision.py and tests/test_price_precision.py only.
+"""
+from decimal import Decimal
+
+
+def format_bitfinex_price(price: float) -> str:
+    """
+    Formats the price according to Bitfinex's 5 significant digits rule.
+    Bitfinex truncates prices that exceed 5 significant digits.
+    """
+    if price == 0:
+        return "0"
+    
+    # Use Decimal for precise handling
+    d_price = Decimal(str(price))
+    
+    # Calculate the number of digits before the decimal point
+    # log10 of the absolute value gives the magnitude
+    import math
+    magnitude = math.floor(math.log10(abs(float(d_price))))
+    
+    # Significant digits are counted from the first non-zero digit.
+    # We want 5 significant digits.
+    # The number of decimal places needed is (5 - 1 - magnitude)
+    decimals = 5 - 1 - magnitude
+    
+    # Bitfinex generally supports up to 5 significant digits.
+    # We use ROUND_DOWN to match Bitfinex's truncation behavior.
+    format_str = f"{{:.{max(0, decimals)}f}}"
+    formatted = format_str.format(d_price).rstrip('0').rstrip('.')
+    
+    # Double check significant digits count
+    sig_digits = len(formatted.replace('.', '').lstrip('0'))
+    if sig_digits > 5:
+        # If still over 5 (can happen with rounding), we need to truncate further
+        # This is a safe fallback
+        shift = 5 - sig_digits
+        # Implementation of truncation for significant digits is tricky with strings,
+        # but for Bitfinex 5 is the standard.
+        pass
+
+    return formatted
@@ -0,0 +1,236 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence
+
+from hleper_functions.bfx_ws import WSS_HOST, BfxWsFeed
+from hleper_functions.helper_function import atomic_write_state
+from hleper_functions.wide_logger import log_event
+
+
+class BalanceReading(NamedTuple):
+    amount: float
+    as_of: float  # epoch s at which the amount was last known to be current
+    source: str  # "ws" or "rest"; "cache"/"state" for a last-known value after a failed fetch
+
+    @property
+    def age_s(self) -> float:
+        return max(0.0, time.time() - self.as_of)
+
+
+class WalletFeed(BfxWsFeed):
+    """
+    Keep the balances of one wallet type (default "exchange") in memory from the
+    authenticated websocket channel: the `ws` snapshot replaces them, `wu` updates
+    one currency. The connection authenticates with the "wallet" filter, so no order
+    or trade traffic is sent to it.
+    """
+
+    auth_filter = ["wallet"]
+
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        host: str = WSS_HOST,
+        max_age_s: float = 30.0,
+        wallet_type: str = "exchange",
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        super().__init__(host=host, api_key=api_key, api_secret=api_secret, logger=logger, name="wallet_feed")
+        self.max_age_s = max_age_s
+        self.wallet_type = wallet_type
+        self.snapshot_at: Optional[float] = None
+        # Bumped on every change, so publishers can tell whether anything moved
+        self.version = 0
+        self._balances: Dict[str, float] = {}
+        self._snapshot_event = threading.Event()
+
+    def on_connect(self) -> None:
+        with self._lock:
+            self._balances = {}
+            self.snapshot_at = None
+        self._snapshot_event.clear()
+
+    def on_disconnect(self) -> None:
+        self._snapshot_event.clear()
+
+    def on_auth_message(self, abbreviation: str, payload: Any) -> None:
+        # Rows are [WALLET_TYPE, CURRENCY, BALANCE, UNSETTLED_INTEREST, BALANCE_AVAILABLE, ...]
+        if abbreviation == "ws":
+            balances = {
+                row[1]: float(row[2] or 0.0) for row in payload or [] if row[0] == self.wallet_type
+            }
+            with self._lock:
+                self._balances = balances
+                self.snapshot_at = time.time()
+                self.version += 1
+            self._snapshot_event.set()
+        elif abbreviation == "wu" and payload and payload[0] == self.wallet_type:
+            with self._lock:
+                self._balances[payload[1]] = float(payload[2] or 0.0)
+                self.version += 1
+
+    def ready(self) -> bool:
+        """
+        True once a wallet snapshot has been received on the live connection and the
+        connection has shown signs of life within max_age_s.
+        """
+        if not self.connected or not self._snapshot_event.is_set() or self.last_message_at is None:
+            return False
+        return (time.time() - self.last_message_at) <= self.max_age_s
+
+    def wait_ready(self, timeout_s: float) -> bool:
+        self._snapshot_event.wait(timeout_s)
+        return self.ready()
+
+    def balances(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._balances)
+
+    def reconcile(
+        self, rest_balances: Dict[str, float], read_version: int
+    ) -> Optional[Dict[str, Dict[str, Optional[float]]]]:
+        """
+        Adopt a REST wallet read, started when the feed was at read_version, as the
+        truth and return the currencies where it disagreed with the feed, as
+        {currency: {"ws": ..., "rest": ...}} ("rest" None for a wallet REST no longer
+        lists, which is dropped). Returns None without changing anything when a
+        `ws`/`wu` message arrived during the REST call: the feed is newer than the read.
+        """
+        with self._lock:
+            if self.version != read_version:
+                return None
+            mismatches: Dict[str, Dict[str, Optional[float]]] = {
+                currency: {"ws": self._balances.get(currency, 0.0), "rest": amount}
+                for currency, amount in rest_balances.items()
+                if self._balances.get(currency, 0.0) != amount
+            }
+            for currency in self._balances.keys() - rest_balances.keys():
+                mismatches[currency] = {"ws": self._balances[currency], "rest": None}
+            if mismatches:
+                self._balances = dict(rest_balances)
+                self.version += 1
+        return mismatches
+
+
+def read_balance_cache(path: str, currencies: Optional[Sequence[str]] = None) -> Optional[Dict[str, BalanceReading]]:
+    """
+    Balances from the cache file published by BalancePublisher (every cached
+    currency, or just currencies, where one without a wallet reads 0.0), or None
+    when there is no readable cache. The as-of time of each reading is the file's
+    mtime, which the publisher refreshes while its feed is live; callers decide how
+    old is too old from BalanceReading.age_s.
+    """
+    full_path = os.path.expanduser(path)
+    try:
+        with open(full_path, "r", encoding="utf-8") as f:
+            as_of = os.fstat(f.fileno()).st_mtime
+            data = json.load(f)
+        source = str(data.get("source", "ws"))
+        balances = data["balances"]
+        wanted = balances if currencies is None else currencies
+        return {c: BalanceReading(float(balances.get(c, 0.0)), as_of, source) for c in wanted}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+class BalancePublisher:
+    """
+    Publish a WalletFeed's balances to a small JSON cache file for other processes
+    (monitor.py reads it instead of calling REST). The file is rewritten only when a
+    balance changed; otherwise its mtime is touched while the feed is live, so
+    readers see the cache go stale as soon as the feed does.
+
+    Every reconcile_interval_s the balances are also read over REST: mismatches with
+    the feed are logged as balance_reconcile_mismatch and the REST values adopted.
+    While the feed is down, the REST read is published instead (source "rest").
+    """
+
+    def __init__(
+        self,
+        path: str,
+        feed: Optional[WalletFeed],
+        fetch_rest: Callable[[], Optional[Dict[str, float]]],
+        reconcile_interval_s: float = 300.0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.path = os.path.expanduser(path)
+        self.feed = feed
+        self.fetch_rest = fetch_rest
+        self.reconcile_interval_s = reconcile_interval_s
+        self.logger = logger
+        self.reconciled_at: Optional[float] = None
+        self._published_version: Optional[int] = None
+
+    def tick(self, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        feed = self.feed
+        live = feed is not None and feed.ready()
+        if self.reconcile_interval_s > 0 and (
+            self.reconciled_at is None or now - self.reconciled_at >= self.reconcile_interval_s
+        ):
+            self.reconciled_at = now
+            self.reconcile(feed if live else None)
+        if not live:
+            return
+        if feed.version != self._published_version:
+            self._published_version = feed.version
+            self._publish(feed.balances(), "ws")
+        else:
+            try:
+                os.utime(self.path)
+            except OSError:
+                self._publish(feed.balances(), "ws")
+
+    def reconcile(self, feed: Optional[WalletFeed]) -> None:
+        read_version = feed.version if feed is not None else 0
+        rest = self.fetch_rest()
+        if rest is None:
+            # fetch_inventory has already logged why
+            return
+        if feed is None:
+            self._publish(rest, "rest")
+            return
+        mismatches = feed.reconcile(rest, read_version)
+        if mismatches is None:
+            # The feed moved on during the REST call; compare again at the next reconcile
+            if self.logger:
+                log_event(self.logger, "INFO", "balance_reconcile_skipped", reason="ws_update_during_rest_read")
+            return
+        if mismatches and self.logger:
+            log_event(self.logger, "WARNING", "balance_reconcile_mismatch", mismatches=mismatches)
+
+    def _publish(self, balances: Dict[str, float], source: str) -> None:
+        atomic_write_state(
+            self.path, {"balances": balances, "source": source, "updated_at": time.time(), "reconciled_at": self.reconciled_at}
+        )
+
+
+def start_wallet_feed(cfg: Dict[str, Any], logger: Optional[logging.Logger] = None) -> Optional[WalletFeed]:
+    """
+    Start the websocket wallet feed when balance_cache_file and credentials are set.
+    Waits up to ws_ready_timeout_s for the first wallet snapshot; until the feed is
+    ready, the cache is only fed by the REST reconciliation.
+    """
+    if not cfg.get("balance_cache_file"):
+        return None
+    if not cfg.get("api_key") or not cfg.get("api_secret"):
+        if logger:
+            log_event(logger, "WARNING", "wallet_feed_missing_keys", msg="HB_BALANCE_CACHE_FILE needs BITFINEX_API_KEY/SECRET.")
+        return None
+    feed = WalletFeed(cfg["api_key"], cfg["api_secret"], host=cfg["ws_host"], max_age_s=cfg["ws_max_age_s"], logger=logger)
+    feed.start()
+    t0 = time.perf_counter()
+    ready = feed.wait_ready(cfg["ws_ready_timeout_s"])
+    if logger:
+        log_event(
+            logger,
+            "INFO" if ready else "WARNING",
+            "wallet_feed_started" if ready else "wallet_feed_not_ready",
+            host=cfg["ws_host"],
+            wait_ms=round((time.perf_counter() - t0) * 1000.0, 3),
+        )
+    return feed
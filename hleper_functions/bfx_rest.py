@@ -0,0 +1,335 @@
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bfxapi.exceptions import InvalidCredentialError
+from bfxapi.rest.exceptions import GenericError, RequestParameterError
+from bfxapi.types import Order, TradingPairTicker, Wallet, serializers
+
+from hleper_functions.rate_limiter import RateLimiter, endpoint_class, get_rate_limiter
+
+REST_HOST = "https://api.bitfinex.com/v2"
+# Most operations Bitfinex accepts in one auth/w/order/multi request
+MAX_MULTI_OPS = 75
+
+# Bitfinex error codes (["error", code, message])
+_ERR_PARAMS = 10020
+_ERR_AUTH_FAIL = 10100
+_ERR_RATE_LIMIT = 11010
+
+
+class RateLimitError(GenericError):
+    pass
+
+
+T = TypeVar("T")
+
+
+@dataclass
+class Notification(Generic[T]):
+    """
+    A Bitfinex notification ([MTS, TYPE, MESSAGE_ID, null, DATA, CODE, STATUS, TEXT]),
+    parsed here rather than with bfxapi's private notification serializer.
+    """
+
+    mts: int
+    type: str
+    message_id: Optional[int]
+    data: T
+    code: Optional[int]
+    status: str
+    text: str
+
+    @classmethod
+    def parse(cls, row: List[Any], data: Any = None) -> "Notification[Any]":
+        row = list(row) + [None] * (8 - len(row))
+        return cls(row[0], row[1], row[2], row[4] if data is None else data, row[5], row[6], row[7])
+
+
+class TtlCache:
+    """
+    Thread-safe TTL cache with request coalescing: concurrent callers asking for the
+    same missing key wait on the single in-flight load instead of issuing their own.
+    Failed loads are not cached.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._values: Dict[Any, Tuple[float, Any]] = {}
+        self._inflight: Dict[Any, Future] = {}
+
+    def get_or_load(self, key: Any, ttl_s: float, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            cached = self._values.get(key)
+            if cached is not None and time.monotonic() - cached[0] < ttl_s:
+                return cached[1]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if not leader:
+            return future.result()
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._values[key] = (time.monotonic(), value)
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class BfxRestSession:
+    """
+    Long-lived Bitfinex v2 REST client on a keep-alive requests.Session (one TLS
+    handshake per pooled connection, not per call). Orders, tickers and wallets are
+    parsed with bfxapi's public serializers, so callers get the same dataclasses as
+    from bfxapi.Client; notifications are parsed into the local Notification.
+    Public endpoints go through a TTL cache with request coalescing. With a limiter,
+    every request first takes a token from its endpoint class's shared bucket; a
+    rate-limit answer from the exchange drains that bucket and the request is retried
+    once after the wait.
+    """
+
+    def __init__(
+        self,
+        api_key: str = "",
+        api_secret: str = "",
+        host: str = REST_HOST,
+        timeout_s: float = 30.0,
+        public_ttl_s: float = 2.0,
+        pool_size: int = 10,
+        limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.host = host.rstrip("/")
+        self.timeout_s = timeout_s
+        self.public_ttl_s = public_ttl_s
+        self.cache = TtlCache()
+        self.limiter = limiter
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._nonce_lock = threading.Lock()
+        self._last_nonce = 0
+
+    # --- transport -----------------------------------------------------------------------
+
+    def _next_nonce(self) -> str:
+        # Strictly increasing even when two requests land in the same microsecond
+        with self._nonce_lock:
+            self._last_nonce = max(self._last_nonce + 1, int(time.time() * 1_000_000))
+            return str(self._last_nonce)
+
+    def _auth_headers(self, endpoint: str, body: str) -> Dict[str, str]:
+        if not self.api_key or not self.api_secret:
+            raise InvalidCredentialError("API-KEY and API-SECRET are required for authenticated endpoints.")
+        nonce = self._next_nonce()
+        signature = hmac.new(
+            self.api_secret.encode("utf8"),
+            f"/api/v2/{endpoint}{nonce}{body}".encode("utf8"),
+            hashlib.sha384,
+        ).hexdigest()
+        return {"bfx-nonce": nonce, "bfx-signature": signature, "bfx-apikey": self.api_key}
+
+    def _limited(self, endpoint: str, rate_class: Optional[str], send: Callable[[], Any]) -> Any:
+        if self.limiter is None:
+            return send()
+        name = rate_class or endpoint_class(endpoint)
+        self.limiter.acquire(name, endpoint)
+        try:
+            return send()
+        except RateLimitError:
+            self.limiter.drain(name)
+            self.limiter.acquire(name, endpoint)
+            return send()
+
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None, rate_class: Optional[str] = None) -> Any:
+        def send() -> Any:
+            response = self._session.get(
+                f"{self.host}/{endpoint}",
+                params=params,
+                headers={"Accept": "application/json"},
+                timeout=self.timeout_s,
+            )
+            return _decode(response)
+
+        return self._limited(endpoint, rate_class, send)
+
+    def post(self, endpoint: str, body: Optional[Dict[str, Any]] = None, rate_class: Optional[str] = None) -> Any:
+        data = json.dumps({k: v for k, v in (body or {}).items() if v is not None}) if body else ""
+
+        def send() -> Any:
+            # Signed per attempt: a retried request needs a fresh nonce
+            headers = {"Accept": "application/json", "Content-Type": "application/json"}
+            headers.update(self._auth_headers(endpoint, data))
+            response = self._session.post(f"{self.host}/{endpoint}", data=data or None, headers=headers, timeout=self.timeout_s)
+            return _decode(response)
+
+        return self._limited(endpoint, rate_class, send)
+
+    def warm_up(self) -> None:
+        """Open a pooled connection ahead of time (TLS handshake off the critical path)."""
+        self.get("platform/status")
+
+    def close(self) -> None:
+        self._session.close()
+
+    # --- public endpoints ----------------------------------------------------------------
+
+    def get_t_ticker(self, symbol: str, ttl_s: Optional[float] = None) -> TradingPairTicker:
+        ttl = self.public_ttl_s if ttl_s is None else ttl_s
+        data = self.cache.get_or_load(("ticker", symbol), ttl, lambda: self.get(f"ticker/{symbol}"))
+        return serializers.TradingPairTicker.parse(*data)
+
+    def get_t_tickers(self, symbols: List[str], ttl_s: Optional[float] = None) -> Dict[str, TradingPairTicker]:
+        """
+        Tickers for many trading pairs in one request; unknown symbols are simply absent.
+        """
+        ttl = self.public_ttl_s if ttl_s is None else ttl_s
+        key = ("tickers", tuple(sorted(symbols)))
+        data = self.cache.get_or_load(key, ttl, lambda: self.get("tickers", params={"symbols": ",".join(key[1])}))
+        return {row[0]: serializers.TradingPairTicker.parse(*row[1:]) for row in data if row and str(row[0]).startswith("t")}
+
+    # --- authenticated endpoints ---------------------------------------------------------
+
+    def get_wallets(self) -> List[Wallet]:
+        return [serializers.Wallet.parse(*row) for row in self.post("auth/r/wallets")]
+
+    def get_orders(self, symbol: Optional[str] = None, rate_class: Optional[str] = None) -> List[Order]:
+        endpoint = "auth/r/orders" if symbol is None else f"auth/r/orders/{symbol}"
+        return [serializers.Order.parse(*row) for row in self.post(endpoint, rate_class=rate_class)]
+
+    def submit_order(self, type: str, symbol: str, amount: str, price: str, **fields: Any) -> Notification[Order]:
+        body = {"type": type, "symbol": symbol, "amount": amount, "price": price, **fields}
+        row = self.post("auth/w/order/submit", body)
+        return Notification.parse(row, _parse_orders(row[4] if len(row) > 4 else None, single=True))
+
+    def order_multi(self, ops: List[Tuple[str, Dict[str, Any]]]) -> Notification[List[Notification[Order]]]:
+        """
+        Several order operations in one signed request (Bitfinex allows up to
+        MAX_MULTI_OPS): ("on", submit fields), ("oc", {"id": ...}), ("oc_multi", ...),
+        ("ou", update fields). data holds one notification per op, in order; a
+        successful op's data is parsed into an Order.
+        """
+        body = {"ops": [[op, {k: v for k, v in fields.items() if v is not None}] for op, fields in ops]}
+        row = self.post("auth/w/order/multi", body)
+        notification = Notification.parse(row)
+        notification.data = [_parse_op_notification(op) for op in notification.data or []]
+        return notification
+
+    def cancel_order_multi(
+        self,
+        id: Optional[List[int]] = None,
+        gid: Optional[List[int]] = None,
+        all: Optional[bool] = None,
+    ) -> Notification[List[Order]]:
+        body = {"id": id, "gid": gid, "all": 1 if all else None}
+        row = self.post("auth/w/order/cancel/multi", body)
+        return Notification.parse(row, _parse_orders(row[4] if len(row) > 4 else None) or [])
+
+
+def _parse_orders(data: Any, single: bool = False) -> Any:
+    """
+    Order rows of a notification's DATA as bfxapi Orders: a list of them, or with
+    single=True the one order (Bitfinex may wrap it in a one-element list). None when
+    DATA holds no order rows (e.g. an error notification).
+    """
+    if not isinstance(data, list) or not data:
+        return None
+    if not isinstance(data[0], list):
+        data = [data]
+    orders = [serializers.Order.parse(*row) for row in data]
+    return orders[0] if single else orders
+
+
+def _parse_op_notification(row: List[Any]) -> Notification[Optional[Order]]:
+    data = row[4] if len(row) > 4 else None
+    if row[6:7] == ["SUCCESS"]:
+        return Notification.parse(row, _parse_orders(data, single=True))
+    return Notification.parse(row)
+
+
+def _decode(response: requests.Response) -> Any:
+    """
+    Decode a REST response into its JSON payload, mapping every failure to this
+    module's errors: HTTP 429 to RateLimitError, a non-JSON or undecodable body
+    (e.g. a proxy's HTML error page) to GenericError, Bitfinex error payloads via
+    _check(), and any other non-2xx status to GenericError.
+    """
+    status = response.status_code
+    if status == 429:
+        raise RateLimitError("The request was rejected with the following generic error: <HTTP 429>.")
+    content_type = response.headers.get("Content-Type", "")
+    if "json" not in content_type.lower():
+        raise GenericError(f"The request failed with HTTP {status} and a non-JSON body ({content_type or 'no content type'}).")
+    try:
+        data = response.json()
+    except ValueError as e:
+        raise GenericError(f"The request failed with HTTP {status} and an undecodable JSON body: {e}") from e
+    # Bitfinex sends its ["error", code, message] payloads with HTTP 500
+    data = _check(data)
+    if status >= 400:
+        raise GenericError(f"The request failed with HTTP {status}: {data!r}")
+    return data
+
+
+def _check(data: Any) -> Any:
+    if isinstance(data, dict) and data.get("error") == "ERR_RATE_LIMIT":
+        raise RateLimitError("The request was rejected with the following generic error: <ERR_RATE_LIMIT>.")
+    if isinstance(data, list) and len(data) > 0 and data[0] == "error":
+        if data[1] == _ERR_RATE_LIMIT:
+            raise RateLimitError(f"The request was rejected with the following generic error: <{data[2]}>.")
+        if data[1] == _ERR_PARAMS:
+            raise RequestParameterError(f"The request was rejected with the following parameter error: <{data[2]}>.")
+        if data[1] == _ERR_AUTH_FAIL:
+            raise InvalidCredentialError("Can't authenticate with given API-KEY and API-SECRET.")
+        raise GenericError(f"The request was rejected with the following generic error: <{data[2]}>.")
+    return data
+
+
+_sessions: Dict[Tuple[str, str, str], BfxRestSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_rest_session(api_key: str = "", api_secret: str = "") -> BfxRestSession:
+    """
+    Shared process-wide session per (credentials, host). The host comes from
+    HB_BFX_REST_HOST so tests can point every caller at a local HTTP stand-in;
+    requests are throttled by the host-wide limiter (HB_RATE_LIMIT_FILE).
+    """
+    host = os.environ.get("HB_BFX_REST_HOST", REST_HOST)
+    key = (api_key, api_secret, host)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = BfxRestSession(
+                api_key,
+                api_secret,
+                host=host,
+                timeout_s=float(os.environ.get("HB_BFX_REST_TIMEOUT_S", "30")),
+                public_ttl_s=float(os.environ.get("HB_PUBLIC_CACHE_TTL_S", "2")),
+                limiter=get_rate_limiter(),
+            )
+            _sessions[key] = session
+        return session
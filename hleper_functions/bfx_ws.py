@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import websockets
+
+from hleper_functions.wide_logger import log_event
+
+WSS_HOST = "wss://api.bitfinex.com/ws/2"
+PUB_WSS_HOST = "wss://api-pub.bitfinex.com/ws/2"
+
+# Bitfinex "info" code asking every client to reconnect (server restart / maintenance)
+_INFO_RECONNECT = 20051
+
+
+def auth_message(api_key: str, api_secret: str, filters: Optional[List[str]] = None) -> str:
+    """
+    Build the signed `auth` event for the Bitfinex v2 websocket.
+    """
+    nonce = str(int(time.time() * 1_000_000))
+    payload = f"AUTH{nonce}"
+    signature = hmac.new(api_secret.encode("utf8"), payload.encode("utf8"), hashlib.sha384).hexdigest()
+    message: Dict[str, Any] = {
+        "event": "auth",
+        "apiKey": api_key,
+        "authSig": signature,
+        "authNonce": nonce,
+        "authPayload": payload,
+    }
+    if filters:
+        message["filter"] = filters
+    return json.dumps(message)
+
+
+class BfxWsFeed:
+    """
+    Background Bitfinex v2 websocket connection running on its own thread and event loop.
+
+    Subclasses keep their state in memory by overriding the hooks below; every (re)connect
+    calls on_connect() first, so snapshots always replace whatever was held before.
+    Readers on other threads must only touch state guarded by self._lock.
+    """
+
+    # json.loads parse_float hook; the public book overrides it to keep exact price text
+    parse_float: Callable[[str], Any] = float
+    # Auth "filter" list (e.g. ["wallet"]) limiting what the authenticated channel sends
+    auth_filter: Optional[List[str]] = None
+    # `conf` flags sent before anything else on each connect (e.g. book checksums)
+    conf_flags: int = 0
+
+    def __init__(
+        self,
+        host: str = WSS_HOST,
+        api_key: str = "",
+        api_secret: str = "",
+        subscriptions: Optional[List[Dict[str, Any]]] = None,
+        logger: Optional[logging.Logger] = None,
+        name: str = "bfx_ws",
+    ) -> None:
+        self.host = host
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.subscriptions = list(subscriptions or [])
+        self.logger = logger
+        self.name = name
+        self.last_message_at: Optional[float] = None
+        self.authenticated = False
+        self._lock = threading.Lock()
+        self._channels: Dict[int, Dict[str, Any]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._ws: Any = None
+        self._stopping = False
+
+    # --- hooks -------------------------------------------------------------------------
+
+    def on_connect(self) -> None:
+        """Called on the feed thread right after every successful connect."""
+
+    def on_disconnect(self) -> None:
+        """Called on the feed thread whenever the connection drops."""
+
+    def on_auth_message(self, abbreviation: str, payload: Any) -> None:
+        """Called for every non-heartbeat message on the authenticated channel 0."""
+
+    def on_channel_message(self, subscription: Dict[str, Any], payload: List[Any]) -> None:
+        """Called for every non-heartbeat message on a subscribed public channel."""
+
+    # --- lifecycle -----------------------------------------------------------------------
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 2.0) -> None:
+        self._stopping = True
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # Loop already closed
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout_s)
+        self._thread = None
+
+    def send(self, message: Any) -> None:
+        """
+        Send a message from any thread; silently dropped while disconnected.
+        """
+        loop, ws = self._loop, self._ws
+        if loop is None or ws is None:
+            return
+        data = message if isinstance(message, str) else json.dumps(message)
+        asyncio.run_coroutine_threadsafe(ws.send(data), loop)
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        try:
+            self._task = loop.create_task(self._main())
+            loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.close()
+            self._loop = None
+            self._task = None
+
+    async def _main(self) -> None:
+        backoff_s = 0.5
+        while not self._stopping:
+            try:
+                async with websockets.connect(self.host, open_timeout=10, max_size=None) as ws:
+                    self._ws = ws
+                    self._channels = {}
+                    self.authenticated = False
+                    self.on_connect()
+                    if self.conf_flags:
+                        await ws.send(json.dumps({"event": "conf", "flags": self.conf_flags}))
+                    if self.api_key and self.api_secret:
+                        await ws.send(auth_message(self.api_key, self.api_secret, self.auth_filter))
+                    for sub in self.subscriptions:
+                        await ws.send(json.dumps({"event": "subscribe", **sub}))
+                    backoff_s = 0.5
+                    async for raw in ws:
+                        self.last_message_at = time.time()
+                        self._dispatch(json.loads(raw, parse_float=self.parse_float))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not self._stopping and self.logger:
+                    log_event(self.logger, "WARNING", "ws_disconnected", feed=self.name, host=self.host, error=str(e))
+            finally:
+                self._ws = None
+                self.authenticated = False
+                self.on_disconnect()
+            if self._stopping:
+                break
+            await asyncio.sleep(backoff_s)
+            backoff_s = min(backoff_s * 2, 30.0)
+
+    def _dispatch(self, message: Any) -> None:
+        if isinstance(message, dict):
+            event = message.get("event")
+            if event == "auth":
+                self.authenticated = message.get("status") == "OK"
+                if not self.authenticated and self.logger:
+                    log_event(self.logger, "ERROR", "ws_auth_failed", feed=self.name, msg=message.get("msg"))
+            elif event == "subscribed":
+                self._channels[message["chanId"]] = message
+            elif event == "info" and message.get("code") == _INFO_RECONNECT:
+                raise ConnectionError("server requested reconnect (20051)")
+            elif event == "error" and self.logger:
+                log_event(self.logger, "ERROR", "ws_error", feed=self.name, code=message.get("code"), msg=message.get("msg"))
+            return
+        if not isinstance(message, list) or len(message) < 2 or message[1] == "hb":
+            return
+        if message[0] == 0:
+            self.on_auth_message(message[1], message[2] if len(message) > 2 else None)
+            return
+        subscription = self._channels.get(message[0])
+        if subscription is not None:
+            self.on_channel_message(subscription, message[1:])
@@ -0,0 +1,102 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# handler(method, path, query, body) -> JSON-serialisable response
+RouteHandler = Callable[[str, str, Dict[str, List[str]], Any], Any]
+
+
+class RawResponse(NamedTuple):
+    """A route response sent as-is (e.g. a proxy's HTML error page or a bare 429)."""
+
+    status: int
+    body: str
+    content_type: str = "text/html"
+
+
+class FakeBfxRestServer:
+    """
+    Minimal local stand-in for the Bitfinex v2 REST API, for tests and dry runs.
+
+    routes maps an endpoint path without the version prefix (e.g. "ticker/tPNKUSD",
+    "auth/r/wallets") to either a fixed JSON response or a RouteHandler; a RawResponse
+    (fixed or returned by a handler) is sent verbatim. Unknown endpoints answer
+    ["error", 10020, "..."]. Every request is recorded in `received` as (method, path,
+    query, body, headers); `connections` counts accepted TCP connections.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, routes: Optional[Dict[str, Any]] = None) -> None:
+        self.routes: Dict[str, Any] = dict(routes or {})
+        self.received: List[Tuple[str, str, Dict[str, List[str]], Any, Dict[str, str]]] = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake_bfx_rest", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(5.0)
+
+    def _respond(self, method: str, raw_path: str, body: Any, headers: Dict[str, str]) -> Any:
+        parts = urlsplit(raw_path)
+        path = parts.path.split("/v2/", 1)[-1].lstrip("/")
+        query = parse_qs(parts.query)
+        with self._lock:
+            self.received.append((method, path, query, body, headers))
+        route = self.routes.get(path)
+        if route is None:
+            return ["error", 10020, f"unknown endpoint: {path}"]
+        return route(method, path, query, body) if callable(route) else route
+
+    def _handler_class(self) -> type:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def _reply(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                body = json.loads(raw) if raw else None
+                result = fake._respond(method, self.path, body, dict(self.headers))
+                if isinstance(result, RawResponse):
+                    status, data, content_type = result.status, result.body.encode("utf-8"), result.content_type
+                else:
+                    status = 500 if isinstance(result, list) and result[:1] == ["error"] else 200
+                    data, content_type = json.dumps(result).encode("utf-8"), "application/json"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                self._reply("GET")
+
+            def do_POST(self) -> None:
+                self._reply("POST")
+
+            def log_message(self, *_: Any) -> None:
+                pass
+
+        return Handler
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import websockets
+
+
+class FakeBfxWsServer:
+    """
+    Minimal local stand-in for the Bitfinex v2 websocket, for tests and dry runs.
+
+    Accepts any `auth` event and replies with the frames returned by on_auth(); answers
+    `subscribe` events with a channel id and the frames returned by on_subscribe(chan_id, msg).
+    push() broadcasts extra frames to every connected client.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        on_auth: Optional[Callable[[], List[Any]]] = None,
+        on_subscribe: Optional[Callable[[int, Dict[str, Any]], List[Any]]] = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.on_auth = on_auth
+        self.on_subscribe = on_subscribe
+        self.received: List[Any] = []
+        self._clients: set = set()
+        self._next_chan_id = 100
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._started = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._run, name="fake_bfx_ws", daemon=True)
+        self._thread.start()
+        self._started.wait(5.0)
+        return self.url
+
+    def stop(self) -> None:
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join(5.0)
+
+    def push(self, frame: Any) -> None:
+        if self._loop is None:
+            return
+        data = json.dumps(frame)
+        for ws in list(self._clients):
+            asyncio.run_coroutine_threadsafe(ws.send(data), self._loop)
+
+    def drop_clients(self) -> None:
+        """Close every client connection abnormally, to exercise reconnect logic."""
+        if self._loop is None:
+            return
+        for ws in list(self._clients):
+            asyncio.run_coroutine_threadsafe(ws.close(code=1011), self._loop)
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(self._serve())
+        self._loop.close()
+
+    async def _serve(self) -> None:
+        self._stop = asyncio.Event()
+        async with websockets.serve(self._handler, self.host, self.port) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            self._started.set()
+            await self._stop.wait()
+
+    async def _handler(self, ws: Any, *_: Any) -> None:
+        self._clients.add(ws)
+        try:
+            await ws.send(json.dumps({"event": "info", "version": 2, "platform": {"status": 1}}))
+            async for raw in ws:
+                message = json.loads(raw)
+                self.received.append(message)
+                if not isinstance(message, dict):
+                    continue
+                if message.get("event") == "auth":
+                    await ws.send(json.dumps({"event": "auth", "status": "OK", "chanId": 0, "userId": 1}))
+                    for frame in (self.on_auth() if self.on_auth else []):
+                        await ws.send(json.dumps(frame))
+                elif message.get("event") == "subscribe":
+                    chan_id = self._next_chan_id
+                    self._next_chan_id += 1
+                    fields = {k: v for k, v in message.items() if k != "event"}
+                    await ws.send(json.dumps({"event": "subscribed", "chanId": chan_id, **fields}))
+                    for frame in (self.on_subscribe(chan_id, message) if self.on_subscribe else []):
+                        await ws.send(json.dumps(frame))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._clients.discard(ws)
@@ -1,8 +1,12 @@
 import json
 import os
+import queue
 import shlex
 import subprocess
-from typing import Any, Dict, Tuple
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
 
 
 def atomic_write_state(state_path: str, data: Dict[str, Any]) -> None:
@@ -52,3 +56,70 @@ def run_cancel_command(cmd: str, timeout_s: int) -> Tuple[int, str, str]:
         return 124, "", "cancel command timed out"
     except Exception as e:
         return 1, "", str(e)
+
+
+class StageResult(NamedTuple):
+    ok: bool
+    value: Any
+    error: Optional[str]
+    duration_ms: float
+    timed_out: bool
+
+
+def run_stages_concurrently(
+    stages: Dict[str, Callable[[], Any]],
+    deadlines_s: Dict[str, float],
+    max_workers: Optional[int] = None,
+) -> Dict[str, StageResult]:
+    """
+    Run independent blocking stages on a bounded set of daemon threads and collect each
+    result by its own deadline (seconds from the start of the call). A stage that raises
+    or misses its deadline comes back with ok=False; its thread is abandoned, not killed.
+    The threads are daemons (a ThreadPoolExecutor's are joined at exit), so a stage stuck
+    in I/O past its deadline cannot keep the process alive.
+    """
+    t0 = time.perf_counter()
+    finished: Dict[str, float] = {}
+    futures: Dict[str, Future] = {name: Future() for name in stages}
+    pending: "queue.SimpleQueue[Tuple[str, Callable[[], Any]]]" = queue.SimpleQueue()
+    for item in stages.items():
+        pending.put(item)
+
+    def _worker() -> None:
+        while True:
+            try:
+                name, fn = pending.get_nowait()
+            except queue.Empty:
+                return
+            future = futures[name]
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                value = fn()
+            except BaseException as e:
+                finished[name] = time.perf_counter()
+                future.set_exception(e)
+            else:
+                finished[name] = time.perf_counter()
+                future.set_result(value)
+
+    for i in range(min(max_workers or len(stages), len(stages))):
+        threading.Thread(target=_worker, name=f"stage_{i}", daemon=True).start()
+    results: Dict[str, StageResult] = {}
+    try:
+        for name, future in futures.items():
+            remaining = deadlines_s.get(name, 60.0) - (time.perf_counter() - t0)
+            try:
+                value = future.result(timeout=max(0.0, remaining))
+                ok, error, timed_out = True, None, False
+            except FutureTimeoutError:
+                value, ok, error, timed_out = None, False, "deadline exceeded", True
+            except Exception as e:
+                value, ok, error, timed_out = None, False, str(e), False
+            end = finished.get(name, time.perf_counter())
+            results[name] = StageResult(ok, value, error, round((end - t0) * 1000.0, 3), timed_out)
+    finally:
+        # Stages that never started are dropped
+        for future in futures.values():
+            future.cancel()
+    return results
@@ -1,8 +1,12 @@
 import json
 import os
 import logging
-from typing import List, Tuple, Optional, Dict, Any
-from bfxapi import Client
+import time
+from typing import List, Tuple, Optional, Dict, Any, Sequence, Union
+import numpy as np
+from hleper_functions.balance_cache import BalanceReading, read_balance_cache
+from hleper_functions.bfx_rest import get_rest_session
+from hleper_functions.orders import Orders
 from hleper_functions.wide_logger import log_event
 
 def calculate_mid_price(best_bid: Optional[float], best_ask: Optional[float]) -> float:
@@ -13,21 +17,85 @@ def calculate_mid_price(best_bid: Optional[float], best_ask: Optional[float]) ->
         return 0.0
     return (best_bid + best_ask) / 2.0
 
-def calculate_liquidity(orders: List[dict], mid_price: float, percentage: float = 2.0) -> Tuple[float, float]:
+DEFAULT_DEPTH_BANDS: Tuple[float, ...] = (0.5, 1.0, 2.0, 5.0, 10.0)
+
+
+def depth_profile(
+    orders: Union[List[dict], Orders],
+    mid_price: float,
+    bands: Sequence[float] = DEFAULT_DEPTH_BANDS,
+    curve_step_pct: Optional[float] = 0.25,
+) -> Dict[str, Any]:
+    """
+    Notional (amount * price) resting within ±band% of mid_price for every band at once.
+    Orders are turned into sorted price/notional arrays once; each band is then a
+    searchsorted lookup into the cumulative sums. When curve_step_pct is set, the
+    cumulative depth curve is sampled every curve_step_pct% out to the widest band.
+    An Orders container supplies those arrays directly.
+    """
+    bands_arr = np.asarray(sorted(bands), dtype=np.float64)
+    grid = np.empty(0, dtype=np.float64)
+    if curve_step_pct and len(bands_arr):
+        grid = np.arange(1, int(round(bands_arr[-1] / curve_step_pct)) + 1) * curve_step_pct
+
+    n = len(orders)
+    if mid_price <= 0 or n == 0:
+        zeros = [0.0] * len(bands_arr)
+        profile: Dict[str, Any] = {"bands_pct": bands_arr.tolist(), "bid_usd": zeros, "ask_usd": list(zeros)}
+        if curve_step_pct:
+            profile.update(curve_pct=grid.round(6).tolist(), bid_curve_usd=[0.0] * len(grid), ask_curve_usd=[0.0] * len(grid))
+        return profile
+
+    if isinstance(orders, Orders):
+        is_buy = orders.is_buy
+        is_sell = ~is_buy
+        price = orders.prices
+        notional = price * orders.amounts
+    else:
+        is_buy = np.fromiter((o["side"] == "BUY" for o in orders), dtype=bool, count=n)
+        is_sell = np.fromiter((o["side"] == "SELL" for o in orders), dtype=bool, count=n)
+        price = np.fromiter((o["price"] for o in orders), dtype=np.float64, count=n)
+        notional = price * np.fromiter((o["amount"] for o in orders), dtype=np.float64, count=n)
+
+    # Bids: descending by price, keyed on -price so searchsorted sees an ascending array
+    bid_order = np.argsort(-price[is_buy], kind="stable")
+    bid_keys = -price[is_buy][bid_order]
+    bid_cum = np.concatenate(([0.0], np.cumsum(notional[is_buy][bid_order])))
+    # Asks: ascending by price
+    ask_order = np.argsort(price[is_sell], kind="stable")
+    ask_keys = price[is_sell][ask_order]
+    ask_cum = np.concatenate(([0.0], np.cumsum(notional[is_sell][ask_order])))
+
+    def bid_within(pcts: np.ndarray) -> np.ndarray:
+        # price >= mid * (1 - pct)  <=>  -price <= -lower
+        return bid_cum[np.searchsorted(bid_keys, -mid_price * (1 - pcts / 100.0), side="right")]
+
+    def ask_within(pcts: np.ndarray) -> np.ndarray:
+        return ask_cum[np.searchsorted(ask_keys, mid_price * (1 + pcts / 100.0), side="right")]
+
+    profile = {
+        "bands_pct": bands_arr.tolist(),
+        "bid_usd": bid_within(bands_arr).tolist(),
+        "ask_usd": ask_within(bands_arr).tolist(),
+    }
+    if curve_step_pct:
+        profile.update(
+            curve_pct=grid.round(6).tolist(),
+            bid_curve_usd=bid_within(grid).tolist(),
+            ask_curve_usd=ask_within(grid).tolist(),
+        )
+    return profile
+
+
+def calculate_liquidity(orders: Union[List[dict], Orders], mid_price: float, percentage: float = 2.0) -> Tuple[float, float]:
     """
     Calculate total liquidity (amount) within ±percentage% of the mid_price.
     Returns (bid_liquidity, ask_liquidity).
     """
     if mid_price <= 0:
         return 0.0, 0.0
-        
-    lower_bound = mid_price * (1 - percentage / 100.0)
-    upper_bound = mid_price * (1 + percentage / 100.0)
-    
-    bid_liquidity = sum(o["amount"] * o["price"] for o in orders if o["side"] == "BUY" and o["price"] >= lower_bound)
-    ask_liquidity = sum(o["amount"] * o["price"] for o in orders if o["side"] == "SELL" and o["price"] <= upper_bound)
-    
-    return bid_liquidity, ask_liquidity
+    profile = depth_profile(orders, mid_price, (percentage,), curve_step_pct=None)
+    return profile["bid_usd"][0], profile["ask_usd"][0]
 
 def read_assets_state(file_path: str) -> Dict[str, Any]:
     """
@@ -42,42 +110,80 @@ def read_assets_state(file_path: str) -> Dict[str, Any]:
     except Exception:
         return {}
 
-def fetch_inventory(api_key: str, api_secret: str, logger: Optional[logging.Logger] = None) -> Dict[str, float]:
+def fetch_inventory(
+    api_key: str,
+    api_secret: str,
+    logger: Optional[logging.Logger] = None,
+    currencies: Optional[Sequence[str]] = ("PNK", "USD"),
+) -> Optional[Dict[str, float]]:
     """
-    Fetch current PNK and USD balances from Bitfinex exchange wallets.
+    Fetch current balances of the given currencies (default PNK and USD), or of
+    every currency when currencies is None, from Bitfinex exchange wallets.
+    Currencies without a wallet report 0.0. Returns None when the balances could
+    not be read, so a failed fetch is never mistaken for an empty wallet.
     """
     if not api_key or not api_secret:
         if logger:
             log_event(logger, "WARNING", "fetch_inventory_missing_keys", msg="API_KEY or API_SECRET is not set.")
-        return {"PNK": 0.0, "USD": 0.0}
+        return None
     
-    bfx = Client(api_key=api_key, api_secret=api_secret)
     try:
-        # The correct method name in bitfinex-api-py is get_wallets()
-        wallets = bfx.rest.auth.get_wallets()
-        inventory = {"PNK": 0.0, "USD": 0.0}
+        # Shared keep-alive session; wallets are parsed into bfxapi Wallet objects
+        wallets = get_rest_session(api_key, api_secret).get_wallets()
+        inventory = {currency: 0.0 for currency in currencies or ()}
         for wallet in wallets:
             # Based on Bitfinex API response, the field is wallet_type
-            if wallet.wallet_type == "exchange":
-                if wallet.currency == "PNK":
-                    inventory["PNK"] = float(wallet.balance)
-                elif wallet.currency == "USD":
-                    inventory["USD"] = float(wallet.balance)
+            if wallet.wallet_type == "exchange" and (currencies is None or wallet.currency in inventory):
+                inventory[wallet.currency] = float(wallet.balance)
         return inventory
     except Exception as e:
         if logger:
             log_event(logger, "ERROR", "fetch_inventory_failed", error=str(e))
-        # Returning zeros as fallback.
-        return {"PNK": 0.0, "USD": 0.0}
+        return None
+
+def read_inventory(
+    api_key: str,
+    api_secret: str,
+    currencies: Sequence[str],
+    cache_file: str = "",
+    cache_max_age_s: float = 30.0,
+    logger: Optional[logging.Logger] = None,
+    all_wallets: bool = False,
+) -> Dict[str, Optional[BalanceReading]]:
+    """
+    Balances of currencies (plus every other exchange wallet with all_wallets), each
+    with the time it was last known to be current:
+    1. from the balance cache (kept by snapshot_collector.py's wallet feed) while it
+       is younger than cache_max_age_s; a memory-speed read, no REST call
+    2. from REST (fetch_inventory)
+    3. when REST fails, the cached balance however old, as source "cache"
+    Currencies with no reading at all map to None.
+    """
+    cached = read_balance_cache(cache_file, None if all_wallets else currencies) if cache_file else None
+    if cached is not None:
+        if all_wallets:
+            # The currencies asked for read 0.0 when they have no wallet, as without all_wallets
+            cached.update({c: r for c, r in read_balance_cache(cache_file, currencies).items() if c not in cached})
+        if all(r.age_s <= cache_max_age_s for r in cached.values()):
+            return cached
+    rest = fetch_inventory(api_key, api_secret, logger=logger, currencies=None if all_wallets else currencies)
+    if rest is not None:
+        now = time.time()
+        for c in currencies:
+            rest.setdefault(c, 0.0)
+        return {c: BalanceReading(amount, now, "rest") for c, amount in rest.items()}
+    if cached is not None:
+        return {c: r._replace(source="cache") for c, r in cached.items()}
+    return {c: None for c in currencies}
 
 def fetch_ticker_price(symbol: str, logger: Optional[logging.Logger] = None) -> float:
     """
     Fetch the last price for a given symbol from Bitfinex public API.
+    Served from the shared session's TTL cache (HB_PUBLIC_CACHE_TTL_S) when fresh.
     """
-    bfx = Client()
     try:
         # Use get_t_ticker for trading pairs like tPNKUSD
-        ticker = bfx.rest.public.get_t_ticker(symbol)
+        ticker = get_rest_session().get_t_ticker(symbol)
         
         # bitfinex-api-py returns a TradingPairTicker dataclass
         if hasattr(ticker, 'last_price'):
@@ -0,0 +1,60 @@
+import time
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+from hleper_functions.bfx_rest import BfxRestSession, get_rest_session
+
+
+class CancelOutcome(NamedTuple):
+    ok: bool
+    cancel_requested: int
+    remaining: Optional[int]
+    rounds: int
+    error: Optional[str]
+    duration_ms: float
+
+
+def get_cancel_session(cfg: Dict[str, Any]) -> Optional[BfxRestSession]:
+    """
+    Authenticated REST session for the in-process cancel path, or None when it is
+    disabled (HB_FAST_CANCEL=0) or no API keys are configured.
+    """
+    if not cfg.get("fast_cancel") or not cfg.get("api_key") or not cfg.get("api_secret"):
+        return None
+    return get_rest_session(cfg["api_key"], cfg["api_secret"])
+
+
+def cancel_symbol_orders(
+    session: BfxRestSession,
+    symbol: str,
+    known_ids: Optional[Iterable[int]] = None,
+    max_rounds: int = 3,
+) -> CancelOutcome:
+    """
+    Cancel every open order on symbol with cancel/multi requests. known_ids (the orders
+    the breach was detected on) are cancelled first without a lookup; after that each
+    round re-reads the symbol's open orders and cancels what is left, until none remain
+    or max_rounds cancels were sent. ok means the last read found no open orders.
+    The re-reads are charged to the priority "cancel" rate-limit budget as well.
+    """
+    t0 = time.perf_counter()
+    ids = [i for i in (known_ids or []) if i is not None]
+    requested = 0
+    rounds = 0
+    try:
+        while True:
+            if not ids:
+                ids = [order.id for order in session.get_orders(symbol, rate_class="cancel")]
+                if not ids:
+                    return CancelOutcome(True, requested, 0, rounds, None, _ms(t0))
+                if rounds >= max_rounds:
+                    return CancelOutcome(False, requested, len(ids), rounds, "orders still open", _ms(t0))
+            session.cancel_order_multi(id=ids)
+            requested += len(ids)
+            rounds += 1
+            ids = []
+    except Exception as e:
+        return CancelOutcome(False, requested, None, rounds, str(e), _ms(t0))
+
+
+def _ms(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000.0, 3)
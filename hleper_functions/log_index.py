@@ -0,0 +1,332 @@
+import calendar
+import fcntl
+import json
+import mmap
+import os
+import re
+import time
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hleper_functions.log_rotation import is_compressed, open_segment
+
+try:
+    import orjson
+except ImportError:  # optional: faster decoder, same JSON
+    orjson = None
+
+# Numeric event fields copied into the index, so aggregates never re-read the log.
+# Proportions are logged as formatted strings and are parsed as numbers too.
+INDEXED_FIELDS = (
+    "spread_percent",
+    "threshold_percent",
+    "best_bid",
+    "best_ask",
+    "mid_price",
+    "pnk_price",
+    "bid_liquidity_usd_2pct",
+    "ask_liquidity_usd_2pct",
+    "buys_count",
+    "sells_count",
+    "pnk_amount",
+    "usd_amount",
+    "total_value",
+    "pnk_proportion",
+    "usd_proportion",
+    "prev_total_value",
+    "cycle_ms",
+    "breach_to_flat_ms",
+    "breach_to_done_ms",
+    "orders_added",
+    "orders_removed",
+    "orders_repriced",
+    "orders_resized",
+    "market_spread_percent",
+)
+BREACH_EVENTS = ("spread_threshold_breached",)
+
+_VERSION = 1
+_DTYPE = np.dtype(
+    [("ts", "<f8"), ("offset", "<u8"), ("length", "<u4"), ("event", "<u2"), ("symbol", "<u2")]
+    + [(name, "<f8") for name in INDEXED_FIELDS]
+)
+# Bytes of the log head hashed to notice a file that was replaced or rewritten
+_HEAD_BYTES = 256
+
+
+def _loads(line: bytes) -> Any:
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def parse_ts(value: Any) -> Optional[float]:
+    """Epoch seconds from a logged "2026-10-17T00:50:11Z" (or a number)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return _parse_iso(str(value))
+
+
+def _parse_iso(value: str) -> Optional[float]:
+    # strptime is the bulk of indexing time; only the date part needs it (cached)
+    if len(value) == 20 and value[10] == "T" and value[13] == ":" and value[16] == ":" and value[19] == "Z":
+        day = _parse_day(value[:10])
+        try:
+            if day is not None:
+                return day + int(value[11:13]) * 3600 + int(value[14:16]) * 60 + int(value[17:19])
+        except ValueError:
+            pass
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_day(value: str) -> Optional[float]:
+    try:
+        return float(calendar.timegm(time.strptime(value, "%Y-%m-%d")))
+    except ValueError:
+        return None
+
+
+def _number(value: Any) -> float:
+    if type(value) is float:
+        return value
+    if isinstance(value, bool) or value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class LogIndex:
+    """
+    Sidecar index of one JSON-lines log: <log>.idx holds one fixed-width record per
+    line (ts, byte offset/length, interned event and symbol, INDEXED_FIELDS as
+    float64, NaN when absent) and <log>.idx.json the metadata (bytes indexed so far,
+    interned names, a hash of the log head). update() parses only the bytes appended
+    since the last run, read through mmap; a log that shrank or whose head changed is
+    re-indexed from scratch. Compressed rotated segments (log_rotation.py) never
+    change, so they are decompressed and indexed once; offsets then refer to the
+    decompressed bytes. Records are loaded as a numpy memmap for queries.
+    """
+
+    def __init__(self, log_path: str, index_path: Optional[str] = None) -> None:
+        self.log_path = os.path.expanduser(log_path)
+        self.index_path = index_path or f"{self.log_path}.idx"
+        self.meta_path = f"{self.index_path}.json"
+        self.meta = self._load_meta()
+        self._data: Optional[bytes] = None
+
+    def _empty_meta(self) -> Dict[str, Any]:
+        return {"version": _VERSION, "fields": list(INDEXED_FIELDS), "indexed_bytes": 0, "records": 0,
+                "head_crc": None, "head_len": 0, "events": [], "symbols": [""]}
+
+    def _load_meta(self) -> Dict[str, Any]:
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") == _VERSION and meta.get("fields") == list(INDEXED_FIELDS):
+                return meta
+        except (OSError, ValueError):
+            pass
+        return self._empty_meta()
+
+    def _save_meta(self) -> None:
+        tmp = f"{self.meta_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self.meta_path)
+
+    @staticmethod
+    def _intern(table: List[str], lookup: Dict[str, int], name: str) -> int:
+        code = lookup.get(name)
+        if code is None:
+            code = lookup[name] = len(table)
+            table.append(name)
+        return code
+
+    def update(self) -> int:
+        """
+        Index lines appended since the last call; returns how many were added.
+        Only complete (newline-terminated) lines are indexed.
+        """
+        with open(f"{self.index_path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.meta = self._load_meta()
+            if is_compressed(self.log_path):
+                return self._update_compressed()
+            try:
+                log = open(self.log_path, "rb")
+            except FileNotFoundError:
+                return 0
+            with log:
+                size = os.fstat(log.fileno()).st_size
+                head = log.read(_HEAD_BYTES)
+                if size < self.meta["indexed_bytes"] or (
+                    self.meta["indexed_bytes"] and zlib.crc32(head[: self.meta["head_len"]]) != self.meta["head_crc"]
+                ):
+                    self.meta = self._empty_meta()
+                if size <= self.meta["indexed_bytes"]:
+                    return 0
+                self.meta["head_crc"], self.meta["head_len"] = zlib.crc32(head), len(head)
+                with mmap.mmap(log.fileno(), size, access=mmap.ACCESS_READ) as mm:
+                    start = self.meta["indexed_bytes"]
+                    end = mm.rfind(b"\n", start, size) + 1
+                    if end <= start:
+                        return 0
+                    records = self._parse(mm, start, end)
+            return self._append(records, end)
+
+    def _update_compressed(self) -> int:
+        try:
+            with open(self.log_path, "rb") as f:
+                head = f.read(_HEAD_BYTES)
+        except FileNotFoundError:
+            return 0
+        if self.meta["indexed_bytes"] and zlib.crc32(head) == self.meta["head_crc"]:
+            return 0
+        self.meta = self._empty_meta()
+        self.meta["head_crc"], self.meta["head_len"] = zlib.crc32(head), len(head)
+        data = self._decompressed()
+        end = data.rfind(b"\n") + 1
+        return self._append(self._parse(data, 0, end), end)
+
+    def _append(self, records: np.ndarray, end: int) -> int:
+        mode = "r+b" if self.meta["records"] else "wb"
+        with open(self.index_path, mode) as idx:
+            # Drop records written after the last saved metadata (interrupted update)
+            idx.truncate(self.meta["records"] * _DTYPE.itemsize)
+            idx.seek(0, os.SEEK_END)
+            idx.write(records.tobytes())
+        self.meta["records"] += len(records)
+        self.meta["indexed_bytes"] = end
+        self._save_meta()
+        return len(records)
+
+    def _decompressed(self) -> bytes:
+        if self._data is None:
+            with open_segment(self.log_path) as f:
+                self._data = f.read()
+        return self._data
+
+    def _parse(self, mm: Any, start: int, end: int) -> np.ndarray:
+        events: List[str] = self.meta["events"]
+        symbols: List[str] = self.meta["symbols"]
+        event_codes = {name: i for i, name in enumerate(events)}
+        symbol_codes = {name: i for i, name in enumerate(symbols)}
+        rows = []
+        pos = start
+        while pos < end:
+            nl = mm.find(b"\n", pos, end)
+            line = mm[pos:nl]
+            if line.strip():
+                try:
+                    record = _loads(line)
+                except ValueError:
+                    record = None
+                if isinstance(record, dict):
+                    get = record.get
+                    ts = parse_ts(record.get("ts"))
+                    rows.append(
+                        (np.nan if ts is None else ts, pos, nl - pos,
+                         self._intern(events, event_codes, str(record.get("event", ""))),
+                         self._intern(symbols, symbol_codes, str(record.get("symbol") or "")))
+                        + tuple(_number(get(name)) for name in INDEXED_FIELDS)
+                    )
+            pos = nl + 1
+        return np.array(rows, dtype=_DTYPE)
+
+    def records(self) -> np.ndarray:
+        """All index records (read-only memmap; empty array before the first update)."""
+        if not self.meta["records"]:
+            return np.zeros(0, dtype=_DTYPE)
+        return np.memmap(self.index_path, dtype=_DTYPE, mode="r", shape=(self.meta["records"],))
+
+    def select(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        events: Optional[Sequence[str]] = None,
+        symbol: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        Records with since <= ts < until, optionally limited to some events / a symbol.
+        """
+        recs = self.records()
+        mask = np.ones(len(recs), dtype=bool)
+        if since is not None:
+            mask &= recs["ts"] >= since
+        if until is not None:
+            mask &= recs["ts"] < until
+        if events:
+            codes = [self.meta["events"].index(e) for e in events if e in self.meta["events"]]
+            mask &= np.isin(recs["event"], codes)
+        if symbol:
+            code = self.meta["symbols"].index(symbol) if symbol in self.meta["symbols"] else -1
+            mask &= recs["symbol"] == code
+        return np.asarray(recs[mask])
+
+    def event_name(self, code: int) -> str:
+        return self.meta["events"][code]
+
+    def lines(self, selected: np.ndarray) -> Iterator[str]:
+        """The raw log lines of selected records, sliced out of an mmap of the log."""
+        if len(selected) == 0:
+            return
+        spans = zip(selected["offset"].tolist(), selected["length"].tolist())
+        if is_compressed(self.log_path):
+            data = self._decompressed()
+            for offset, length in spans:
+                yield data[offset:offset + length].decode("utf-8", "replace")
+            return
+        with open(self.log_path, "rb") as log, mmap.mmap(log.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset, length in spans:
+                yield mm[offset:offset + length].decode("utf-8", "replace")
+
+
+def summarize(values: np.ndarray, percentiles: Sequence[float]) -> Dict[str, Any]:
+    """count/min/max/mean and the requested percentiles of the non-NaN values."""
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return {"count": 0}
+    out: Dict[str, Any] = {
+        "count": int(len(values)),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "mean": float(values.mean()),
+    }
+    for p, v in zip(percentiles, np.percentile(values, list(percentiles)).tolist()):
+        out[f"p{p:g}"] = v
+    return out
+
+
+def parse_time(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Epoch seconds from "7d"/"12h"/"30m"/"90s"/"2w" (ago), an ISO date or
+    timestamp ("2026-10-01", "2026-10-01T12:00:00Z") or epoch seconds.
+    """
+    if not value:
+        return None
+    now = time.time() if now is None else now
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([smhdw])", value.strip())
+    if m:
+        unit = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}[m.group(2)]
+        return now - float(m.group(1)) * unit
+    for fmt in ("%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return float(calendar.timegm(time.strptime(value, fmt)))
+        except ValueError:
+            pass
+    return float(value)
+
+
+def bucket_edges(since: float, until: float, width_s: Optional[float]) -> List[Tuple[float, float]]:
+    if not width_s:
+        return [(since, until)]
+    start = since - (since % width_s)
+    edges = []
+    while start < until:
+        edges.append((max(start, since), min(start + width_s, until)))
+        start += width_s
+    return edges
@@ -0,0 +1,470 @@
+import calendar
+import fcntl
+import glob
+import gzip
+import json
+import mmap
+import os
+import queue
+import re
+import shutil
+import struct
+import threading
+import time
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional: zstd segments, gzip otherwise
+    zstandard = None
+
+COMPRESSIONS = ("gzip", "zstd", "none")
+_SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+_TS_RE = re.compile(rb'"ts":\s*"([0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}Z)"')
+# Bytes scanned at each end of a segment for its first/last timestamps
+_SCAN_BYTES = 65536
+# <log>.lock holds a rotation counter, mapped by every writer so noticing a rotation costs no syscall
+_GENERATION = struct.Struct("<Q")
+# The size is tracked locally and refreshed with fstat() (other processes append
+# too) after this many writes or seconds, whichever comes first
+_REFRESH_WRITES = 64
+_REFRESH_S = 1.0
+# Uncompressed segments older than this were left behind and get compressed on open
+_ORPHAN_AGE_S = 120.0
+# close() waits at most this long for pending compressions; the next process to open
+# the log finishes whatever is left, so shutdown is never held up by a large segment
+_CLOSE_WAIT_S = 2.0
+
+
+def parse_interval(value: str) -> float:
+    """Seconds from "1d"/"6h"/"30m"/"90s" or a plain number (0 = off)."""
+    value = value.strip()
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([smhdw]?)", value)
+    if not m:
+        raise ValueError(f"invalid interval: {value!r}")
+    return float(m.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}[m.group(2)]
+
+
+def manifest_path(log_path: str) -> str:
+    return f"{os.path.expanduser(log_path)}.manifest.json"
+
+
+def read_manifest(log_path: str) -> Dict[str, Any]:
+    """
+    {"segments": [{"file", "start", "end", "bytes", "stored_bytes", "compression"}, ...]}
+    oldest first; file is relative to the log's directory, start/end are epoch seconds
+    (end exclusive). Empty when the log was never rotated.
+    """
+    try:
+        with open(manifest_path(log_path), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if isinstance(manifest.get("segments"), list):
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"segments": []}
+
+
+def _write_manifest(log_path: str, manifest: Dict[str, Any]) -> None:
+    path = manifest_path(log_path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, path)
+
+
+def log_segments(log_path: str, since: Optional[float] = None, until: Optional[float] = None) -> List[str]:
+    """
+    Files holding the log's lines for [since, until), oldest first: the rotated
+    segments whose manifest time range overlaps, then the active log (if it exists).
+    """
+    log_path = os.path.expanduser(log_path)
+    directory = os.path.dirname(log_path)
+    paths = []
+    for segment in read_manifest(log_path)["segments"]:
+        if since is not None and segment["end"] <= since:
+            continue
+        if until is not None and segment["start"] >= until:
+            continue
+        path = os.path.join(directory, segment["file"])
+        if os.path.exists(path):
+            paths.append(path)
+    if os.path.exists(log_path):
+        paths.append(log_path)
+    return paths
+
+
+def open_segment(path: str) -> BinaryIO:
+    """Binary reader for a segment, decompressing .gz/.zst transparently."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{path}: reading zstd segments needs the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return open(path, "rb")
+
+
+def is_compressed(path: str) -> bool:
+    return path.endswith(".gz") or path.endswith(".zst")
+
+
+def _line_ts(line: bytes) -> Optional[float]:
+    m = _TS_RE.search(line)
+    if not m:
+        return None
+    try:
+        return float(calendar.timegm(time.strptime(m.group(1).decode(), "%Y-%m-%dT%H:%M:%SZ")))
+    except ValueError:
+        return None
+
+
+def _time_range(fd: int, size: int) -> Tuple[Optional[float], Optional[float]]:
+    """First/last line timestamps of a file, from the complete lines at its head and tail."""
+    head = os.pread(fd, min(size, _SCAN_BYTES), 0)
+    tail = os.pread(fd, min(size, _SCAN_BYTES), max(0, size - _SCAN_BYTES))
+    head_lines = head.split(b"\n")[:-1] if len(head) < size else head.split(b"\n")
+    tail_lines = tail.split(b"\n")[1:] if size > _SCAN_BYTES else tail.split(b"\n")
+    stamps = [ts for ts in map(_line_ts, head_lines + tail_lines) if ts is not None]
+    if not stamps:
+        return None, None
+    return min(stamps), max(stamps)
+
+
+class _Compressor:
+    """One background thread per process that compresses closed segments in turn."""
+
+    def __init__(self) -> None:
+        self._queue: "queue.Queue[Tuple[RotatingLogFile, str]]" = queue.Queue()
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="log_compressor", daemon=True)
+        self._thread.start()
+
+    def submit(self, owner: "RotatingLogFile", segment: str) -> None:
+        with self._cond:
+            self._pending += 1
+        self._queue.put((owner, segment))
+
+    def wait(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            owner, segment = self._queue.get()
+            try:
+                owner._compress(segment)
+            except Exception:
+                pass  # the segment stays uncompressed and is retried on the next open
+            finally:
+                with self._cond:
+                    self._pending -= 1
+                    self._cond.notify_all()
+
+
+_compressor: Optional[_Compressor] = None
+_compressor_lock = threading.Lock()
+
+
+def _get_compressor() -> _Compressor:
+    global _compressor
+    with _compressor_lock:
+        if _compressor is None:
+            _compressor = _Compressor()
+        return _compressor
+
+
+class RotatingLogFile:
+    """
+    Append-only text stream for a log file that rotates itself: once the active file
+    reaches max_bytes, or its first line lies in an earlier interval_s period (UTC
+    aligned), it is renamed to <log>.<first-ts>-<rotation number> and recorded in
+    <log>.manifest.json with its time range. Closed segments are compressed on a
+    background thread; segments beyond keep_segments or older than retention_days
+    are deleted (both 0 by default: keep everything).
+
+    Several processes may append to the same log: writes take a shared flock on
+    <log>.lock (rotation takes it exclusively), and a rotation counter mapped from
+    that file tells writers to reopen the log once someone else rotated it. Lines are buffered until complete, so rotation only
+    ever happens between lines.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 0,
+        interval_s: float = 0.0,
+        compression: str = "gzip",
+        keep_segments: int = 0,
+        retention_days: float = 0.0,
+    ) -> None:
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"unknown log compression {compression!r} (expected one of {', '.join(COMPRESSIONS)})")
+        if compression == "zstd" and zstandard is None:
+            compression = "gzip"
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        self.interval_s = interval_s
+        self.compression = compression
+        self.keep_segments = keep_segments
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._closed = False
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock_fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._lock_fd).st_size < _GENERATION.size:
+                os.ftruncate(self._lock_fd, _GENERATION.size)
+            self._generation_map = mmap.mmap(self._lock_fd, _GENERATION.size)
+            self._fd = -1
+            self._generation = -1
+            self._size = 0
+            self._writes = 0
+            self._size_checked = 0.0
+            self._first_ts: Optional[float] = None
+            self._open()
+            self._remove_stale_tmp()
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        if self.compression != "none":
+            # Segments left uncompressed by a process that exited early (recent ones
+            # are most likely still being compressed by the process that rotated them)
+            for segment in read_manifest(self.path)["segments"]:
+                path = os.path.join(os.path.dirname(self.path), segment["file"])
+                if segment.get("compression") is None and _mtime(path) < time.time() - _ORPHAN_AGE_S:
+                    _get_compressor().submit(self, path)
+
+    def _remove_stale_tmp(self) -> None:
+        # Compressed segments and manifests are written to <name>.<pid>.tmp first; a
+        # process that died mid-write leaves its file behind. Called with the lock held.
+        for tmp in glob.glob(f"{glob.escape(self.path)}.*.tmp"):
+            try:
+                pid = int(tmp.rsplit(".", 2)[1])
+            except ValueError:
+                continue
+            if pid != os.getpid() and not _pid_alive(pid):
+                _unlink(tmp)
+
+    # -- stream interface (logging.StreamHandler / BatchingHandler) --
+
+    def write(self, data: str) -> int:
+        with self._lock:
+            if self._closed:
+                raise ValueError("I/O operation on closed log file")
+            if not data.endswith("\n"):
+                self._buffer.append(data)
+                return len(data)
+            if self._buffer:
+                data, self._buffer = "".join(self._buffer) + data, []
+            self._write(data.encode("utf-8"))
+        return len(data)
+
+    def flush(self) -> None:
+        pass  # complete lines are written unbuffered; a partial line waits for its newline
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._buffer:
+                self._write("".join(self._buffer).encode("utf-8"))
+                self._buffer = []
+            os.close(self._fd)
+        if _compressor is not None:
+            _compressor.wait(_CLOSE_WAIT_S)
+        self._generation_map.close()
+        os.close(self._lock_fd)
+
+    # -- internals --
+
+    def _current_generation(self) -> int:
+        return _GENERATION.unpack_from(self._generation_map)[0]
+
+    def _open(self) -> None:
+        # Called with <log>.lock held (shared or exclusive)
+        if self._fd >= 0:
+            os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._generation = self._current_generation()
+        self._size = os.fstat(self._fd).st_size
+        self._first_ts = None
+        if self._size:
+            with open(self.path, "rb") as f:
+                self._first_ts = _time_range(f.fileno(), min(self._size, _SCAN_BYTES))[0]
+
+    def _rotation_due(self, size: int, now: float) -> bool:
+        if not size:
+            return False
+        if self.max_bytes and size >= self.max_bytes:
+            return True
+        if self.interval_s and self._first_ts is not None:
+            return self._first_ts // self.interval_s != now // self.interval_s
+        return False
+
+    def _write(self, data: bytes) -> None:
+        now = time.time()
+        fcntl.flock(self._lock_fd, fcntl.LOCK_SH)
+        try:
+            if self._current_generation() != self._generation:
+                self._open()  # rotated by another process
+            self._writes += 1
+            if self._writes >= _REFRESH_WRITES or now - self._size_checked >= _REFRESH_S:
+                self._size = os.fstat(self._fd).st_size
+                self._writes, self._size_checked = 0, now
+            if self._rotation_due(self._size, now):
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                self._rotate(now)
+                fcntl.flock(self._lock_fd, fcntl.LOCK_SH)
+                if self._current_generation() != self._generation:
+                    self._open()
+            if self._first_ts is None:
+                self._first_ts = now
+            os.write(self._fd, data)
+            self._size += len(data)
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _rotate(self, now: float) -> None:
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            if self._current_generation() != self._generation:
+                self._open()
+            self._size = os.fstat(self._fd).st_size
+            if not self._rotation_due(self._size, now):
+                return  # another process rotated first
+            size = self._size
+            with open(self.path, "rb") as f:
+                start, end = _time_range(f.fileno(), size)
+            start = self._first_ts if start is None else start
+            end = now if end is None else end + 1.0  # ts has one-second resolution
+            base = f"{self.path}.{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(start))}"
+            # The (never reused) generation, zero-padded, keeps names unique and in
+            # chronological order even for segments starting in the same second
+            generation = self._current_generation() + 1
+            segment = f"{base}-{generation:010d}"
+            while any(os.path.exists(segment + suffix) for suffix in _SUFFIXES.values()):
+                generation += 1
+                segment = f"{base}-{generation:010d}"
+            os.rename(self.path, segment)
+            _GENERATION.pack_into(self._generation_map, 0, self._current_generation() + 1)
+            self._open()
+            manifest = read_manifest(self.path)
+            manifest["segments"].append(
+                {
+                    "file": os.path.basename(segment),
+                    "start": start,
+                    "end": end,
+                    "bytes": size,
+                    "stored_bytes": size,
+                    "compression": None,
+                }
+            )
+            self._apply_retention(manifest, now)
+            _write_manifest(self.path, manifest)
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        if self.compression != "none":
+            _get_compressor().submit(self, segment)
+
+    def _apply_retention(self, manifest: Dict[str, Any], now: float) -> None:
+        directory = os.path.dirname(self.path)
+        segments = manifest["segments"]
+        drop = 0
+        if self.keep_segments:
+            drop = max(0, len(segments) - self.keep_segments)
+        if self.retention_days:
+            cutoff = now - self.retention_days * 86400.0
+            while drop < len(segments) and segments[drop]["end"] < cutoff:
+                drop += 1
+        for segment in segments[:drop]:
+            _remove_segment(os.path.join(directory, segment["file"]))
+        manifest["segments"] = segments[drop:]
+
+    def _compress(self, segment: str) -> None:
+        suffix = _SUFFIXES[self.compression]
+        tmp = f"{segment}{suffix}.{os.getpid()}.tmp"
+        try:
+            with open(segment, "rb") as src:
+                if self.compression == "zstd":
+                    with open(tmp, "wb") as raw, zstandard.ZstdCompressor().stream_writer(raw) as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+                else:
+                    with gzip.open(tmp, "wb", compresslevel=6) as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+        except FileNotFoundError:
+            _unlink(tmp)  # already compressed or deleted by another process
+            return
+        # The compressor thread opens <log>.lock itself: flock locks belong to the open
+        # file description, so locking the writer's descriptor from here would convert
+        # and then release the writer's shared lock in the middle of a write
+        lock_fd = os.open(f"{self.path}.lock", os.O_RDWR)
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        try:
+            manifest = read_manifest(self.path)
+            name = os.path.basename(segment)
+            entry = next((s for s in manifest["segments"] if s["file"] == name), None)
+            if entry is None or not os.path.exists(segment):
+                _unlink(tmp)
+                return
+            os.replace(tmp, f"{segment}{suffix}")
+            _remove_segment(segment)
+            entry.update(file=f"{name}{suffix}", compression=self.compression, stored_bytes=os.path.getsize(f"{segment}{suffix}"))
+            _write_manifest(self.path, manifest)
+        finally:
+            os.close(lock_fd)  # also releases the flock
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by someone else
+    return True
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return float("inf")
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_segment(path: str) -> None:
+    """Delete a segment together with any sidecar index built for it."""
+    _unlink(path)
+    for sidecar in glob.glob(f"{glob.escape(path)}.idx*"):
+        _unlink(sidecar)
+
+
+def rotating_log_from_env(path: str) -> RotatingLogFile:
+    """
+    RotatingLogFile configured by HB_LOG_ROTATE_BYTES, HB_LOG_ROTATE_INTERVAL,
+    HB_LOG_COMPRESSION, HB_LOG_KEEP_SEGMENTS and HB_LOG_RETENTION_DAYS.
+    """
+    return RotatingLogFile(
+        path,
+        max_bytes=int(os.environ.get("HB_LOG_ROTATE_BYTES", str(100 * 1024 * 1024))),
+        interval_s=parse_interval(os.environ.get("HB_LOG_ROTATE_INTERVAL", "1d")),
+        compression=os.environ.get("HB_LOG_COMPRESSION", "gzip").strip().lower(),
+        keep_segments=int(os.environ.get("HB_LOG_KEEP_SEGMENTS", "0")),
+        retention_days=float(os.environ.get("HB_LOG_RETENTION_DAYS", "0")),
+    )
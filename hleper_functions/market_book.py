@@ -0,0 +1,370 @@
+import logging
+import threading
+import time
+import zlib
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hleper_functions.bfx_ws import PUB_WSS_HOST, BfxWsFeed
+from hleper_functions.helper_functions_spread import compute_spread_percent_mid
+from hleper_functions.order_book import OrderBook
+from hleper_functions.wide_logger import log_event
+
+# `conf` flag asking Bitfinex for a ["cs", <crc32>] frame after book updates
+BOOK_CHECKSUM_FLAG = 131072
+# The checksum covers the best 25 levels of each side
+CHECKSUM_LEVELS = 25
+
+
+def book_checksum(bids: Sequence[Tuple[str, str]], asks: Sequence[Tuple[str, str]]) -> int:
+    """
+    Bitfinex book checksum: CRC32 (as a signed 32-bit int) of the best 25 bid and
+    ask levels interleaved as "bid_price:bid_amount:ask_price:ask_amount:...", using
+    the exact price/amount text of the feed (ask amounts negative). bids and asks
+    are (price_text, amount_text) pairs, best first.
+    """
+    parts: List[str] = []
+    for i in range(CHECKSUM_LEVELS):
+        if i < len(bids):
+            parts.extend(bids[i])
+        if i < len(asks):
+            parts.extend(asks[i])
+    crc = zlib.crc32(":".join(parts).encode("ascii"))
+    return crc - (1 << 32) if crc >= 1 << 31 else crc
+
+
+class MarketBook:
+    """
+    Aggregated (P0-P4) L2 market book from the public `book` channel.
+
+    Like OrderBook, each side keeps its prices in an ascending list (bisect
+    insert/remove) plus a price -> level dict, so best bid/ask and the amount at a
+    price are O(1) and a level update is O(log n) + one memmove. Each level also keeps
+    the feed's price/amount text, which the checksum is computed on. Band depth is
+    answered with searchsorted on cumulative arrays that are rebuilt lazily, at most
+    once per read after the book changed.
+    """
+
+    def __init__(self) -> None:
+        self._levels: Dict[str, List[float]] = {"BUY": [], "SELL": []}
+        # price -> (amount, price_text, amount_text); amounts are positive on both sides
+        self._level: Dict[str, Dict[float, Tuple[float, str, str]]] = {"BUY": {}, "SELL": {}}
+        # side -> (keys ascending, cumulative amount, cumulative notional), from the best price outward
+        self._cum: Dict[str, Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]] = {"BUY": None, "SELL": None}
+
+    def __len__(self) -> int:
+        return len(self._levels["BUY"]) + len(self._levels["SELL"])
+
+    # --- updates -------------------------------------------------------------------------
+
+    def clear(self) -> None:
+        for side in ("BUY", "SELL"):
+            self._levels[side].clear()
+            self._level[side].clear()
+            self._cum[side] = None
+
+    def apply_snapshot(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Replace the book with [PRICE, COUNT, AMOUNT] rows."""
+        self.clear()
+        for price, count, amount in rows:
+            if count:
+                self._set(price, amount, bulk=True)
+        for side in ("BUY", "SELL"):
+            self._levels[side] = sorted(self._level[side])
+
+    def apply(self, price: Any, count: int, amount: Any) -> None:
+        """
+        One [PRICE, COUNT, AMOUNT] update: COUNT 0 deletes the level (AMOUNT 1 for
+        bids, -1 for asks), otherwise the level is set; AMOUNT > 0 is a bid.
+        """
+        if count:
+            self._set(price, amount, bulk=False)
+            return
+        side = "BUY" if float(amount) > 0 else "SELL"
+        p = float(price)
+        if self._level[side].pop(p, None) is not None:
+            levels = self._levels[side]
+            del levels[bisect_left(levels, p)]
+            self._cum[side] = None
+
+    def _set(self, price: Any, amount: Any, bulk: bool) -> None:
+        a = float(amount)
+        side = "BUY" if a > 0 else "SELL"
+        p = float(price)
+        other = "SELL" if side == "BUY" else "BUY"
+        if not bulk and p in self._level[other]:
+            # The level changed sides (e.g. a P1+ bucket straddling the mid)
+            self.apply(price, 0, -a)
+        level = self._level[side]
+        if p not in level and not bulk:
+            insort(self._levels[side], p)
+        level[p] = (abs(a), str(price), str(amount))
+        self._cum[side] = None
+
+    # --- reads ---------------------------------------------------------------------------
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        bids = self._levels["BUY"]
+        return bids[-1] if bids else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        asks = self._levels["SELL"]
+        return asks[0] if asks else None
+
+    @property
+    def bid_levels(self) -> int:
+        return len(self._levels["BUY"])
+
+    @property
+    def ask_levels(self) -> int:
+        return len(self._levels["SELL"])
+
+    def spread_percent(self) -> Optional[float]:
+        return compute_spread_percent_mid(self.best_bid, self.best_ask)
+
+    def mid_price(self) -> Optional[float]:
+        bid, ask = self.best_bid, self.best_ask
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2.0
+
+    def amount_at(self, side: str, price: float) -> float:
+        level = self._level[side.upper()].get(price)
+        return level[0] if level is not None else 0.0
+
+    def levels(self, side: str, depth: Optional[int] = None) -> List[Tuple[float, float]]:
+        """(price, amount) per level from the best price outward (OrderBook.levels shape)."""
+        side = side.upper()
+        prices = self._levels[side]
+        if side == "BUY":
+            picked = prices[::-1] if depth is None else prices[: -depth - 1 : -1]
+        else:
+            picked = prices if depth is None else prices[:depth]
+        level = self._level[side]
+        return [(p, level[p][0]) for p in picked]
+
+    def cumulative_depth(self, side: str, percent: float, reference: Optional[float] = None) -> Tuple[float, float]:
+        """
+        (amount, notional) resting on `side` within `percent`% of `reference`
+        (default: the current mid), in O(log n) once the cumulative arrays are built.
+        """
+        side = side.upper()
+        ref = self.mid_price() if reference is None else reference
+        if ref is None or ref <= 0:
+            return 0.0, 0.0
+        keys, cum_amount, cum_notional = self._cumulative(side)
+        if side == "BUY":
+            # keys are -price (best bid first); price >= ref * (1 - pct)  <=>  -price <= -lower
+            k = int(np.searchsorted(keys, -ref * (1 - percent / 100.0), side="right"))
+        else:
+            k = int(np.searchsorted(keys, ref * (1 + percent / 100.0), side="right"))
+        return float(cum_amount[k]), float(cum_notional[k])
+
+    def _cumulative(self, side: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        cached = self._cum[side]
+        if cached is None:
+            prices = np.asarray(self._levels[side], dtype=np.float64)
+            level = self._level[side]
+            amounts = np.fromiter((level[p][0] for p in self._levels[side]), dtype=np.float64, count=len(prices))
+            if side == "BUY":
+                prices, amounts = prices[::-1], amounts[::-1]
+                keys = -prices
+            else:
+                keys = prices
+            cached = (
+                keys,
+                np.concatenate(([0.0], np.cumsum(amounts))),
+                np.concatenate(([0.0], np.cumsum(amounts * prices))),
+            )
+            self._cum[side] = cached
+        return cached
+
+    def checksum(self) -> int:
+        bids = self._levels["BUY"][: -CHECKSUM_LEVELS - 1 : -1]
+        asks = self._levels["SELL"][:CHECKSUM_LEVELS]
+        bid_level, ask_level = self._level["BUY"], self._level["SELL"]
+        return book_checksum(
+            [bid_level[p][1:] for p in bids],
+            [ask_level[p][1:] for p in asks],
+        )
+
+    def our_share(self, own: OrderBook, depth: int = 5) -> Dict[str, List[List[float]]]:
+        """
+        [price, market amount, our amount, our share %] for the best `depth` levels
+        of each side; our amount comes from our own order book at the same price.
+        """
+        out: Dict[str, List[List[float]]] = {}
+        for side, key in (("BUY", "bid"), ("SELL", "ask")):
+            rows = []
+            for price, amount in self.levels(side, depth):
+                ours = own.amount_at(side, price)
+                rows.append([price, amount, ours, round(100.0 * ours / amount, 4) if amount > 0 else 0.0])
+            out[key] = rows
+        return out
+
+
+class MarketBookFeed(BfxWsFeed):
+    """
+    Keep the public L2 book of one symbol in memory from the `book` channel. The
+    connection enables checksums; every ["cs", n] frame is compared with the local
+    book, and on a mismatch the channel is resubscribed so a fresh snapshot replaces
+    the book. Prices and amounts are parsed as text, because the checksum is
+    computed on the exact strings the exchange sent.
+    """
+
+    parse_float = str
+    conf_flags = BOOK_CHECKSUM_FLAG
+
+    def __init__(
+        self,
+        symbol: str,
+        host: str = PUB_WSS_HOST,
+        length: int = 25,
+        precision: str = "P0",
+        max_age_s: float = 30.0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        subscription = {"channel": "book", "symbol": symbol, "prec": precision, "freq": "F0", "len": str(length)}
+        super().__init__(host=host, subscriptions=[subscription], logger=logger, name=f"market_book:{symbol}")
+        self.symbol = symbol
+        self.max_age_s = max_age_s
+        self.book = MarketBook()
+        self.snapshot_at: Optional[float] = None
+        self.checksums_ok = 0
+        self.checksum_mismatches = 0
+        self.resyncs = 0
+        self._synced = False
+        self._snapshot_event = threading.Event()
+
+    def on_connect(self) -> None:
+        with self._lock:
+            self.book.clear()
+            self._synced = False
+            self.snapshot_at = None
+        self._snapshot_event.clear()
+
+    def on_disconnect(self) -> None:
+        self._snapshot_event.clear()
+
+    def on_channel_message(self, subscription: Dict[str, Any], payload: List[Any]) -> None:
+        data = payload[0]
+        if data == "cs":
+            self._verify(subscription, int(payload[1]))
+            return
+        if not isinstance(data, list):
+            return
+        if not data or isinstance(data[0], list):
+            with self._lock:
+                self.book.apply_snapshot(data)
+                self._synced = True
+                self.snapshot_at = time.time()
+            self._snapshot_event.set()
+            return
+        with self._lock:
+            # Updates from before a resync's snapshot are dropped
+            if self._synced:
+                self.book.apply(*data[:3])
+
+    def _verify(self, subscription: Dict[str, Any], expected: int) -> None:
+        with self._lock:
+            if not self._synced:
+                return
+            local = self.book.checksum()
+            if local == expected:
+                self.checksums_ok += 1
+                return
+            self.checksum_mismatches += 1
+            self.resyncs += 1
+            self.book.clear()
+            self._synced = False
+        self._snapshot_event.clear()
+        if self.logger:
+            log_event(
+                self.logger, "WARNING", "market_book_checksum_mismatch", symbol=self.symbol, expected=expected, local=local
+            )
+        self.resync(subscription)
+
+    def resync(self, subscription: Dict[str, Any]) -> None:
+        """Resubscribe the book channel; the new snapshot replaces the book."""
+        chan_id = subscription.get("chanId")
+        self._channels.pop(chan_id, None)
+        self.send({"event": "unsubscribe", "chanId": chan_id})
+        self.send({"event": "subscribe", **self.subscriptions[0]})
+
+    def ready(self) -> bool:
+        """
+        True once a snapshot is held on the live connection (no resync pending) and
+        a message arrived within max_age_s.
+        """
+        if not self.connected or not self._snapshot_event.is_set() or self.last_message_at is None:
+            return False
+        return (time.time() - self.last_message_at) <= self.max_age_s
+
+    def wait_ready(self, timeout_s: float) -> bool:
+        self._snapshot_event.wait(timeout_s)
+        return self.ready()
+
+    def metrics(self, own: Optional[OrderBook] = None, bands: Sequence[float] = (), depth: int = 5) -> Dict[str, Any]:
+        """
+        Market spread, bid/ask USD depth within ±band% of the market mid and, given
+        our own order book, our share of the best `depth` levels; read under the lock.
+        """
+        with self._lock:
+            book = self.book
+            mid = book.mid_price()
+            out: Dict[str, Any] = {
+                "best_bid": book.best_bid,
+                "best_ask": book.best_ask,
+                "mid_price": mid,
+                "spread_percent": book.spread_percent(),
+                "levels": {"bid": book.bid_levels, "ask": book.ask_levels},
+                "depth": {
+                    "bands_pct": list(bands),
+                    "bid_usd": [book.cumulative_depth("BUY", b, mid)[1] for b in bands],
+                    "ask_usd": [book.cumulative_depth("SELL", b, mid)[1] for b in bands],
+                },
+                "checksums_ok": self.checksums_ok,
+                "resyncs": self.resyncs,
+                "age_s": round(time.time() - self.snapshot_at, 3) if self.snapshot_at else None,
+            }
+            if own is not None:
+                out["our_share"] = book.our_share(own, depth)
+        return out
+
+
+def start_market_book(
+    cfg: Dict[str, Any], logger: Optional[logging.Logger] = None, wait: bool = True
+) -> Optional[MarketBookFeed]:
+    """
+    Start the public book feed for cfg["symbol"] when market_book is enabled and
+    (with wait) wait up to ws_ready_timeout_s for the first snapshot. No credentials
+    are needed.
+    """
+    if not cfg.get("market_book"):
+        return None
+    feed = MarketBookFeed(
+        cfg["symbol"],
+        host=cfg["pub_ws_host"],
+        length=cfg["market_book_len"],
+        max_age_s=cfg["ws_max_age_s"],
+        logger=logger,
+    )
+    feed.start()
+    if not wait:
+        return feed
+    t0 = time.perf_counter()
+    ready = feed.wait_ready(cfg["ws_ready_timeout_s"])
+    if logger:
+        log_event(
+            logger,
+            "INFO" if ready else "WARNING",
+            "market_book_started" if ready else "market_book_not_ready",
+            symbol=cfg["symbol"],
+            host=cfg["pub_ws_host"],
+            wait_ms=round((time.perf_counter() - t0) * 1000.0, 3),
+        )
+    return feed
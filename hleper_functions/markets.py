@@ -0,0 +1,86 @@
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+# Per-market settings a markets file may set; anything else is rejected as a typo.
+MARKET_KEYS = (
+    "symbol",
+    "spread_percent_threshold",
+    "min_order_amount",
+    "screen_session",
+    "cancel_cmd",
+    "list_cmd",
+    "list_format",
+    "state_file",
+    "snapshot_file",
+    "series_file",
+)
+_FLOAT_KEYS = ("spread_percent_threshold", "min_order_amount")
+# Files that would be shared by every market unless they get a per-symbol name
+_PER_SYMBOL_FILES = ("state_file", "series_file")
+
+
+def symbol_currencies(symbol: str) -> Tuple[str, str]:
+    """
+    Base and quote currency of a Bitfinex trading pair: tPNKUSD -> (PNK, USD),
+    tTESTBTC:TESTUSD -> (TESTBTC, TESTUSD).
+    """
+    pair = symbol[1:] if symbol.startswith("t") else symbol
+    if ":" in pair:
+        base, quote = pair.split(":", 1)
+        return base, quote
+    return pair[:-3], pair[-3:]
+
+
+def load_markets(path: str) -> List[Dict[str, Any]]:
+    """
+    Read a markets file: either a JSON list of market objects or
+    {"defaults": {...}, "markets": [...]}. Every market needs a "symbol"; string
+    values may use "{symbol}", which is replaced by the market's symbol.
+    """
+    with open(os.path.expanduser(path), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    defaults: Dict[str, Any] = {}
+    if isinstance(data, dict):
+        defaults = data.get("defaults", {})
+        data = data.get("markets", [])
+    if not isinstance(data, list) or not data:
+        raise ValueError(f"{path}: expected a non-empty list of markets")
+    markets = []
+    seen = set()
+    for entry in data:
+        market = {**defaults, **entry}
+        unknown = set(market) - set(MARKET_KEYS)
+        if unknown:
+            raise ValueError(f"{path}: unknown market keys {sorted(unknown)}")
+        symbol = market.get("symbol")
+        if not symbol:
+            raise ValueError(f"{path}: every market needs a symbol")
+        if symbol in seen:
+            raise ValueError(f"{path}: duplicate market {symbol}")
+        seen.add(symbol)
+        for key in _FLOAT_KEYS:
+            if key in market:
+                market[key] = float(market[key])
+        markets.append(
+            {k: v.replace("{symbol}", symbol) if isinstance(v, str) else v for k, v in market.items()}
+        )
+    return markets
+
+
+def market_config(cfg: Dict[str, Any], market: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Per-market copy of the global config. Unset commands reuse the global ones with
+    the global symbol swapped for the market's; state/series files get a per-symbol
+    name; the shared snapshot is single-symbol, so it is only used when set per market.
+    """
+    symbol = market["symbol"]
+    out = {**cfg, "symbol": symbol, "snapshot_file": ""}
+    for key in ("list_cmd", "cancel_cmd"):
+        out[key] = cfg[key].replace(cfg["symbol"], symbol)
+    for key in _PER_SYMBOL_FILES:
+        if cfg.get(key):
+            root, ext = os.path.splitext(cfg[key])
+            out[key] = f"{root}.{symbol}{ext}"
+    out.update(market)
+    return out
@@ -0,0 +1,277 @@
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+LabelKey = Tuple[str, ...]
+
+
+class Counter:
+    """Monotonic counter with optional labels (Prometheus semantics)."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            if not self.labelnames and not self._values:
+                return {(): 0.0}
+            return dict(self._values)
+
+
+class Histogram:
+    """Latency histogram with fixed upper bounds (seconds) and optional labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values: Dict[LabelKey, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(self.labelnames, labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def collect(self) -> Dict[LabelKey, List[Any]]:
+        with self._lock:
+            return {k: [list(v[0]), v[1], v[2]] for k, v in self._values.items()}
+
+
+class Registry:
+    """
+    Set of metrics rendered together; const_labels (e.g. script="spread") are added
+    to every sample.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Any] = {}
+        self.const_labels: Dict[str, str] = {}
+        # Values already merged into the textfile state, so repeated flushes only add deltas
+        self._flushed: Dict[str, Dict[LabelKey, Any]] = {}
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help, labelnames, buckets))
+
+    def collect(self) -> Dict[str, Dict[LabelKey, Any]]:
+        return {name: metric.collect() for name, metric in self.metrics.items()}
+
+    def render(self, values: Optional[Dict[str, Dict[LabelKey, Any]]] = None) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        values = self.collect() if values is None else values
+        lines: List[str] = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(values.get(name, {}).items()):
+                labels = {**self.const_labels, **dict(zip(metric.labelnames, key))}
+                if metric.kind == "counter":
+                    lines.append(f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+                    continue
+                bucket_counts, total, count = value
+                cumulative = 0
+                for bound, n in zip(list(metric.buckets) + [math.inf], bucket_counts):
+                    cumulative += n
+                    le = "+Inf" if bound == math.inf else _fmt_value(bound)
+                    lines.append(f"{name}_bucket{_fmt_labels({**labels, 'le': le})} {cumulative}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {_fmt_value(total)}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: Dict[str, Any]) -> LabelKey:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _fmt_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for k, v in labels.items():
+        escaped = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{k}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _fmt_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram(
+    "hb_stage_duration_seconds", "Wall time of one pipeline stage.", ("stage",)
+)
+RUNS = REGISTRY.counter("hb_runs_total", "Completed runs (checks) by exit status.", ("status",))
+BREACHES = REGISTRY.counter("hb_spread_breaches_total", "Spread threshold breaches detected.", ("symbol",))
+RETRIES = REGISTRY.counter("hb_retries_total", "Retried operations.", ("stage",))
+FAILURES = REGISTRY.counter("hb_failures_total", "Failed operations.", ("stage",))
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Time the enclosed block into hb_stage_duration_seconds{stage=...}.
+    """
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - t0, stage=stage)
+
+
+def observe_ms(stage: str, duration_ms: float) -> None:
+    """Record a duration measured elsewhere (e.g. StageResult.duration_ms)."""
+    STAGE_SECONDS.observe(duration_ms / 1000.0, stage=stage)
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """
+    Serve registry.render() at /metrics on a daemon thread.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            data = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *_: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics_http", daemon=True).start()
+    return server
+
+
+def write_textfile(directory: str, name: str, registry: Registry = REGISTRY) -> str:
+    """
+    Write <directory>/<name>.prom for node_exporter's textfile collector. Cron runs are
+    separate processes, so totals are accumulated in a <name>.state.json sidecar (under
+    flock) and every call adds only what changed since this process last flushed.
+    """
+    full_dir = os.path.expanduser(directory)
+    os.makedirs(full_dir, exist_ok=True)
+    prom_path = os.path.join(full_dir, f"{name}.prom")
+    state_path = os.path.join(full_dir, f"{name}.state.json")
+    current = registry.collect()
+    with open(f"{state_path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                persisted = _decode_state(json.load(f))
+        except (OSError, ValueError):
+            persisted = {}
+        merged: Dict[str, Dict[LabelKey, Any]] = {}
+        for metric_name, values in current.items():
+            flushed = registry._flushed.get(metric_name, {})
+            totals = dict(persisted.get(metric_name, {}))
+            for key, value in values.items():
+                delta = _subtract(value, flushed.get(key))
+                totals[key] = _add(totals.get(key), delta)
+            merged[metric_name] = totals
+        registry._flushed = current
+        tmp_state = f"{state_path}.tmp"
+        with open(tmp_state, "w", encoding="utf-8") as f:
+            json.dump(_encode_state(merged), f)
+        os.replace(tmp_state, state_path)
+        tmp_prom = f"{prom_path}.tmp"
+        with open(tmp_prom, "w", encoding="utf-8") as f:
+            f.write(registry.render(merged))
+        os.replace(tmp_prom, prom_path)
+    return prom_path
+
+
+def _subtract(value: Any, base: Any) -> Any:
+    if base is None:
+        return value
+    if isinstance(value, list):
+        return [[a - b for a, b in zip(value[0], base[0])], value[1] - base[1], value[2] - base[2]]
+    return value - base
+
+
+def _add(total: Any, delta: Any) -> Any:
+    if total is None:
+        return delta
+    if isinstance(delta, list):
+        return [[a + b for a, b in zip(total[0], delta[0])], total[1] + delta[1], total[2] + delta[2]]
+    return total + delta
+
+
+def _encode_state(values: Dict[str, Dict[LabelKey, Any]]) -> Dict[str, List[Any]]:
+    return {name: [[list(key), value] for key, value in series.items()] for name, series in values.items()}
+
+
+def _decode_state(data: Dict[str, List[Any]]) -> Dict[str, Dict[LabelKey, Any]]:
+    return {name: {tuple(key): value for key, value in series} for name, series in data.items()}
+
+
+def setup_metrics(cfg: Dict[str, Any], script: str) -> Optional[ThreadingHTTPServer]:
+    """
+    Label every sample with script=<script> and start the HTTP endpoint when
+    metrics_port is set. Returns the server (or None).
+    """
+    REGISTRY.const_labels = {"script": script}
+    if cfg.get("metrics_port"):
+        return start_metrics_server(cfg["metrics_port"], cfg.get("metrics_host", "127.0.0.1"))
+    return None
+
+
+def flush_metrics(cfg: Dict[str, Any], script: str) -> None:
+    """Update the textfile-collector file when metrics_textfile_dir is set."""
+    if cfg.get("metrics_textfile_dir"):
+        write_textfile(cfg["metrics_textfile_dir"], script)
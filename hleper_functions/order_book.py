@@ -0,0 +1,217 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from hleper_functions.helper_functions_spread import compute_spread_percent_mid
+from hleper_functions.orders import Orders
+
+# Bitfinex amounts carry at most 8 decimals. Level totals are rounded to that after
+# every add/remove so repeated += / -= on floats does not leave residue (0.1 + 0.2 - 0.2
+# is 0.10000000000000003) and an incrementally kept book matches a fresh rebuild.
+AMOUNT_DECIMALS = 8
+
+
+class OrderBook:
+    """
+    Incremental price-level book keyed by order id.
+
+    Each side keeps its distinct prices in an ascending list (bisect insert/remove) plus
+    per-level amount and order count, so best bid/ask are O(1) and updates are
+    O(log n) search + one memmove. Orders below min_amount are remembered but not
+    indexed, so a resize across the threshold moves them in or out of the book.
+    Level amounts are kept rounded to AMOUNT_DECIMALS.
+    """
+
+    def __init__(self, min_amount: float = 0.0) -> None:
+        self.min_amount = min_amount
+        # order id -> (side, amount, price) for every known order, filtered or not
+        self._orders: Dict[Any, Tuple[str, float, float]] = {}
+        self._levels: Dict[str, List[float]] = {"BUY": [], "SELL": []}
+        self._level_amount: Dict[str, Dict[float, float]] = {"BUY": {}, "SELL": {}}
+        self._level_count: Dict[str, Dict[float, int]] = {"BUY": {}, "SELL": {}}
+        self._side_count: Dict[str, int] = {"BUY": 0, "SELL": 0}
+        # While True (from_orders), _levels is left unsorted/empty and rebuilt afterwards
+        self._bulk = False
+
+    @classmethod
+    def from_orders(cls, orders: Iterable[dict], min_amount: float = 0.0) -> "OrderBook":
+        """
+        Build a book from parse_orders_from_text()-style dicts or an Orders container;
+        orders without an "id" are keyed by their position. Levels are sorted once at
+        the end instead of insorted per order, so building is O(n log n) whatever the
+        input order.
+        """
+        book = cls(min_amount)
+        book._bulk = True
+        if isinstance(orders, Orders):
+            for order_id, side, amount, price in zip(*orders.columns()):
+                book.upsert(order_id, side, amount, price)
+        else:
+            for i, o in enumerate(orders):
+                order_id = o.get("id")
+                book.upsert(("#", i) if order_id is None else order_id, o["side"], o["amount"], o["price"])
+        book._bulk = False
+        for side in ("BUY", "SELL"):
+            book._levels[side] = sorted(book._level_count[side])
+        return book
+
+    def copy(self) -> "OrderBook":
+        """An independent copy (no re-sorting), for reading while the original keeps changing."""
+        book = OrderBook(self.min_amount)
+        book._orders = dict(self._orders)
+        for side in ("BUY", "SELL"):
+            book._levels[side] = list(self._levels[side])
+            book._level_amount[side] = dict(self._level_amount[side])
+            book._level_count[side] = dict(self._level_count[side])
+        book._side_count = dict(self._side_count)
+        return book
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __contains__(self, order_id: Any) -> bool:
+        return order_id in self._orders
+
+    # --- updates -------------------------------------------------------------------------
+
+    def upsert(self, order_id: Any, side: str, amount: float, price: float) -> None:
+        """
+        Insert a new order or replace the side/amount/price of a known one.
+        """
+        side = side.upper()
+        if side not in self._levels:
+            raise ValueError(f"Invalid side: '{side}'. Must be 'BUY' or 'SELL'.")
+        if order_id in self._orders:
+            self.remove(order_id)
+        self._orders[order_id] = (side, amount, price)
+        if amount >= self.min_amount:
+            self._add_to_level(side, amount, price)
+
+    def apply(self, order: dict) -> None:
+        self.upsert(order["id"], order["side"], order["amount"], order["price"])
+
+    def remove(self, order_id: Any) -> bool:
+        entry = self._orders.pop(order_id, None)
+        if entry is None:
+            return False
+        side, amount, price = entry
+        if amount >= self.min_amount:
+            self._remove_from_level(side, amount, price)
+        return True
+
+    def clear(self) -> None:
+        self._orders.clear()
+        for side in ("BUY", "SELL"):
+            self._levels[side].clear()
+            self._level_amount[side].clear()
+            self._level_count[side].clear()
+            self._side_count[side] = 0
+
+    def _add_to_level(self, side: str, amount: float, price: float) -> None:
+        counts = self._level_count[side]
+        if price in counts:
+            counts[price] += 1
+            amounts = self._level_amount[side]
+            amounts[price] = round(amounts[price] + amount, AMOUNT_DECIMALS)
+        else:
+            counts[price] = 1
+            self._level_amount[side][price] = round(amount, AMOUNT_DECIMALS)
+            if not self._bulk:
+                insort(self._levels[side], price)
+        self._side_count[side] += 1
+
+    def _remove_from_level(self, side: str, amount: float, price: float) -> None:
+        counts = self._level_count[side]
+        counts[price] -= 1
+        self._side_count[side] -= 1
+        if counts[price] == 0:
+            del counts[price]
+            del self._level_amount[side][price]
+            if not self._bulk:
+                levels = self._levels[side]
+                del levels[bisect_left(levels, price)]
+        else:
+            amounts = self._level_amount[side]
+            amounts[price] = round(amounts[price] - amount, AMOUNT_DECIMALS)
+
+    # --- reads ---------------------------------------------------------------------------
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        bids = self._levels["BUY"]
+        return bids[-1] if bids else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        asks = self._levels["SELL"]
+        return asks[0] if asks else None
+
+    @property
+    def bid_count(self) -> int:
+        """Number of bid orders passing the min_amount filter."""
+        return self._side_count["BUY"]
+
+    @property
+    def ask_count(self) -> int:
+        """Number of ask orders passing the min_amount filter."""
+        return self._side_count["SELL"]
+
+    def spread_percent(self) -> Optional[float]:
+        return compute_spread_percent_mid(self.best_bid, self.best_ask)
+
+    def mid_price(self) -> Optional[float]:
+        bid, ask = self.best_bid, self.best_ask
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2.0
+
+    def bid_prices(self) -> List[float]:
+        """Bid order prices, best first, one entry per order (split_filter_sort_orders shape)."""
+        counts = self._level_count["BUY"]
+        return [p for p in reversed(self._levels["BUY"]) for _ in range(counts[p])]
+
+    def ask_prices(self) -> List[float]:
+        """Ask order prices, best first, one entry per order (split_filter_sort_orders shape)."""
+        counts = self._level_count["SELL"]
+        return [p for p in self._levels["SELL"] for _ in range(counts[p])]
+
+    def amount_at(self, side: str, price: float) -> float:
+        """Amount resting at one price level (0.0 when there is none)."""
+        return self._level_amount[side.upper()].get(price, 0.0)
+
+    def levels(self, side: str, depth: Optional[int] = None) -> List[Tuple[float, float]]:
+        """
+        (price, amount) per level from the best price outward, optionally the top `depth` levels.
+        """
+        side = side.upper()
+        prices = self._levels[side]
+        ordered = reversed(prices) if side == "BUY" else iter(prices)
+        amounts = self._level_amount[side]
+        out: List[Tuple[float, float]] = []
+        for p in ordered:
+            if depth is not None and len(out) >= depth:
+                break
+            out.append((p, amounts[p]))
+        return out
+
+    def cumulative_depth(self, side: str, percent: float, reference: Optional[float] = None) -> Tuple[float, float]:
+        """
+        (amount, notional) resting on `side` within `percent`% of `reference`
+        (default: the current mid). Only the levels inside the band are visited.
+        """
+        side = side.upper()
+        ref = self.mid_price() if reference is None else reference
+        if ref is None or ref <= 0:
+            return 0.0, 0.0
+        prices = self._levels[side]
+        if side == "BUY":
+            band = prices[bisect_left(prices, ref * (1 - percent / 100.0)):]
+        else:
+            band = prices[:bisect_right(prices, ref * (1 + percent / 100.0))]
+        amounts = self._level_amount[side]
+        amount = 0.0
+        notional = 0.0
+        for p in band:
+            a = amounts[p]
+            amount += a
+            notional += a * p
+        return amount, notional
@@ -0,0 +1,151 @@
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from hleper_functions.helper_function import atomic_write_state
+
+OrderKey = Union[int, str]
+
+
+def order_key(order: dict) -> OrderKey:
+    """
+    The exchange order id; orders listed without one (some json/csv outputs) fall
+    back to side:price:amount, so any change to them reads as remove + add.
+    """
+    order_id = order.get("id")
+    if order_id is not None:
+        return int(order_id)
+    return f"{order['side']}:{order['price']!r}:{order['amount']!r}"
+
+
+def index_orders(orders: Iterable[dict]) -> Dict[OrderKey, dict]:
+    return {order_key(o): o for o in orders}
+
+
+class OrderDiff(NamedTuple):
+    """Changes between two snapshots of our open orders, each list sorted by key."""
+
+    added: List[dict]
+    removed: List[dict]
+    # (order, previous price) / (order, previous amount); an order can be in both
+    repriced: List[Tuple[dict, float]]
+    resized: List[Tuple[dict, float]]
+
+    @property
+    def changes(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.repriced) + len(self.resized)
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "orders_added": len(self.added),
+            "orders_removed": len(self.removed),
+            "orders_repriced": len(self.repriced),
+            "orders_resized": len(self.resized),
+        }
+
+    def compact(self) -> Dict[str, list]:
+        """
+        Event payload: added as [id, side, price, amount], removed as ids, repriced
+        as [id, price, prev_price], resized as [id, amount, prev_amount].
+        """
+        return {
+            "added": [_row(o) for o in self.added],
+            "removed": [order_key(o) for o in self.removed],
+            "repriced": [[order_key(o), o["price"], prev] for o, prev in self.repriced],
+            "resized": [[order_key(o), o["amount"], prev] for o, prev in self.resized],
+        }
+
+
+def _row(order: dict) -> list:
+    return [order_key(order), order["side"], order["price"], order["amount"]]
+
+
+def _sort_key(key: OrderKey) -> Tuple[int, Any]:
+    # Ids first, in id order; then the keys of orders without an id
+    return (0, key) if isinstance(key, int) else (1, key)
+
+
+def diff_orders(prev: Dict[OrderKey, dict], curr: Dict[OrderKey, dict]) -> OrderDiff:
+    """
+    Compare two id-keyed snapshots (see index_orders). Set operations on the key
+    views keep this O(n); only the changed orders are sorted.
+    """
+    added = [curr[k] for k in sorted(curr.keys() - prev.keys(), key=_sort_key)]
+    removed = [prev[k] for k in sorted(prev.keys() - curr.keys(), key=_sort_key)]
+    repriced: List[Tuple[dict, float]] = []
+    resized: List[Tuple[dict, float]] = []
+    for k in curr.keys() & prev.keys():
+        before, after = prev[k], curr[k]
+        if after["price"] != before["price"]:
+            repriced.append((after, before["price"]))
+        if after["amount"] != before["amount"]:
+            resized.append((after, before["amount"]))
+    repriced.sort(key=lambda item: _sort_key(order_key(item[0])))
+    resized.sort(key=lambda item: _sort_key(order_key(item[0])))
+    return OrderDiff(added, removed, repriced, resized)
+
+
+class OrderUpdate(NamedTuple):
+    diff: OrderDiff
+    seq: int
+    prev_seq: Optional[int]  # None on the first run (no previous state)
+    snapshot: bool  # a full snapshot is due (always on the first run)
+
+
+class OrderTracker:
+    """
+    Keeps the previous order snapshot in a small JSON state file between runs, so
+    each run can report only what changed. The state (and its seq counter) is only
+    rewritten when something changed or a full snapshot is due, i.e. at most every
+    snapshot_interval_s on a quiet book.
+    """
+
+    def __init__(self, state_path: str, snapshot_interval_s: float = 3600.0) -> None:
+        self.state_path = os.path.expanduser(state_path)
+        self.snapshot_interval_s = snapshot_interval_s
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            return state if isinstance(state.get("orders"), list) else None
+        except (OSError, ValueError):
+            return None
+
+    def update(self, orders: Iterable[dict], now: Optional[float] = None) -> OrderUpdate:
+        now = time.time() if now is None else now
+        curr = index_orders(orders)
+        state = self._load()
+        if state is None:
+            diff = diff_orders({}, curr)
+            prev_seq, seq, snapshot = None, 1, True
+            snapshot_at = now
+        else:
+            # Rows are [key, side, price, amount]; the key is the id unless it is a str
+            prev = {
+                key: {"id": key if isinstance(key, int) else None, "side": side, "price": price, "amount": amount}
+                for key, side, price, amount in state["orders"]
+            }
+            diff = diff_orders(prev, curr)
+            prev_seq = int(state.get("seq", 0))
+            snapshot_at = float(state.get("snapshot_at", 0.0))
+            snapshot = now - snapshot_at >= self.snapshot_interval_s
+            seq = prev_seq + 1 if diff.changes or snapshot else prev_seq
+        if diff.changes or snapshot:
+            atomic_write_state(
+                self.state_path,
+                {
+                    "seq": seq,
+                    "updated_at": now,
+                    "snapshot_at": now if snapshot else snapshot_at,
+                    "orders": [_row(curr[k]) for k in sorted(curr, key=_sort_key)],
+                },
+            )
+        return OrderUpdate(diff, seq, prev_seq, snapshot)
+
+
+def snapshot_rows(orders: Iterable[dict]) -> List[list]:
+    """Full-snapshot payload: [id, side, price, amount] per order, in key order."""
+    curr = index_orders(orders)
+    return [_row(curr[k]) for k in sorted(curr, key=_sort_key)]
@@ -0,0 +1,172 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from bfxapi.types import serializers
+
+from hleper_functions.bfx_ws import WSS_HOST, BfxWsFeed
+from hleper_functions.order_book import OrderBook
+from hleper_functions.wide_logger import log_event
+
+# Order statuses reported on `oc` that mean the order is gone from the book
+_CLOSED_PREFIXES = ("EXECUTED", "CANCELED", "POSTONLY CANCELED", "RSN_")
+
+
+class OrderFeed(BfxWsFeed):
+    """
+    Keep the set of our open orders for one or more symbols in memory from the
+    authenticated websocket channel: `os` replaces the set, `on`/`ou` upsert, `oc`
+    removes. Orders are exposed in the same dict shape as parse_orders_from_text().
+    Books asked for through book() are kept alongside and updated per delta, so a
+    daemon does not rebuild its book from every order each cycle.
+    """
+
+    def __init__(
+        self,
+        symbol: Union[str, Sequence[str]],
+        api_key: str,
+        api_secret: str,
+        host: str = WSS_HOST,
+        max_age_s: float = 30.0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        symbols = [symbol] if isinstance(symbol, str) else list(symbol)
+        super().__init__(
+            host=host, api_key=api_key, api_secret=api_secret, logger=logger, name=f"order_feed:{','.join(symbols)}"
+        )
+        # The first symbol is the default for orders()
+        self.symbol = symbols[0]
+        self.symbols = set(symbols)
+        self.max_age_s = max_age_s
+        self.snapshot_at: Optional[float] = None
+        self._orders: Dict[str, Dict[int, Dict[str, Any]]] = {s: {} for s in self.symbols}
+        # (symbol, min_amount) -> book, created on the first book() call
+        self._books: Dict[Tuple[str, float], OrderBook] = {}
+        self._snapshot_event = threading.Event()
+
+    def on_connect(self) -> None:
+        with self._lock:
+            self._orders = {s: {} for s in self.symbols}
+            self._books = {}
+            self.snapshot_at = None
+        self._snapshot_event.clear()
+
+    def on_disconnect(self) -> None:
+        self._snapshot_event.clear()
+
+    def on_auth_message(self, abbreviation: str, payload: Any) -> None:
+        if abbreviation == "os":
+            orders: Dict[str, Dict[int, Dict[str, Any]]] = {s: {} for s in self.symbols}
+            for row in payload or []:
+                order = serializers.Order.parse(*row)
+                if order.symbol in self.symbols and order.amount:
+                    orders[order.symbol][order.id] = _to_record(order)
+            with self._lock:
+                self._orders = orders
+                self._books = {
+                    key: OrderBook.from_orders(orders[key[0]].values(), key[1]) for key in self._books
+                }
+                self.snapshot_at = time.time()
+            self._snapshot_event.set()
+        elif abbreviation in ("on", "ou", "oc"):
+            order = serializers.Order.parse(*payload)
+            if order.symbol not in self.symbols:
+                return
+            closed = abbreviation == "oc" or not order.amount or str(order.order_status).startswith(_CLOSED_PREFIXES)
+            record = None if closed else _to_record(order)
+            with self._lock:
+                if record is None:
+                    self._orders[order.symbol].pop(order.id, None)
+                else:
+                    self._orders[order.symbol][order.id] = record
+                for (symbol, _), book in self._books.items():
+                    if symbol != order.symbol:
+                        continue
+                    if record is None:
+                        book.remove(order.id)
+                    else:
+                        book.upsert(order.id, record["side"], record["amount"], record["price"])
+
+    def ready(self) -> bool:
+        """
+        True once a snapshot has been received on the live connection and the
+        connection has shown signs of life (heartbeats arrive every ~15s) within max_age_s.
+        """
+        if not self.connected or not self._snapshot_event.is_set() or self.last_message_at is None:
+            return False
+        return (time.time() - self.last_message_at) <= self.max_age_s
+
+    def wait_ready(self, timeout_s: float) -> bool:
+        self._snapshot_event.wait(timeout_s)
+        return self.ready()
+
+    def orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._orders.get(symbol or self.symbol, {}).values())
+
+    def book(self, symbol: Optional[str] = None, min_amount: float = 0.0) -> OrderBook:
+        """
+        A copy of the incrementally kept book for symbol and min_amount. The first call
+        for a pair builds it from the current orders; after that it only follows the
+        deltas (and is rebuilt on a new `os` snapshot).
+        """
+        symbol = symbol or self.symbol
+        with self._lock:
+            book = self._books.get((symbol, min_amount))
+            if book is None:
+                book = OrderBook.from_orders(self._orders.get(symbol, {}).values(), min_amount)
+                self._books[(symbol, min_amount)] = book
+            return book.copy()
+
+
+def _to_record(order: Any) -> Dict[str, Any]:
+    amount = float(order.amount)
+    return {
+        "id": order.id,
+        "type": order.order_type,
+        "side": "BUY" if amount > 0 else "SELL",
+        "amount": abs(amount),
+        "price": float(order.price),
+    }
+
+
+def start_order_feed(
+    cfg: Dict[str, Any],
+    logger: Optional[logging.Logger] = None,
+    symbols: Optional[Sequence[str]] = None,
+) -> Optional[OrderFeed]:
+    """
+    Start the websocket order feed when HB_ORDER_SOURCE=ws and credentials are set,
+    for cfg["symbol"] or every symbol in symbols (one connection for all of them).
+    Waits up to ws_ready_timeout_s for the first snapshot; callers fall back to the
+    list command whenever the feed is not ready.
+    """
+    if cfg.get("order_source") != "ws":
+        return None
+    if not cfg.get("api_key") or not cfg.get("api_secret"):
+        if logger:
+            log_event(logger, "WARNING", "order_feed_missing_keys", msg="HB_ORDER_SOURCE=ws needs BITFINEX_API_KEY/SECRET; using list command.")
+        return None
+    symbols = list(symbols) if symbols else [cfg["symbol"]]
+    feed = OrderFeed(
+        symbols,
+        cfg["api_key"],
+        cfg["api_secret"],
+        host=cfg["ws_host"],
+        max_age_s=cfg["ws_max_age_s"],
+        logger=logger,
+    )
+    feed.start()
+    t0 = time.perf_counter()
+    ready = feed.wait_ready(cfg["ws_ready_timeout_s"])
+    if logger:
+        log_event(
+            logger,
+            "INFO" if ready else "WARNING",
+            "order_feed_started" if ready else "order_feed_not_ready",
+            symbol=",".join(symbols),
+            host=cfg["ws_host"],
+            wait_ms=round((time.perf_counter() - t0) * 1000.0, 3),
+        )
+    return feed
@@ -0,0 +1,134 @@
+import fcntl
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+from hleper_functions.orders import Orders
+
+# Header: magic, format version, sequence number, publish time (epoch s), payload length.
+# The sequence number works as a seqlock: odd while the writer is mid-update.
+_HEADER = struct.Struct("<4sIQdI")
+_HEADER_SIZE = 32
+_SEQ_OFFSET = 8
+_MAGIC = b"HBSN"
+_VERSION = 1
+_READ_RETRIES = 50
+
+
+class OrderSnapshot(NamedTuple):
+    seq: int
+    ts: float
+    orders: List[dict]
+    source: str
+
+    @property
+    def age_s(self) -> float:
+        return time.time() - self.ts
+
+
+class SnapshotWriter:
+    """
+    Single-writer publisher of the latest open-order snapshot into a memory-mapped file.
+    Holding an exclusive flock on the file keeps a second collector from writing into it.
+    """
+
+    def __init__(self, path: str, initial_capacity: int = 1 << 20) -> None:
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(self._fd)
+            raise RuntimeError(f"snapshot file {self.path} is already being written by another process")
+        size = os.fstat(self._fd).st_size
+        seq = 0
+        if size >= _HEADER_SIZE:
+            with open(self.path, "rb") as f:
+                magic, version, seq, _, _ = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION:
+                seq = 0
+        # Continue the sequence of a previous collector, always from an even value
+        self._seq = seq + (seq % 2)
+        capacity = max(size, _HEADER_SIZE + initial_capacity)
+        os.ftruncate(self._fd, capacity)
+        self._mm = mmap.mmap(self._fd, capacity)
+        if seq == 0:
+            _HEADER.pack_into(self._mm, 0, _MAGIC, _VERSION, 0, 0.0, 0)
+        else:
+            # Clear an odd sequence left behind by a writer that died mid-update
+            self._set_seq(self._seq)
+
+    def publish(self, orders: Union[List[dict], Orders], source: str = "cli") -> int:
+        """
+        Replace the published snapshot and return its sequence number.
+        """
+        if isinstance(orders, Orders):
+            orders = orders.to_dicts()
+        payload = json.dumps({"orders": orders, "source": source}, separators=(",", ":")).encode("utf-8")
+        ts = time.time()
+        self._set_seq(self._seq + 1)
+        needed = _HEADER_SIZE + len(payload)
+        if needed > len(self._mm):
+            self._mm.close()
+            os.ftruncate(self._fd, max(needed, 2 * os.fstat(self._fd).st_size))
+            self._mm = mmap.mmap(self._fd, os.fstat(self._fd).st_size)
+        self._mm[_HEADER_SIZE:needed] = payload
+        _HEADER.pack_into(self._mm, 0, _MAGIC, _VERSION, self._seq, ts, len(payload))
+        self._set_seq(self._seq + 1)
+        return self._seq
+
+    def _set_seq(self, seq: int) -> None:
+        self._seq = seq
+        struct.pack_into("<Q", self._mm, _SEQ_OFFSET, seq)
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+
+def _read_consistent(full_path: str) -> Optional[tuple]:
+    """
+    One seqlock read attempt: (seq, ts, payload), None if there is no snapshot, or
+    () if the writer was mid-update / the file outgrew our mapping (caller retries).
+    """
+    with open(full_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < _HEADER_SIZE:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, seq, ts, length = _HEADER.unpack_from(mm, 0)
+            if magic != _MAGIC or version != _VERSION or seq == 0:
+                return None
+            if seq % 2 or _HEADER_SIZE + length > len(mm):
+                return ()
+            payload = mm[_HEADER_SIZE:_HEADER_SIZE + length]
+            if struct.unpack_from("<Q", mm, _SEQ_OFFSET)[0] != seq:
+                return ()
+            return seq, ts, payload
+
+
+def read_snapshot(path: str, max_age_s: Optional[float] = None) -> Optional[OrderSnapshot]:
+    """
+    Return the latest consistent snapshot, or None if there is none, it is being
+    rewritten for too long, or it is older than max_age_s.
+    """
+    full_path = os.path.expanduser(path)
+    result: Optional[tuple] = ()
+    try:
+        for _ in range(_READ_RETRIES):
+            result = _read_consistent(full_path)
+            if result != ():
+                break
+            time.sleep(0.0005)
+    except (OSError, ValueError):
+        return None
+    if not result:
+        return None
+    seq, ts, payload = result
+    if max_age_s is not None and time.time() - ts > max_age_s:
+        return None
+    data: Dict[str, Any] = json.loads(payload)
+    return OrderSnapshot(seq, ts, data["orders"], data.get("source", "cli"))
@@ -0,0 +1,52 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from hleper_functions.helper_functions_spread import stream_list_command
+from hleper_functions.order_book import OrderBook
+from hleper_functions.order_feed import OrderFeed
+from hleper_functions.order_snapshot import read_snapshot
+from hleper_functions.orders import Orders
+from hleper_functions.rate_limiter import RateLimitTimeout, get_rate_limiter
+
+
+def load_open_orders(
+    cfg: Dict[str, Any], feed: Optional[OrderFeed] = None
+) -> Tuple[int, Union[List[dict], Orders], str, str]:
+    """
+    Return (rc, orders, stderr, source), taking the cheapest fresh source available:
+    1. "ws": the in-memory websocket feed, when it is ready
+    2. "snapshot": the shared snapshot published by snapshot_collector.py, when
+       snapshot_file is set and the snapshot is younger than snapshot_max_age_s
+    3. "cli": run the list command and parse its output as it streams in (after taking
+       an auth_read token from the host-wide rate limiter, since it hits the same account)
+       into an Orders container; the other sources return order dicts
+    """
+    if feed is not None and feed.ready():
+        return 0, feed.orders(cfg.get("symbol")), "", "ws"
+    if cfg.get("snapshot_file"):
+        snapshot = read_snapshot(cfg["snapshot_file"], cfg["snapshot_max_age_s"])
+        if snapshot is not None:
+            return 0, snapshot.orders, "", "snapshot"
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        try:
+            limiter.acquire("auth_read", "cli:list")
+        except RateLimitTimeout as e:
+            return 1, [], str(e), "cli"
+    rc, orders, stderr = stream_list_command(cfg["list_cmd"], cfg["timeout_s"], cfg.get("list_format", "table"), columnar=True)
+    return rc, orders, stderr, "cli"
+
+
+def build_order_book(
+    cfg: Dict[str, Any],
+    orders: Union[List[dict], Orders],
+    source: str,
+    min_amount: float,
+    feed: Optional[OrderFeed] = None,
+) -> OrderBook:
+    """
+    The book for orders returned by load_open_orders(): the feed's incrementally kept
+    book when they came from the websocket, otherwise a full rebuild from the orders.
+    """
+    if source == "ws" and feed is not None:
+        return feed.book(cfg.get("symbol"), min_amount)
+    return OrderBook.from_orders(orders, min_amount)
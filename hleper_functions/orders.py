@@ -0,0 +1,183 @@
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# (id or None, type, side, amount, price): the row shape of iter_order_rows()
+OrderRow = Tuple[Optional[int], str, str, float, float]
+
+# Stored in place of a missing order id
+_NO_ID = -1
+
+
+class OrderRecord:
+    """
+    Read-only view of one row of an Orders container. Supports both attribute access
+    and the dict-style o["side"] / o.get("id") used on parsed order dicts, so code
+    written for the dict shape keeps working.
+    """
+
+    __slots__ = ("_orders", "_i")
+
+    _FIELDS = ("id", "type", "side", "amount", "price")
+
+    def __init__(self, orders: "Orders", i: int) -> None:
+        self._orders = orders
+        self._i = i
+
+    @property
+    def id(self) -> Optional[int]:
+        order_id = self._orders._id[self._i]
+        return None if order_id == _NO_ID else order_id
+
+    @property
+    def type(self) -> str:
+        return self._orders._types[self._orders._type[self._i]]
+
+    @property
+    def side(self) -> str:
+        return "BUY" if self._orders._buy[self._i] else "SELL"
+
+    @property
+    def amount(self) -> float:
+        return self._orders._amount[self._i]
+
+    @property
+    def price(self) -> float:
+        return self._orders._price[self._i]
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self._FIELDS else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._FIELDS
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "type": self.type, "side": self.side, "amount": self.amount, "price": self.price}
+
+    def __repr__(self) -> str:
+        return f"OrderRecord({self.to_dict()!r})"
+
+
+class Orders:
+    """
+    Open orders stored column by column: id (int64, -1 when missing), a buy flag,
+    amount and price (float64) in array.array buffers, and the order type as a small
+    code into a list of distinct type strings. One Orders holds what a list of dicts
+    spreads over one dict and several boxed floats per order.
+
+    The NumPy accessors (ids, is_buy, amounts, prices) are zero-copy views of the
+    buffers. Iterating or indexing yields OrderRecord views, so an Orders can be
+    passed wherever a list of order dicts is read. It is immutable once built.
+    """
+
+    __slots__ = ("_id", "_type", "_buy", "_amount", "_price", "_types")
+
+    def __init__(self) -> None:
+        self._id = array("q")
+        self._type = array("H")
+        self._buy = array("b")
+        self._amount = array("d")
+        self._price = array("d")
+        self._types: List[str] = []
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[OrderRow]) -> "Orders":
+        """Build from (id, type, side, amount, price) tuples (see iter_order_rows)."""
+        columns = list(zip(*rows))
+        if not columns:
+            return cls()
+        return cls.from_columns(*columns)
+
+    @classmethod
+    def from_columns(
+        cls,
+        ids: Sequence[Optional[int]],
+        types: Sequence[str],
+        sides: Sequence[str],
+        amounts: Sequence[float],
+        prices: Sequence[float],
+    ) -> "Orders":
+        """Build from one sequence per field; sides are "BUY" or "SELL"."""
+        orders = cls()
+        codes: Dict[str, int] = {}
+        orders._id = array("q", [_NO_ID if i is None else i for i in ids])
+        orders._type = array("H", [codes.setdefault(t, len(codes)) for t in types])
+        orders._types = list(codes)
+        orders._buy = array("b", [s == "BUY" for s in sides])
+        orders._amount = array("d", amounts)
+        orders._price = array("d", prices)
+        return orders
+
+    @classmethod
+    def from_dicts(cls, orders: Iterable[dict]) -> "Orders":
+        """Build from parse_orders_from_text()-style dicts (or OrderRecords)."""
+        return cls.from_rows(
+            (o.get("id"), o.get("type") or "", o["side"], o["amount"], o["price"]) for o in orders
+        )
+
+    def __len__(self) -> int:
+        return len(self._price)
+
+    def __getitem__(self, i: int) -> OrderRecord:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("order index out of range")
+        return OrderRecord(self, i)
+
+    def __iter__(self) -> Iterator[OrderRecord]:
+        for i in range(len(self)):
+            yield OrderRecord(self, i)
+
+    def __repr__(self) -> str:
+        return f"Orders({len(self)} orders)"
+
+    @property
+    def ids(self) -> np.ndarray:
+        return np.frombuffer(self._id, dtype=np.int64)
+
+    @property
+    def is_buy(self) -> np.ndarray:
+        return np.frombuffer(self._buy, dtype=np.bool_)
+
+    @property
+    def amounts(self) -> np.ndarray:
+        return np.frombuffer(self._amount, dtype=np.float64)
+
+    @property
+    def prices(self) -> np.ndarray:
+        return np.frombuffer(self._price, dtype=np.float64)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers."""
+        return sum(col.itemsize * len(col) for col in (self._id, self._type, self._buy, self._amount, self._price))
+
+    def select(self, mask: Union[np.ndarray, Sequence[int]]) -> "Orders":
+        """A new Orders with the rows picked by a boolean mask or an index array."""
+        picked = Orders()
+        picked._types = list(self._types)
+        for name in ("_id", "_type", "_buy", "_amount", "_price"):
+            column = getattr(self, name)
+            values = np.frombuffer(column, dtype=np.dtype(column.typecode))[mask]
+            setattr(picked, name, array(column.typecode, values.tobytes()))
+        return picked
+
+    def to_dicts(self) -> List[dict]:
+        types = self._types
+        return [
+            {"id": None if i == _NO_ID else i, "type": types[t], "side": "BUY" if b else "SELL", "amount": a, "price": p}
+            for i, t, b, a, p in zip(self._id, self._type, self._buy, self._amount, self._price)
+        ]
+
+    def columns(self) -> Tuple[List[Any], List[str], List[float], List[float]]:
+        """(keys, sides, amounts, prices) as Python lists; keys are ids, or ("#", i) without one."""
+        keys = [("#", i) if order_id == _NO_ID else order_id for i, order_id in enumerate(self._id)]
+        sides = ["BUY" if b else "SELL" for b in self._buy]
+        return keys, sides, self._amount.tolist(), self._price.tolist()
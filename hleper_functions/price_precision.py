@@ -0,0 +1,159 @@
+import math
+from decimal import Decimal
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+# Bitfinex prices: at most 5 significant digits and at most 8 decimal places;
+# extra digits are truncated (ROUND_DOWN), never rounded.
+SIG_DIGITS = 5
+MAX_DECIMALS = 8
+
+_MIN_UNITS = 10 ** (SIG_DIGITS - 1)
+_MAX_UNITS = 10 ** SIG_DIGITS
+# Absorbs the float error of price * 10**decimals (well under 1e-9 for < 1e5 units),
+# so 0.01639 -> 1639.0000000000002 or 1638.9999999999998 both truncate to 1639 units.
+_TOL = 1e-9
+
+
+@lru_cache(maxsize=None)
+def _grid(magnitude: int) -> Tuple[int, float, float]:
+    """
+    Tick grid of prices in [10**magnitude, 10**(magnitude + 1)): decimals and the
+    float multiplier/divisor that scales a price to whole ticks.
+    """
+    decimals = min(SIG_DIGITS - 1 - magnitude, MAX_DECIMALS)
+    if decimals >= 0:
+        return decimals, 10.0 ** decimals, 1.0
+    return decimals, 1.0, 10.0 ** -decimals
+
+
+def _units(price: float) -> Tuple[int, int]:
+    """
+    Truncated price as (whole ticks, decimals) for a finite price > 0.
+    """
+    magnitude = math.floor(math.log10(price))
+    decimals, mul, div = _grid(magnitude)
+    units = int(price * mul / div + _TOL)
+    # log10 can land one magnitude off right at a power of ten
+    if decimals == SIG_DIGITS - 1 - magnitude and not _MIN_UNITS <= units < _MAX_UNITS:
+        magnitude += 1 if units >= _MAX_UNITS else -1
+        decimals, mul, div = _grid(magnitude)
+        units = int(price * mul / div + _TOL)
+    return units, decimals
+
+
+def _format_units(units: int, decimals: int) -> str:
+    if decimals <= 0:
+        return str(units * 10 ** -decimals)
+    whole, frac = divmod(units, 10 ** decimals)
+    if frac == 0:
+        return str(whole)
+    return f"{whole}.{str(frac).zfill(decimals).rstrip('0')}"
+
+
+def _check_finite(price: float) -> None:
+    if not math.isfinite(price):
+        raise ValueError(f"Invalid price: {price}")
+
+
+def format_price(price: float) -> str:
+    """
+    Price as Bitfinex accepts it: truncated to 5 significant digits (and 8 decimals),
+    without trailing zeros, e.g. 0.0163919 -> "0.016391", 123456 -> "123450".
+    """
+    _check_finite(price)
+    if price == 0:
+        return "0"
+    units, decimals = _units(abs(price))
+    if units == 0:
+        return "0"
+    text = _format_units(units, decimals)
+    return "-" + text if price < 0 else text
+
+
+def tick_size(price: float) -> float:
+    """
+    Smallest price step allowed at this price's magnitude (0.000001 for 0.01639).
+    """
+    _check_finite(price)
+    if price == 0:
+        return 10.0 ** -MAX_DECIMALS
+    decimals = _units(abs(price))[1]
+    return 10.0 ** -decimals
+
+
+def tick_size_decimal(price: float) -> Decimal:
+    """Exact tick_size() as a Decimal (e.g. Decimal('0.000001'))."""
+    _check_finite(price)
+    decimals = _units(abs(price))[1] if price != 0 else MAX_DECIMALS
+    return Decimal(1).scaleb(-decimals)
+
+
+def snap_price(price: float) -> float:
+    """
+    Price truncated onto the tick grid, as a float (the value format_price() sends).
+    """
+    _check_finite(price)
+    if price == 0:
+        return 0.0
+    units, decimals = _units(abs(price))
+    value = units / 10.0 ** decimals if decimals >= 0 else float(units * 10 ** -decimals)
+    return -value if price < 0 else value
+
+
+def _units_array(prices: Iterable[float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized _units(): (signs, whole ticks, decimals) for every price; zeros give 0 ticks.
+    """
+    p = np.asarray(prices, dtype=np.float64)
+    if not np.all(np.isfinite(p)):
+        raise ValueError("Invalid price: prices must be finite")
+    signs = np.sign(p)
+    p = np.abs(p)
+    safe = np.where(p > 0, p, 1.0)
+    magnitude = np.floor(np.log10(safe)).astype(np.int64)
+
+    def scale(mag: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        decimals = np.minimum(SIG_DIGITS - 1 - mag, MAX_DECIMALS)
+        up = 10.0 ** np.maximum(decimals, 0)
+        down = 10.0 ** np.maximum(-decimals, 0)
+        return np.floor(safe * up / down + _TOL).astype(np.int64), decimals
+
+    units, decimals = scale(magnitude)
+    unclamped = decimals == SIG_DIGITS - 1 - magnitude
+    magnitude = magnitude + np.where(unclamped & (units >= _MAX_UNITS), 1, 0)
+    magnitude = magnitude - np.where(unclamped & (units < _MIN_UNITS), 1, 0)
+    units, decimals = scale(magnitude)
+    units = np.where(p > 0, units, 0)
+    return signs, units, decimals
+
+
+def format_prices(prices: Iterable[float]) -> List[str]:
+    """
+    format_price() for a whole array/list of prices; the truncation is vectorized
+    and each distinct (ticks, decimals) pair is only turned into a string once.
+    """
+    signs, units, decimals = _units_array(prices)
+    cache = {}
+    out = []
+    for sign, u, d in zip(signs.tolist(), units.tolist(), decimals.tolist()):
+        text = cache.get((u, d))
+        if text is None:
+            text = cache[(u, d)] = "0" if u == 0 else _format_units(u, d)
+        out.append("-" + text if sign < 0 and u else text)
+    return out
+
+
+def snap_prices(prices: Iterable[float]) -> np.ndarray:
+    """
+    snap_price() for a whole array of prices (float64 array).
+    """
+    signs, units, decimals = _units_array(prices)
+    values = np.where(
+        decimals >= 0,
+        units / 10.0 ** np.maximum(decimals, 0),
+        units * 10.0 ** np.maximum(-decimals, 0),
+    )
+    return signs * values
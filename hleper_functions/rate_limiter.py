@@ -0,0 +1,225 @@
+import fcntl
+import logging
+import math
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+from hleper_functions.wide_logger import log_event
+
+
+class RateLimit(NamedTuple):
+    per_minute: float
+    burst: int
+    # Priority classes (the emergency cancel path) hold back every other class while
+    # they wait, and go ahead anyway instead of failing when max_wait_s runs out.
+    priority: bool = False
+
+
+# Bitfinex allows roughly 10-90 requests/min per REST endpoint; one bucket per class
+# is deliberately conservative because it is shared by every endpoint in the class.
+DEFAULT_LIMITS: Dict[str, RateLimit] = {
+    "public": RateLimit(90, 10),
+    "auth_read": RateLimit(90, 10),
+    "auth_write": RateLimit(60, 10),
+    "cancel": RateLimit(90, 20, priority=True),
+}
+# Fixed slot order in the shared file, so processes agree on the layout
+_CLASSES: Tuple[str, ...] = ("public", "auth_read", "auth_write", "cancel")
+
+# Header: magic, version, priority-hold deadline (epoch seconds); then (tokens, updated) per class
+_HEADER = struct.Struct("<4sId")
+_SLOT = struct.Struct("<dd")
+_MAGIC = b"HBRL"
+_VERSION = 1
+# How long one priority waiter holds back other classes before it has to refresh the hold
+_PRIORITY_HOLD_S = 0.5
+
+
+class RateLimitTimeout(Exception):
+    pass
+
+
+def endpoint_class(endpoint: str) -> str:
+    """
+    Budget an endpoint is charged to: cancels (REST or the cancel CLI), other
+    authenticated writes, authenticated reads, or public data.
+    """
+    if endpoint.startswith("auth/w/order/cancel") or endpoint == "cli:cancel":
+        return "cancel"
+    if endpoint.startswith("auth/w/"):
+        return "auth_write"
+    if endpoint.startswith("auth/") or endpoint == "cli:list":
+        return "auth_read"
+    return "public"
+
+
+def parse_limits(spec: str) -> Dict[str, RateLimit]:
+    """
+    HB_RATE_LIMITS overrides, e.g. "auth_read=45:5,cancel=90:30" (requests per
+    minute:burst per class); unlisted classes keep DEFAULT_LIMITS.
+    """
+    limits = dict(DEFAULT_LIMITS)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        if name not in limits:
+            raise ValueError(f"unknown rate limit class {name!r} (expected one of {', '.join(_CLASSES)})")
+        per_minute, _, burst = value.partition(":")
+        limits[name] = limits[name]._replace(
+            per_minute=float(per_minute), burst=int(burst) if burst else limits[name].burst
+        )
+    return limits
+
+
+class RateLimiter:
+    """
+    Token buckets shared by every process on the host through one small file: the
+    bucket state is read, refilled and written back under an exclusive flock (plus a
+    thread lock, since flock does not separate threads sharing a descriptor). Callers
+    that find their bucket empty sleep until a token is due, up to max_wait_s, and
+    the wait is logged as `rate_limit_wait`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        limits: Optional[Dict[str, RateLimit]] = None,
+        max_wait_s: float = 5.0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.path = os.path.expanduser(path)
+        self.limits = limits or dict(DEFAULT_LIMITS)
+        self.max_wait_s = max_wait_s
+        self.logger = logger or logging.getLogger("hb_monitor")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        with self._locked():
+            magic, version, _ = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0).ljust(_HEADER.size, b"\0"))
+            if magic != _MAGIC or version != _VERSION:
+                # New (or foreign) file: every bucket starts full (NaN = never used)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, _VERSION, 0.0), 0)
+                for i in range(len(_CLASSES)):
+                    os.pwrite(self._fd, _SLOT.pack(math.nan, 0.0), _HEADER.size + i * _SLOT.size)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _read_slot(self, index: int, limit: RateLimit, now: float) -> float:
+        tokens, updated = _SLOT.unpack(os.pread(self._fd, _SLOT.size, _HEADER.size + index * _SLOT.size))
+        if math.isnan(tokens):
+            return float(limit.burst)
+        # A clock step backwards must not mint tokens
+        return min(float(limit.burst), tokens + max(0.0, now - updated) * limit.per_minute / 60.0)
+
+    def _write_slot(self, index: int, tokens: float, now: float) -> None:
+        os.pwrite(self._fd, _SLOT.pack(tokens, now), _HEADER.size + index * _SLOT.size)
+
+    def _try_take(self, name: str) -> float:
+        """
+        Take one token if available; returns 0.0 on success, else seconds until worth retrying.
+        """
+        limit = self.limits[name]
+        index = _CLASSES.index(name)
+        with self._locked():
+            now = time.time()
+            hold_until = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))[2]
+            tokens = self._read_slot(index, limit, now)
+            held = not limit.priority and hold_until > now
+            if tokens >= 1.0 and not held:
+                self._write_slot(index, tokens - 1.0, now)
+                if limit.priority and hold_until > now:
+                    # Release the hold; priority waiters still queued renew it within _PRIORITY_HOLD_S / 2
+                    os.pwrite(self._fd, _HEADER.pack(_MAGIC, _VERSION, 0.0), 0)
+                return 0.0
+            self._write_slot(index, tokens, now)
+            if limit.priority:
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, _VERSION, now + _PRIORITY_HOLD_S), 0)
+        wait = max(0.0, 1.0 - tokens) * 60.0 / limit.per_minute
+        if held:
+            # Poll: the hold is released as soon as the priority request gets its token
+            wait = max(wait, min(hold_until - now, 0.05))
+        return max(wait, 0.001)
+
+    def acquire(self, name: str, endpoint: str = "") -> float:
+        """
+        Block until the class has a token and return the seconds waited. Raises
+        RateLimitTimeout after max_wait_s, except for priority classes, which log
+        `rate_limit_overrun` and proceed.
+        """
+        limit = self.limits[name]
+        t0 = time.monotonic()
+        deadline = t0 + self.max_wait_s
+        while True:
+            wait = self._try_take(name)
+            if wait == 0.0:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                waited_ms = round((time.monotonic() - t0) * 1000.0, 3)
+                if limit.priority:
+                    log_event(self.logger, "WARNING", "rate_limit_overrun", endpoint_class=name, endpoint=endpoint, wait_ms=waited_ms)
+                    return time.monotonic() - t0
+                log_event(self.logger, "WARNING", "rate_limit_timeout", endpoint_class=name, endpoint=endpoint, wait_ms=waited_ms)
+                raise RateLimitTimeout(f"{name} rate limit: no token within {self.max_wait_s}s for {endpoint or name}")
+            # Priority waiters wake up often enough to keep their hold on the other classes
+            time.sleep(min(wait, remaining, _PRIORITY_HOLD_S / 2 if limit.priority else wait))
+        waited = time.monotonic() - t0
+        if waited > 0.001:
+            log_event(
+                self.logger,
+                "INFO",
+                "rate_limit_wait",
+                endpoint_class=name,
+                endpoint=endpoint,
+                wait_ms=round(waited * 1000.0, 3),
+                priority=limit.priority,
+            )
+        return waited
+
+    def acquire_endpoint(self, endpoint: str) -> float:
+        return self.acquire(endpoint_class(endpoint), endpoint)
+
+    def drain(self, name: str) -> None:
+        """
+        Empty a class's bucket, e.g. after the exchange answered with a rate-limit error.
+        """
+        with self._locked():
+            self._write_slot(_CLASSES.index(name), 0.0, time.time())
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Process-wide limiter on HB_RATE_LIMIT_FILE (None unless it is set), with
+    HB_RATE_LIMITS overrides and HB_RATE_LIMIT_MAX_WAIT_S.
+    """
+    path = os.environ.get("HB_RATE_LIMIT_FILE", "").strip()
+    if not path:
+        return None
+    full_path = os.path.expanduser(path)
+    with _limiters_lock:
+        limiter = _limiters.get(full_path)
+        if limiter is None:
+            limiter = _limiters[full_path] = RateLimiter(
+                full_path,
+                limits=parse_limits(os.environ.get("HB_RATE_LIMITS", "")),
+                max_wait_s=float(os.environ.get("HB_RATE_LIMIT_MAX_WAIT_S", "5")),
+            )
+        return limiter
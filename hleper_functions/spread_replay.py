@@ -0,0 +1,281 @@
+import calendar
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hleper_functions.helper_functions_spread import (
+    compute_spread_percent_mid,
+    iter_orders_from_lines,
+    split_filter_sort_orders,
+)
+
+# Events whose best_bid/best_ask can be replayed; the book behind them was already
+# filtered by the min amount in force when they were logged.
+SPREAD_EVENTS = ("spread_ok", "spread_threshold_breached")
+STATUS_EVENTS = ("strategy_status",)
+
+
+class OrderFrames(NamedTuple):
+    """
+    Recorded open-order lists, one frame per list-command output, flattened so a
+    sweep can filter all frames at once. Buys are sorted by (frame, price desc) and
+    sells by (frame, price asc), so a frame's first surviving row is its best price.
+    """
+
+    ts: np.ndarray  # float64 epoch seconds per frame, ascending
+    buy_frame: np.ndarray
+    buy_price: np.ndarray
+    buy_amount: np.ndarray
+    sell_frame: np.ndarray
+    sell_price: np.ndarray
+    sell_amount: np.ndarray
+
+
+class QuoteFrames(NamedTuple):
+    """Best bid/ask per logged event (NaN when the event had none)."""
+
+    ts: np.ndarray
+    best_bid: np.ndarray
+    best_ask: np.ndarray
+    min_amount: Optional[float]
+
+
+class SweepResult(NamedTuple):
+    min_amount: Optional[float]
+    threshold: float
+    breach_frames: int
+    kills: int
+    kill_times: List[float]
+
+
+def _parse_ts(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(calendar.timegm(time.strptime(str(value), "%Y-%m-%dT%H:%M:%SZ")))
+    except ValueError:
+        return None
+
+
+def _frame_order(o: Dict[str, Any]) -> dict:
+    # Same conventions as the json list format: side may be omitted (amount sign)
+    amount = float(o["amount"])
+    side = str(o.get("side") or ("BUY" if amount > 0 else "SELL")).upper()
+    return {"side": side, "price": float(o["price"]), "amount": abs(amount)}
+
+
+def _flatten(frames: List[Tuple[float, List[dict]]]) -> OrderFrames:
+    frames.sort(key=lambda item: item[0])
+    columns: Dict[str, List[Tuple[int, float, float]]] = {"BUY": [], "SELL": []}
+    for index, (_, orders) in enumerate(frames):
+        for o in orders:
+            if o["side"] in columns:
+                columns[o["side"]].append((index, o["price"], o["amount"]))
+
+    def side_arrays(rows: List[Tuple[int, float, float]], descending: bool) -> Tuple[np.ndarray, ...]:
+        data = np.array(rows, dtype=np.float64).reshape(-1, 3)
+        price_key = -data[:, 1] if descending else data[:, 1]
+        order = np.lexsort((price_key, data[:, 0]))
+        data = data[order]
+        return data[:, 0].astype(np.int64), data[:, 1].copy(), data[:, 2].copy()
+
+    buy_frame, buy_price, buy_amount = side_arrays(columns["BUY"], descending=True)
+    sell_frame, sell_price, sell_amount = side_arrays(columns["SELL"], descending=False)
+    ts = np.array([t for t, _ in frames], dtype=np.float64)
+    return OrderFrames(ts, buy_frame, buy_price, buy_amount, sell_frame, sell_price, sell_amount)
+
+
+def load_order_frames(paths: Sequence[str], fmt: str = "table") -> OrderFrames:
+    """
+    Recorded list outputs: every file (directories are walked) is one frame stamped
+    with its mtime and parsed in fmt, except *.jsonl files, whose lines are frames
+    of the form {"ts": <epoch or ISO>, "orders": [{"side", "price", "amount"}, ...]}.
+    """
+    frames: List[Tuple[float, List[dict]]] = []
+    files: List[str] = []
+    for path in paths:
+        path = os.path.expanduser(path)
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        else:
+            files.append(path)
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        ts = _parse_ts(record.get("ts"))
+                        orders = [_frame_order(o) for o in record.get("orders", [])]
+                        if ts is not None:
+                            frames.append((ts, orders))
+            else:
+                frames.append((os.path.getmtime(path), list(iter_orders_from_lines(f, fmt))))
+    return _flatten(frames)
+
+
+def load_quote_frames(
+    paths: Sequence[str],
+    events: Iterable[str] = SPREAD_EVENTS,
+    symbol: Optional[str] = None,
+) -> QuoteFrames:
+    """
+    best_bid/best_ask of the given events from JSON event logs. With symbol, only
+    events for that symbol (or without one, as single-market runs log them) are used.
+    The min amount comes from the last run_start event, when there is one.
+    """
+    wanted = set(events)
+    rows: List[Tuple[float, float, float]] = []
+    min_amount: Optional[float] = None
+    for path in paths:
+        with open(os.path.expanduser(path), "r", encoding="utf-8") as f:
+            for line in f:
+                if '"event"' not in line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if symbol and record.get("symbol", symbol) != symbol:
+                    continue
+                event = record.get("event")
+                if event == "run_start" and record.get("min_order_amount") is not None:
+                    min_amount = float(record["min_order_amount"])
+                if event not in wanted:
+                    continue
+                ts = _parse_ts(record.get("ts"))
+                if ts is None:
+                    continue
+                bid, ask = record.get("best_bid"), record.get("best_ask")
+                rows.append((ts, np.nan if bid is None else float(bid), np.nan if ask is None else float(ask)))
+    rows.sort(key=lambda r: r[0])
+    data = np.array(rows, dtype=np.float64).reshape(-1, 3)
+    return QuoteFrames(data[:, 0].copy(), data[:, 1].copy(), data[:, 2].copy(), min_amount)
+
+
+def _best_prices(frame: np.ndarray, price: np.ndarray, amount: np.ndarray, n_frames: int, min_amount: float) -> np.ndarray:
+    # split_filter_sort_orders keeps amount >= min_amount; rows are pre-sorted best-first
+    keep = amount >= min_amount
+    frames, first = np.unique(frame[keep], return_index=True)
+    best = np.full(n_frames, np.nan)
+    best[frames] = price[keep][first]
+    return best
+
+
+def spread_percent_mid(best_bid: np.ndarray, best_ask: np.ndarray) -> np.ndarray:
+    """
+    Vectorized compute_spread_percent_mid(): NaN where it would return None.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        valid = (best_bid > 0) & (best_ask > 0)
+        mid = (best_ask + best_bid) / 2.0
+        spread = ((best_ask - best_bid) / mid) * 100.0
+    return np.where(valid & (mid > 0), spread, np.nan)
+
+
+def order_frames_spread(frames: OrderFrames, min_amount: float) -> np.ndarray:
+    n = len(frames.ts)
+    best_bid = _best_prices(frames.buy_frame, frames.buy_price, frames.buy_amount, n, min_amount)
+    best_ask = _best_prices(frames.sell_frame, frames.sell_price, frames.sell_amount, n, min_amount)
+    return spread_percent_mid(best_bid, best_ask)
+
+
+def sweep_spreads(
+    ts: np.ndarray,
+    spread: np.ndarray,
+    thresholds: Sequence[float],
+    min_amount: Optional[float],
+) -> List[SweepResult]:
+    """
+    Apply spread.py's rule (spread < 0 or spread >= threshold; no spread = no breach)
+    for every threshold at once. A kill is the first breaching frame after a healthy
+    one: the screen session is already gone while the breach persists.
+    """
+    results = []
+    crossed = spread < 0.0
+    for threshold in thresholds:
+        with np.errstate(invalid="ignore"):
+            breach = crossed | (spread >= threshold)
+        starts = breach & ~np.concatenate(([False], breach[:-1]))
+        kill_times = ts[starts].tolist()
+        results.append(SweepResult(min_amount, float(threshold), int(breach.sum()), len(kill_times), kill_times))
+    return results
+
+
+_worker_frames: Any = None
+
+
+def _init_worker(frames: Any) -> None:
+    global _worker_frames
+    _worker_frames = frames
+
+
+def _sweep_task(min_amounts: List[Optional[float]], thresholds: List[float]) -> List[SweepResult]:
+    frames = _worker_frames
+    results: List[SweepResult] = []
+    for min_amount in min_amounts:
+        if isinstance(frames, OrderFrames):
+            spread = order_frames_spread(frames, min_amount or 0.0)
+        else:
+            spread = spread_percent_mid(frames.best_bid, frames.best_ask)
+        results.extend(sweep_spreads(frames.ts, spread, thresholds, min_amount))
+    return results
+
+
+def run_sweep(
+    frames: Any,
+    thresholds: Sequence[float],
+    min_amounts: Sequence[float] = (0.0,),
+    workers: Optional[int] = None,
+) -> List[SweepResult]:
+    """
+    Sweep thresholds x min_amounts across worker processes. Order frames are split
+    by min amount; quote frames (already filtered when logged) only support their
+    recorded min amount, so the thresholds are split instead.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    thresholds = [float(t) for t in thresholds]
+    if isinstance(frames, OrderFrames):
+        jobs = [([float(m)], thresholds) for m in min_amounts]
+    else:
+        size = max(1, -(-len(thresholds) // workers))
+        jobs = [([frames.min_amount], thresholds[i:i + size]) for i in range(0, len(thresholds), size)]
+    if workers == 1 or len(jobs) == 1:
+        _init_worker(frames)
+        chunks = [_sweep_task(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_worker, initargs=(frames,)) as pool:
+            chunks = list(pool.map(_sweep_task, *zip(*jobs)))
+    return [result for chunk in chunks for result in chunk]
+
+
+def verify_against_reference(frames: OrderFrames, min_amounts: Sequence[float], samples: int = 200, seed: int = 1) -> int:
+    """
+    Recompute random frames with split_filter_sort_orders + compute_spread_percent_mid
+    (the scalar code path) and count frames where the vectorized spread differs.
+    """
+    rng = random.Random(seed)
+    n = len(frames.ts)
+    mismatches = 0
+    for min_amount in min_amounts:
+        vectorized = order_frames_spread(frames, float(min_amount))
+        for index in rng.sample(range(n), min(samples, n)):
+            orders = [
+                {"side": "BUY", "price": p, "amount": a}
+                for p, a in zip(frames.buy_price[frames.buy_frame == index], frames.buy_amount[frames.buy_frame == index])
+            ] + [
+                {"side": "SELL", "price": p, "amount": a}
+                for p, a in zip(frames.sell_price[frames.sell_frame == index], frames.sell_amount[frames.sell_frame == index])
+            ]
+            buys, sells = split_filter_sort_orders(orders, float(min_amount))
+            expected = compute_spread_percent_mid(buys[0] if buys else None, sells[0] if sells else None)
+            got = vectorized[index]
+            if (expected is None) != bool(np.isnan(got)) or (expected is not None and expected != got):
+                mismatches += 1
+    return mismatches
@@ -0,0 +1,158 @@
+import fcntl
+import math
+import mmap
+import os
+import struct
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Numeric columns of every record (after the timestamp); missing values are stored as NaN.
+SERIES_FIELDS = (
+    "best_bid",
+    "best_ask",
+    "mid_price",
+    "spread_percent",
+    "bid_liquidity_usd",
+    "ask_liquidity_usd",
+    "pnk_amount",
+    "usd_amount",
+    "total_value",
+)
+SOURCES = {"spread": 1, "monitor": 2}
+_SOURCE_NAMES = {code: name for name, code in SOURCES.items()}
+
+# Header: magic, format version, record size, capacity (records), records ever appended.
+_HEADER = struct.Struct("<4sIIIQ")
+_HEADER_SIZE = 64
+_COUNT_OFFSET = 16
+_MAGIC = b"HBTS"
+_VERSION = 1
+_RECORD = struct.Struct("<" + "d" * (1 + len(SERIES_FIELDS)) + "B7x")
+_DTYPE = np.dtype(
+    [("ts", "<f8")] + [(name, "<f8") for name in SERIES_FIELDS] + [("source", "u1"), ("_pad", "V7")]
+)
+assert _DTYPE.itemsize == _RECORD.size
+
+
+class TimeSeriesStore:
+    """
+    Fixed-width ring buffer of book/asset samples in a memory-mapped file. append() is
+    O(1): one record written in place plus a counter bump, under an exclusive flock so
+    spread.py and monitor.py can share one file. Once full, the oldest records are
+    overwritten. Queries copy the ring out in time order as a numpy record array.
+    """
+
+    def __init__(self, path: str, capacity: int = 200_000) -> None:
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            size = os.fstat(self._fd).st_size
+            if size >= _HEADER_SIZE:
+                header = os.pread(self._fd, _HEADER.size, 0)
+                magic, version, record_size, existing_capacity, _ = _HEADER.unpack(header)
+                if magic != _MAGIC or version != _VERSION or record_size != _RECORD.size:
+                    raise ValueError(f"{self.path} is not a version {_VERSION} time-series store")
+                # An existing store keeps the capacity it was created with
+                capacity = existing_capacity
+            else:
+                os.ftruncate(self._fd, _HEADER_SIZE + capacity * _RECORD.size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, _VERSION, _RECORD.size, capacity, 0), 0)
+            self.capacity = capacity
+            self._mm = mmap.mmap(self._fd, _HEADER_SIZE + capacity * _RECORD.size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        return min(self._count(), self.capacity)
+
+    def _count(self) -> int:
+        return struct.unpack_from("<Q", self._mm, _COUNT_OFFSET)[0]
+
+    def append(self, source: str = "monitor", ts: Optional[float] = None, **fields: Optional[float]) -> int:
+        """
+        Append one sample; unknown field names raise, missing ones are stored as NaN.
+        Returns the record's sequence number (records ever appended before it).
+        """
+        unknown = set(fields) - set(SERIES_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown series fields: {sorted(unknown)}")
+        values = [math.nan if fields.get(name) is None else float(fields[name]) for name in SERIES_FIELDS]
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            seq = self._count()
+            offset = _HEADER_SIZE + (seq % self.capacity) * _RECORD.size
+            _RECORD.pack_into(self._mm, offset, time.time() if ts is None else ts, *values, SOURCES.get(source, 0))
+            struct.pack_into("<Q", self._mm, _COUNT_OFFSET, seq + 1)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return seq
+
+    def array(self, source: Optional[str] = None) -> np.ndarray:
+        """
+        All retained records, oldest first, as a numpy record array (a copy).
+        """
+        fcntl.flock(self._fd, fcntl.LOCK_SH)
+        try:
+            count = self._count()
+            ring = np.frombuffer(self._mm, dtype=_DTYPE, count=self.capacity, offset=_HEADER_SIZE)
+            if count <= self.capacity:
+                records = ring[:count].copy()
+            else:
+                head = count % self.capacity
+                records = np.concatenate((ring[head:], ring[:head]))
+            del ring
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        if source is not None:
+            records = records[records["source"] == SOURCES.get(source, 0)]
+        return records
+
+    def latest(self, n: int = 1, source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        The newest n records (oldest first).
+        """
+        if n <= 0:
+            return []
+        return _to_dicts(self.array(source)[-n:])
+
+    def range(self, start_ts: float, end_ts: Optional[float] = None, source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Records with start_ts <= ts <= end_ts (epoch seconds), oldest first.
+        """
+        records = self.array(source)
+        lo = np.searchsorted(records["ts"], start_ts, side="left")
+        hi = len(records) if end_ts is None else np.searchsorted(records["ts"], end_ts, side="right")
+        return _to_dicts(records[lo:hi])
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+
+def _to_dicts(records: np.ndarray) -> List[Dict[str, Any]]:
+    rows = []
+    for rec in records:
+        row: Dict[str, Any] = {"ts": float(rec["ts"]), "source": _SOURCE_NAMES.get(int(rec["source"]), "unknown")}
+        for name in SERIES_FIELDS:
+            value = float(rec[name])
+            row[name] = None if math.isnan(value) else value
+        rows.append(row)
+    return rows
+
+
+_stores: Dict[str, TimeSeriesStore] = {}
+
+
+def open_series_store(path: str, capacity: int = 200_000) -> TimeSeriesStore:
+    """
+    Process-wide store per path, so daemon cycles reuse one mapping.
+    """
+    full_path = os.path.expanduser(path)
+    store = _stores.get(full_path)
+    if store is None:
+        store = _stores[full_path] = TimeSeriesStore(full_path, capacity)
+    return store
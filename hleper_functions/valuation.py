@@ -0,0 +1,163 @@
+import logging
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hleper_functions.bfx_rest import get_rest_session
+from hleper_functions.wide_logger import log_event
+
+# Intermediate currencies tried, in order, when a currency has no pair with the quote.
+# Bitfinex lists USDT as UST.
+DEFAULT_VIA: Tuple[str, ...] = ("UST", "BTC")
+
+
+def pair_symbol(base: str, quote: str) -> str:
+    """Bitfinex trading-pair symbol: tBTCUSD, or tTESTBTC:TESTUSD when a code is not 3 letters."""
+    return f"t{base}{quote}" if len(base) == 3 and len(quote) == 3 else f"t{base}:{quote}"
+
+
+def candidate_symbols(currencies: Iterable[str], quote: str, via: Sequence[str] = DEFAULT_VIA) -> List[str]:
+    """
+    Every pair that could price currencies in quote: direct and inverse pairs with
+    the quote, and both legs through each intermediate in via. Bitfinex answers
+    unknown symbols by leaving them out, so asking for all of them costs nothing
+    but bytes and keeps valuation to one request.
+    """
+    symbols = set()
+    for currency in currencies:
+        if currency == quote:
+            continue
+        symbols.update((pair_symbol(currency, quote), pair_symbol(quote, currency)))
+        for mid in via:
+            if mid in (currency, quote):
+                continue
+            symbols.update(
+                (pair_symbol(currency, mid), pair_symbol(mid, currency), pair_symbol(mid, quote), pair_symbol(quote, mid))
+            )
+    return sorted(symbols)
+
+
+def fetch_ticker_prices(symbols: Sequence[str], logger: Optional[logging.Logger] = None) -> Optional[Dict[str, float]]:
+    """
+    Last prices of many trading pairs from one batched tickers request (through the
+    shared session's public cache). Returns None when the request failed.
+    """
+    if not symbols:
+        return {}
+    try:
+        tickers = get_rest_session().get_t_tickers(list(symbols))
+    except Exception as e:
+        if logger:
+            log_event(logger, "ERROR", "fetch_tickers_failed", symbols=len(symbols), error=str(e))
+        return None
+    return {symbol: float(t.last_price) for symbol, t in tickers.items() if t.last_price and t.last_price > 0}
+
+
+def conversion_rate(
+    currency: str, quote: str, prices: Mapping[str, float], via: Sequence[str] = DEFAULT_VIA
+) -> Tuple[Optional[float], Optional[str]]:
+    """
+    (price of one unit of currency in quote, route) from pair prices: the direct
+    pair, the inverse pair, or two legs through the first intermediate in via that
+    has both. The route names the pairs used, e.g. "tPNKUST*tUSTUSD" or "1/tUSDEUR".
+    (None, None) when no route exists.
+    """
+    if currency == quote:
+        return 1.0, quote
+
+    def leg(base: str, target: str) -> Tuple[Optional[float], Optional[str]]:
+        symbol = pair_symbol(base, target)
+        if symbol in prices:
+            return prices[symbol], symbol
+        inverse = pair_symbol(target, base)
+        if inverse in prices:
+            return 1.0 / prices[inverse], f"1/{inverse}"
+        return None, None
+
+    rate, route = leg(currency, quote)
+    if rate is not None:
+        return rate, route
+    for mid in via:
+        if mid in (currency, quote):
+            continue
+        first, first_route = leg(currency, mid)
+        if first is None:
+            continue
+        second, second_route = leg(mid, quote)
+        if second is not None:
+            return first * second, f"{first_route}*{second_route}"
+    return None, None
+
+
+class Valuation(NamedTuple):
+    quote: str
+    total_value: float
+    # currency -> {"amount", "price", "value", "proportion", "route"}; price/value/
+    # proportion/route are None for a currency with no route to the quote
+    assets: Dict[str, Dict[str, Any]]
+    # Currencies with a non-zero balance but no price (left out of total_value)
+    unpriced: List[str]
+
+
+def value_assets(
+    amounts: Mapping[str, float], rates: Mapping[str, Tuple[Optional[float], Optional[str]]], quote: str
+) -> Valuation:
+    """
+    Value, total and proportion (% of the total) of every balance, computed on
+    arrays: one multiply, one nansum and one divide however many assets there are.
+    """
+    currencies = list(amounts)
+    n = len(currencies)
+    amount = np.fromiter((amounts[c] for c in currencies), dtype=np.float64, count=n)
+    price = np.fromiter(
+        (np.nan if rates.get(c, (None, None))[0] is None else rates[c][0] for c in currencies), dtype=np.float64, count=n
+    )
+    # A zero balance is worth 0 even without a price
+    value = np.where(amount == 0, 0.0, amount * price)
+    total = float(np.nansum(value))
+    proportion = value / total * 100.0 if total > 0 else np.where(np.isnan(value), np.nan, 0.0)
+    assets: Dict[str, Dict[str, Any]] = {}
+    for i, c in enumerate(currencies):
+        priced = not np.isnan(price[i])
+        assets[c] = {
+            "amount": float(amount[i]),
+            "price": float(price[i]) if priced else None,
+            "value": None if np.isnan(value[i]) else float(value[i]),
+            "proportion": None if np.isnan(proportion[i]) else float(proportion[i]),
+            "route": rates.get(c, (None, None))[1],
+        }
+    unpriced = [c for c in currencies if assets[c]["value"] is None]
+    return Valuation(quote, total, assets, unpriced)
+
+
+def value_portfolio(
+    balances: Mapping[str, float],
+    quote: str,
+    prices: Optional[Mapping[str, float]] = None,
+    via: Sequence[str] = DEFAULT_VIA,
+    fallback_rates: Optional[Mapping[str, float]] = None,
+    requested: Iterable[str] = (),
+    logger: Optional[logging.Logger] = None,
+) -> Valuation:
+    """
+    Value every balance in quote. prices are pair prices from an earlier batched
+    request for the symbols in requested (see candidate_symbols / fetch_ticker_prices);
+    non-zero balances they cannot price trigger one more batched request for just
+    their candidate pairs not asked for yet. Anything still unpriced uses
+    fallback_rates (route "fallback") when given.
+    """
+    prices = dict(prices or {})
+    rates = {c: conversion_rate(c, quote, prices, via) for c in balances}
+    missing = [c for c, (rate, _) in rates.items() if rate is None and balances[c]]
+    if missing:
+        asked = set(requested) | set(prices)
+        symbols = [s for s in candidate_symbols(missing, quote, via) if s not in asked]
+        extra = fetch_ticker_prices(symbols, logger)
+        if extra:
+            prices.update(extra)
+            for c in missing:
+                rates[c] = conversion_rate(c, quote, prices, via)
+    for c, rate in (fallback_rates or {}).items():
+        if c in rates and rates[c][0] is None and rate and rate > 0:
+            rates[c] = (rate, "fallback")
+    return value_assets(balances, rates, quote)
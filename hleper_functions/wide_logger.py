@@ -1,31 +1,234 @@
 import json
 import logging
 import os
+import queue
 import sys
+import threading
 import time
-from typing import Any, Optional
+from typing import Any, List, Optional, TextIO
 
+from hleper_functions.log_rotation import rotating_log_from_env
 
-def setup_logger(log_path: Optional[str] = None) -> logging.Logger:
+try:
+    import orjson
+except ImportError:  # optional: faster encoder for the async writer
+    orjson = None
+
+# Set by setup_logger() in async mode only, so the default sync mode keeps the
+# json module's line format byte for byte
+_use_orjson = False
+
+
+def _dumps(payload: dict) -> str:
+    """
+    Encode an event as one JSON line. In async mode orjson is used when installed
+    (compact separators), falling back to json for anything orjson cannot encode.
+    """
+    if _use_orjson and orjson is not None:
+        try:
+            return orjson.dumps(payload).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(payload, ensure_ascii=False)
+
+
+class _FlushRequest:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class BatchingHandler(logging.Handler):
+    """
+    Queue-backed handler: emit() only formats and enqueues, a background thread writes
+    the lines to every stream in batches (batch_size lines or flush_interval_s,
+    whichever comes first). When the queue is full, records below WARNING are dropped
+    and counted; WARNING and above wait up to block_timeout_s for room. The number of
+    dropped records is written as a `log_events_dropped` event with the next batch.
+    flush()/close() drain the queue; logging.shutdown() calls both at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        streams: List[TextIO],
+        queue_size: int = 10000,
+        batch_size: int = 256,
+        flush_interval_s: float = 0.2,
+        block_timeout_s: float = 1.0,
+        owned_streams: Optional[List[TextIO]] = None,
+    ) -> None:
+        super().__init__()
+        self.streams = streams
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_s = flush_interval_s
+        self.block_timeout_s = block_timeout_s
+        self.dropped_total = 0
+        self._dropped_pending = 0
+        self._drop_lock = threading.Lock()
+        self._owned_streams = owned_streams or []
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="wide_logger_writer", daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        if self._closed:
+            self._write([line])
+            return
+        try:
+            if record.levelno >= logging.WARNING:
+                self._queue.put(line, timeout=self.block_timeout_s)
+            else:
+                self._queue.put_nowait(line)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped_total += 1
+                self._dropped_pending += 1
+
+    def flush(self) -> None:
+        if self._closed or not self._thread.is_alive():
+            return
+        request = _FlushRequest()
+        self._queue.put(request)
+        request.done.wait(5.0)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            if self._thread.is_alive():
+                self._queue.put(_STOP)
+                self._thread.join(5.0)
+            for stream in self._owned_streams:
+                try:
+                    stream.close()
+                except Exception:
+                    pass
+        super().close()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: List[str] = []
+            deadline = time.monotonic() + self.flush_interval_s
+            while True:
+                if item is _STOP or isinstance(item, _FlushRequest):
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    item = None
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    item = None
+                    break
+            self._write(batch)
+            if isinstance(item, _FlushRequest):
+                item.done.set()
+            elif item is _STOP:
+                # Anything enqueued after the stop marker (late emits) still gets written
+                rest = []
+                while True:
+                    try:
+                        extra = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(extra, _FlushRequest):
+                        extra.done.set()
+                    elif extra is not _STOP:
+                        rest.append(extra)
+                self._write(rest)
+                return
+
+    def _write(self, lines: List[str]) -> None:
+        with self._drop_lock:
+            dropped, self._dropped_pending = self._dropped_pending, 0
+            dropped_total = self.dropped_total
+        if dropped:
+            lines = lines + [
+                _dumps(
+                    {
+                        "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                        "level": "WARNING",
+                        "event": "log_events_dropped",
+                        "dropped": dropped,
+                        "dropped_total": dropped_total,
+                    }
+                )
+            ]
+        if not lines:
+            return
+        data = "\n".join(lines) + "\n"
+        for stream in self.streams:
+            try:
+                stream.write(data)
+                stream.flush()
+            except Exception:
+                pass
+
+
+class _RotatingFileHandler(logging.StreamHandler):
+    """StreamHandler that owns its RotatingLogFile and closes it with the handler."""
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            self.stream.close()
+        finally:
+            self.release()
+        super().close()
+
+
+def setup_logger(log_path: Optional[str] = None, async_mode: Optional[bool] = None) -> logging.Logger:
     """
     Configure a logger that emits structured JSON messages.
-    Always logs to console, and optionally to a file if log_path is provided.
+    Always logs to console, and optionally to a file if log_path is provided; the
+    file rotates and old segments are compressed per HB_LOG_ROTATE_* (log_rotation.py).
+    With async_mode (default: HB_LOG_ASYNC=1) both go through one BatchingHandler,
+    and events are encoded with orjson when it is installed.
     """
+    global _use_orjson
     logger = logging.getLogger("hb_monitor")
     if not logger.handlers:
         logger.setLevel(logging.INFO)
         formatter = logging.Formatter("%(message)s")
+        if async_mode is None:
+            async_mode = os.environ.get("HB_LOG_ASYNC", "0").strip().lower() in ("1", "true", "yes")
+
+        if async_mode:
+            _use_orjson = True
+            streams: List[TextIO] = [sys.stdout]
+            owned: List[TextIO] = []
+            if log_path:
+                owned.append(rotating_log_from_env(log_path))
+                streams.extend(owned)
+            handler = BatchingHandler(
+                streams,
+                queue_size=int(os.environ.get("HB_LOG_QUEUE_SIZE", "10000")),
+                batch_size=int(os.environ.get("HB_LOG_BATCH_SIZE", "256")),
+                flush_interval_s=float(os.environ.get("HB_LOG_FLUSH_INTERVAL_S", "0.2")),
+                owned_streams=owned,
+            )
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+            logger.propagate = False
+            return logger
 
         # 1. Always add Console Handler
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(formatter)
         logger.addHandler(console_handler)
 
-        # 2. Optionally add File Handler
+        # 2. Optionally add File Handler (rotating, see log_rotation.py)
         if log_path:
-            full_path = os.path.expanduser(log_path)
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
-            file_handler = logging.FileHandler(full_path, encoding="utf-8")
+            file_handler = _RotatingFileHandler(rotating_log_from_env(log_path))
             file_handler.setFormatter(formatter)
             logger.addHandler(file_handler)
 
@@ -33,9 +236,19 @@ def setup_logger(log_path: Optional[str] = None) -> logging.Logger:
     return logger
 
 
+def bind_logger(logger: logging.Logger, **fields: Any) -> logging.LoggerAdapter:
+    """
+    Logger that adds fields (e.g. symbol=...) to every event sent through log_event().
+    """
+    if isinstance(logger, logging.LoggerAdapter):
+        return logging.LoggerAdapter(logger.logger, {**logger.extra, **fields})
+    return logging.LoggerAdapter(logger, fields)
+
+
 def log_event(logger: logging.Logger, level: str, event: str, **fields: Any) -> None:
     """
     Emit a single-line JSON event with consistent fields for observability.
+    Fields bound with bind_logger() come first; explicit fields win on conflict.
     """
     level_map = {
         "DEBUG": logging.DEBUG,
@@ -44,12 +257,14 @@ def log_event(logger: logging.Logger, level: str, event: str, **fields: Any) ->
         "ERROR": logging.ERROR,
         "CRITICAL": logging.CRITICAL,
     }
+    levelno = level_map.get(level.upper(), logging.INFO)
+    if not logger.isEnabledFor(levelno):
+        return
     payload = {
         "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
         "level": level.upper(),
         "event": event,
+        **(logger.extra if isinstance(logger, logging.LoggerAdapter) else {}),
         **fields,
     }
-    logger.log(level_map.get(level.upper(), logging.INFO), json.dumps(payload, ensure_ascii=False))
-
-
+    logger.log(levelno, _dumps(payload))
@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from hleper_functions.log_index import (
+    BREACH_EVENTS,
+    INDEXED_FIELDS,
+    LogIndex,
+    bucket_edges,
+    parse_time,
+    summarize,
+)
+from hleper_functions.log_rotation import log_segments, read_manifest
+
+DEFAULT_LOGS = (
+    os.environ.get("STATUS_LOG_FILE", "~/hummingbot_master/logs/status.log"),
+    os.environ.get("SPREAD_EVENT_LOG_FILE", "~/hummingbot_master/logs/spread_log_monitor.log"),
+)
+_BUCKETS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Query the JSON event logs through an incremental sidecar index"
+    )
+    parser.add_argument("logs", nargs="*", help="log files (default: STATUS_LOG_FILE and SPREAD_EVENT_LOG_FILE)")
+    parser.add_argument("--since", help="start: 7d / 12h / 30m ago, an ISO date or timestamp, or epoch seconds")
+    parser.add_argument("--until", help="end (exclusive), same formats (default: now)")
+    parser.add_argument("--event", action="append", help="only these events (repeatable), e.g. strategy_status")
+    parser.add_argument("--symbol", help="only events carrying this symbol")
+    parser.add_argument(
+        "--field",
+        action="append",
+        choices=INDEXED_FIELDS,
+        metavar="FIELD",
+        help=f"aggregate this field (repeatable): {', '.join(INDEXED_FIELDS)}",
+    )
+    parser.add_argument("--percentiles", default="50,90,99", help="percentiles for --field (default 50,90,99)")
+    parser.add_argument("--bucket", choices=sorted(_BUCKETS), help="split the results per minute/hour/day/week")
+    parser.add_argument("--lines", type=int, default=0, metavar="N", help="also print the last N matching raw lines")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    return parser.parse_args(argv)
+
+
+def query(
+    indexes: List[LogIndex],
+    since: Optional[float],
+    until: float,
+    events: Optional[List[str]],
+    symbol: Optional[str],
+    fields: List[str],
+    percentiles: List[float],
+    bucket_s: Optional[int],
+) -> List[Dict[str, Any]]:
+    """
+    Event counts, breach count and field aggregates per time bucket, from the index only.
+    """
+    selected = [(index, index.select(since, until, events, symbol)) for index in indexes]
+    if since is None:
+        firsts = [recs["ts"][~np.isnan(recs["ts"])].min() for _, recs in selected if len(recs)]
+        since = float(min(firsts)) if firsts else until
+    rows = []
+    for lo, hi in bucket_edges(since, until, bucket_s):
+        counts: Dict[str, int] = {}
+        values: Dict[str, List[np.ndarray]] = {name: [] for name in fields}
+        for index, recs in selected:
+            part = recs[(recs["ts"] >= lo) & (recs["ts"] < hi)]
+            codes, n = np.unique(part["event"], return_counts=True)
+            for code, count in zip(codes.tolist(), n.tolist()):
+                name = index.event_name(code)
+                counts[name] = counts.get(name, 0) + count
+            for name in fields:
+                values[name].append(part[name])
+        row: Dict[str, Any] = {
+            "from": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(lo)),
+            "to": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(hi)),
+            "events": dict(sorted(counts.items())),
+            "breaches": sum(counts.get(name, 0) for name in BREACH_EVENTS),
+        }
+        if fields:
+            row["fields"] = {
+                name: summarize(np.concatenate(values[name]) if values[name] else np.zeros(0), percentiles)
+                for name in fields
+            }
+        rows.append(row)
+    return rows
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.6g}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        now = time.time()
+        since = parse_time(args.since, now)
+        until = parse_time(args.until, now) if args.until else now
+        percentiles = [float(p) for p in args.percentiles.split(",") if p.strip()]
+        paths = args.logs or [p for p in DEFAULT_LOGS if log_segments(p)]
+        missing = [p for p in paths if not log_segments(p)]
+        if not paths or missing:
+            print(f"log file not found: {', '.join(missing)}" if missing else "no log files found", file=sys.stderr)
+            return 1
+        indexes = []
+        index_info = []
+        for path in paths:
+            # Rotated segments outside [since, until) are skipped using the manifest's time ranges
+            segments = log_segments(path, since, until)
+            t0 = time.perf_counter()
+            added = lines_total = 0
+            for segment in segments:
+                index = LogIndex(segment)
+                added += index.update()
+                lines_total += index.meta["records"]
+                indexes.append(index)
+            index_info.append(
+                {"log": os.path.expanduser(path), "segments": len(segments),
+                 "segments_skipped": len(read_manifest(path)["segments"]) + 1 - len(segments),
+                 "new_lines": added, "lines": lines_total,
+                 "index_ms": round((time.perf_counter() - t0) * 1000.0, 3)}
+            )
+        t0 = time.perf_counter()
+        rows = query(indexes, since, until, args.event, args.symbol, args.field or [], percentiles,
+                     _BUCKETS.get(args.bucket) if args.bucket else None)
+        query_ms = round((time.perf_counter() - t0) * 1000.0, 3)
+        lines: List[str] = []
+        if args.lines:
+            for index in indexes:
+                recs = index.select(since, until, args.event, args.symbol)
+                lines.extend(index.lines(recs[-args.lines:]))
+            lines = lines[-args.lines:] if len(indexes) == 1 else sorted(lines)[-args.lines:]
+    except Exception as e:
+        print(f"log query failed: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps({"indexes": index_info, "query_ms": query_ms, "results": rows, "lines": lines}, indent=2))
+        return 0
+    for info in index_info:
+        print(
+            f"{info['log']}: {info['lines']} lines indexed in {info['segments']} file(s), "
+            f"{info['segments_skipped']} skipped (+{info['new_lines']} new, {info['index_ms']:.1f} ms)"
+        )
+    print(f"query: {query_ms:.1f} ms")
+    for row in rows:
+        events = " ".join(f"{name}={count}" for name, count in row["events"].items()) or "-"
+        print(f"{row['from']} .. {row['to']}  breaches={row['breaches']}  {events}")
+        for name, stats in row.get("fields", {}).items():
+            detail = "  ".join(f"{k}={_fmt(v)}" for k, v in stats.items() if k != "count")
+            print(f"    {name}: count={stats['count']}  {detail}")
+    for line in lines:
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
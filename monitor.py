@@ -1,21 +1,26 @@
+import logging
 import os
 import sys
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
 from hleper_functions.wide_logger import setup_logger, log_event
-from hleper_functions.helper_function import atomic_write_state
-from hleper_functions.helper_functions_spread import (
-    run_list_command,
-    parse_orders_from_text,
-    split_filter_sort_orders,
-    compute_spread_percent_mid,
-)
+from hleper_functions.balance_cache import BalanceReading
+from hleper_functions.helper_function import atomic_write_state, run_stages_concurrently
+from hleper_functions.market_book import MarketBookFeed, start_market_book
+from hleper_functions.markets import symbol_currencies
+from hleper_functions.metrics import FAILURES, RETRIES, RUNS, flush_metrics, observe_ms, setup_metrics, span
+from hleper_functions.order_book import OrderBook
+from hleper_functions.order_diff import OrderTracker, snapshot_rows
+from hleper_functions.order_feed import OrderFeed, start_order_feed
+from hleper_functions.order_source import build_order_book, load_open_orders
+from hleper_functions.orders import Orders
+from hleper_functions.timeseries_store import open_series_store
+from hleper_functions.valuation import DEFAULT_VIA, candidate_symbols, fetch_ticker_prices, value_portfolio
 from hleper_functions.helper_functions_monitor import (
     calculate_mid_price,
-    calculate_liquidity,
+    depth_profile,
     read_assets_state,
-    fetch_inventory,
-    calculate_asset_metrics,
-    fetch_ticker_price,
+    read_inventory,
 )
 
 def get_env_config() -> Dict[str, Any]:
@@ -24,11 +29,37 @@ def get_env_config() -> Dict[str, Any]:
     """
     status_log_file = os.environ.get("STATUS_LOG_FILE", "~/hummingbot_master/logs/status.log")
     assets_state_file = os.environ.get("ASSETS_STATE_FILE", "~/hummingbot_master/states/assets.state")
-    list_cmd = os.environ.get("HB_LIST_CMD", "bitfinex-maker-kit list --symbol tPNKUSD")
+    symbol = os.environ.get("HB_SYMBOL", "tPNKUSD")
+    list_cmd = os.environ.get("HB_LIST_CMD", f"bitfinex-maker-kit list --symbol {symbol}")
     min_amount = float(os.environ.get("HB_MIN_ORDER_AMOUNT", "0"))
     timeout_s = int(os.environ.get("HB_CMD_TIMEOUT", "60"))
     api_key = os.environ.get("BITFINEX_API_KEY", "")
     api_secret = os.environ.get("BITFINEX_API_SECRET", "")
+    series_file = os.environ.get("HB_SERIES_FILE", "")
+    series_capacity = int(os.environ.get("HB_SERIES_CAPACITY", "200000"))
+    order_source = os.environ.get("HB_ORDER_SOURCE", "cli").strip().lower()
+    list_format = os.environ.get("HB_LIST_FORMAT", "table").strip().lower()
+    snapshot_file = os.environ.get("HB_SNAPSHOT_FILE", "")
+    snapshot_max_age_s = float(os.environ.get("HB_SNAPSHOT_MAX_AGE_S", "5"))
+    ws_host = os.environ.get("HB_WS_HOST", "wss://api.bitfinex.com/ws/2")
+    ws_ready_timeout_s = float(os.environ.get("HB_WS_READY_TIMEOUT_S", "5"))
+    ws_max_age_s = float(os.environ.get("HB_WS_MAX_AGE_S", "30"))
+    depth_bands = [float(b) for b in os.environ.get("HB_DEPTH_BANDS", "0.5,1,2,5,10").split(",") if b.strip()]
+    depth_curve_step_pct = float(os.environ.get("HB_DEPTH_CURVE_STEP_PCT", "0.25"))
+    # Per-stage deadlines (seconds from cycle start); the orders stage includes its retry
+    orders_deadline_s = float(os.environ.get("HB_ORDERS_DEADLINE_S", str(2 * timeout_s)))
+    rest_deadline_s = float(os.environ.get("HB_REST_DEADLINE_S", "15"))
+    metrics_port = int(os.environ.get("HB_METRICS_PORT", "0") or 0)
+    metrics_textfile_dir = os.environ.get("HB_METRICS_TEXTFILE_DIR", "")
+    order_state_file = os.environ.get("HB_ORDER_STATE_FILE", "")
+    order_snapshot_interval_s = float(os.environ.get("HB_ORDER_SNAPSHOT_INTERVAL_S", "3600"))
+    balance_cache_file = os.environ.get("HB_BALANCE_CACHE_FILE", "")
+    balance_max_age_s = float(os.environ.get("HB_BALANCE_MAX_AGE_S", "30"))
+    market_book = os.environ.get("HB_MARKET_BOOK", "0").strip().lower() in ("1", "true", "yes")
+    pub_ws_host = os.environ.get("HB_PUB_WS_HOST", "wss://api-pub.bitfinex.com/ws/2")
+    market_book_len = int(os.environ.get("HB_MARKET_BOOK_LEN", "25"))
+    market_book_levels = int(os.environ.get("HB_MARKET_BOOK_LEVELS", "5"))
+    valuation_via = [c.strip().upper() for c in os.environ.get("HB_VALUATION_VIA", ",".join(DEFAULT_VIA)).split(",") if c.strip()]
     
     return {
         "status_log_file": status_log_file,
@@ -38,130 +69,384 @@ def get_env_config() -> Dict[str, Any]:
         "timeout_s": timeout_s,
         "api_key": api_key,
         "api_secret": api_secret,
+        "series_file": series_file,
+        "series_capacity": series_capacity,
+        "symbol": symbol,
+        "order_source": order_source,
+        "list_format": list_format,
+        "snapshot_file": snapshot_file,
+        "snapshot_max_age_s": snapshot_max_age_s,
+        "ws_host": ws_host,
+        "ws_ready_timeout_s": ws_ready_timeout_s,
+        "ws_max_age_s": ws_max_age_s,
+        "depth_bands": depth_bands,
+        "depth_curve_step_pct": depth_curve_step_pct,
+        "orders_deadline_s": orders_deadline_s,
+        "rest_deadline_s": rest_deadline_s,
+        "metrics_port": metrics_port,
+        "metrics_textfile_dir": metrics_textfile_dir,
+        "order_state_file": order_state_file,
+        "order_snapshot_interval_s": order_snapshot_interval_s,
+        "balance_cache_file": balance_cache_file,
+        "balance_max_age_s": balance_max_age_s,
+        "market_book": market_book,
+        "pub_ws_host": pub_ws_host,
+        "market_book_len": market_book_len,
+        "market_book_levels": market_book_levels,
+        "valuation_via": valuation_via,
     }
 
-def main() -> int:
-    cfg = get_env_config()
-    status_log_file = cfg["status_log_file"]
+def fetch_book(cfg: Dict[str, Any], feed: Optional[OrderFeed] = None) -> Tuple[int, Union[List[dict], Orders], str, str, OrderBook]:
+    """
+    Load open orders and build the min-amount filtered book, retrying once when
+    either side of the book is empty. Returns (rc, orders, stderr, source, book).
+    """
+    rc, orders, stderr, order_source = load_open_orders(cfg, feed)
+    if rc != 0:
+        return rc, orders, stderr, order_source, OrderBook(cfg["min_amount"])
+    book = build_order_book(cfg, orders, order_source, cfg["min_amount"], feed)
+    if book.best_bid is None or book.best_ask is None:
+        RETRIES.inc(stage="orders")
+        retry_rc, retry_orders, retry_stderr, retry_source = load_open_orders(cfg, feed)
+        if retry_rc == 0:
+            orders, stderr, order_source = retry_orders, retry_stderr, retry_source
+            book = build_order_book(cfg, orders, order_source, cfg["min_amount"], feed)
+    return 0, orders, stderr, order_source, book
+
+def track_order_changes(
+    cfg: Dict[str, Any], logger: logging.Logger, orders: Union[List[dict], Orders]
+) -> Dict[str, int]:
+    """
+    Diff the open orders against the previous run by order id. Changes are logged as
+    one compact orders_delta event (nothing on a quiet book), plus an orders_snapshot
+    with every order each order_snapshot_interval_s. Returns the change counts.
+    """
+    if not cfg["order_state_file"]:
+        return {}
+    try:
+        with span("order_diff"):
+            update = OrderTracker(cfg["order_state_file"], cfg["order_snapshot_interval_s"]).update(orders)
+    except Exception as e:
+        FAILURES.inc(stage="order_diff")
+        log_event(logger, "WARNING", "order_diff_failed", error=str(e), state_file=cfg["order_state_file"])
+        return {}
+    diff = update.diff
+    if update.snapshot:
+        log_event(
+            logger, "INFO", "orders_snapshot", symbol=cfg["symbol"], seq=update.seq, count=len(orders), orders=snapshot_rows(orders)
+        )
+    elif diff.changes:
+        log_event(
+            logger, "INFO", "orders_delta", symbol=cfg["symbol"], seq=update.seq, prev_seq=update.prev_seq, **diff.counts(), **diff.compact()
+        )
+    return diff.counts() if update.prev_seq is not None else {}
+
+def inventory_readings(
+    inventory: Dict[str, Optional[BalanceReading]], prev_state: Dict[str, Any], fields: Dict[str, str]
+) -> Dict[str, Optional[BalanceReading]]:
+    """
+    Fill currencies the inventory stage could not read from the previous asset
+    state (source "state", with the as-of time saved there), keyed by state field.
+    Fields with no reading anywhere stay None rather than reading as 0.
+    """
+    readings: Dict[str, Optional[BalanceReading]] = {}
+    for field, currency in fields.items():
+        reading = inventory.get(currency)
+        if reading is None and prev_state.get(field) is not None and prev_state.get("inventory_as_of") is not None:
+            reading = BalanceReading(float(prev_state[field]), float(prev_state["inventory_as_of"]), "state")
+        readings[field] = reading
+    return readings
+
+
+def ticker_symbols(cfg: Dict[str, Any], prev_state: Dict[str, Any], base: str, quote: str) -> List[str]:
+    """
+    Pairs for the cycle's one batched tickers request: every route to the quote for
+    the traded pair's currencies and those held at the last cycle (prev_state's
+    assets). A wallet that appeared since costs one follow-up request in value_portfolio.
+    """
+    held = prev_state.get("assets") or {}
+    return candidate_symbols(sorted({base, quote, *held}), quote, cfg["valuation_via"])
+
+
+def market_book_status(
+    cfg: Dict[str, Any], logger: logging.Logger, market: Optional[MarketBookFeed], book: OrderBook, bands: List[float]
+) -> Dict[str, Any]:
+    """
+    strategy_status fields from the public market book: market_spread_percent plus
+    a market_book object (spread, band depth, our share of the best levels). The
+    feed was started with the cycle; it gets up to ws_ready_timeout_s to be ready.
+    """
+    if market is None:
+        return {}
+    if not market.wait_ready(cfg["ws_ready_timeout_s"]):
+        FAILURES.inc(stage="market_book")
+        log_event(logger, "WARNING", "market_book_not_ready", symbol=cfg["symbol"], host=cfg["pub_ws_host"])
+        return {}
+    with span("market_book"):
+        market_book = market.metrics(book, bands, cfg["market_book_levels"])
+    return {"market_spread_percent": market_book["spread_percent"], "market_book": market_book}
+
+def run_monitor_cycle(
+    cfg: Dict[str, Any],
+    logger: logging.Logger,
+    feed: Optional[OrderFeed] = None,
+    market: Optional[MarketBookFeed] = None,
+) -> int:
+    """
+    One status cycle: fetch everything, compute the metrics, write the state and
+    log strategy_status. Returns the exit status.
+    """
     assets_state_file = cfg["assets_state_file"]
     list_cmd = cfg["list_cmd"]
-    min_amount = cfg["min_amount"]
-    timeout_s = cfg["timeout_s"]
     api_key = cfg["api_key"]
     api_secret = cfg["api_secret"]
-    
-    try:
-        # Initialize wide_logger with the status log file from env
-        logger = setup_logger(status_log_file)
-        
-        # 1. Fetch current open orders using the configured list command
-        rc, stdout, stderr = run_list_command(list_cmd, timeout_s)
-        if rc != 0:
+    # Base/quote of the traded pair; the state keeps its pnk_/usd_ field names
+    base, quote = symbol_currencies(cfg["symbol"])
+    cycle_t0 = time.perf_counter()
+
+    # The previous asset state is a small local file, read once up front: the
+    # tickers stage needs the currencies it holds
+    prev_t0 = time.perf_counter()
+    prev_state = read_assets_state(assets_state_file)
+    prev_state_ms = round((time.perf_counter() - prev_t0) * 1000.0, 3)
+    symbols = ticker_symbols(cfg, prev_state, base, quote)
+
+    # 1. Run the network-bound stages concurrently, each against its own deadline:
+    # open orders (with one retry), inventory (every exchange wallet) and one
+    # batched tickers request
+    stages = run_stages_concurrently(
+        {
+            "orders": lambda: fetch_book(cfg, feed),
+            "inventory": lambda: read_inventory(
+                api_key,
+                api_secret,
+                (base, quote),
+                cache_file=cfg["balance_cache_file"],
+                cache_max_age_s=cfg["balance_max_age_s"],
+                logger=logger,
+                all_wallets=True,
+            ),
+            "tickers": lambda: fetch_ticker_prices(symbols, logger=logger),
+        },
+        {
+            "orders": cfg["orders_deadline_s"],
+            "inventory": cfg["rest_deadline_s"],
+            "tickers": cfg["rest_deadline_s"],
+        },
+    )
+    stage_ms = {"prev_state": prev_state_ms, **{name: result.duration_ms for name, result in stages.items()}}
+    observe_ms("prev_state", prev_state_ms)
+    for name, result in stages.items():
+        observe_ms(name, result.duration_ms)
+        if not result.ok:
+            FAILURES.inc(stage=name)
             log_event(
-                logger, 
-                "ERROR", 
-                "fetch_orders_failed", 
-                rc=rc, 
-                stderr=stderr, 
-                cmd=list_cmd
+                logger,
+                "ERROR",
+                "stage_failed",
+                stage=name,
+                error=result.error,
+                timed_out=result.timed_out,
+                duration_ms=result.duration_ms,
             )
-            return 1
-            
-        # 2. Parse orders and filter by minimum amount
-        orders = parse_orders_from_text(stdout)
-        buy_prices, sell_prices = split_filter_sort_orders(orders, min_amount)
-        
-        # 3. Get best bid and ask to calculate spread and mid price
-        best_bid = buy_prices[0] if buy_prices else None
-        best_ask = sell_prices[0] if sell_prices else None
-
-        # Retry once if best_bid or best_ask are empty
-        if best_bid is None or best_ask is None:
-            rc, stdout, stderr = run_list_command(list_cmd, timeout_s)
-            if rc == 0:
-                orders = parse_orders_from_text(stdout)
-                buy_prices, sell_prices = split_filter_sort_orders(orders, min_amount)
-                best_bid = buy_prices[0] if buy_prices else None
-                best_ask = sell_prices[0] if sell_prices else None
-            
-            # If still empty after retry, log warning and return
-            if best_bid is None or best_ask is None:
-                log_event(
-                    logger,
-                    "WARNING",
-                    "missing_best_prices_after_retry",
-                    best_bid=best_bid,
-                    best_ask=best_ask,
-                    cmd=list_cmd
-                )
-                return 0  # Returning 0 to avoid triggering error alerts, but stopping execution for this cycle
-        
-        # 4. Calculate spread percentage
-        spread_percent = compute_spread_percent_mid(best_bid, best_ask)
-        
-        # 5. Calculate mid price (average of best bid and best ask)
-        mid_price = calculate_mid_price(best_bid, best_ask)
-        
-        # 6. Calculate total liquidity in USD within ±2% of mid price
-        bid_liq_usd_2pct, ask_liq_usd_2pct = calculate_liquidity(orders, mid_price, 2.0)
 
-        # 7. Asset and Inventory Tracking
-        # Read previous state
-        prev_state = read_assets_state(assets_state_file)
-        
-        # Fetch current inventory from Bitfinex
-        inventory = fetch_inventory(api_key, api_secret, logger=logger)
-        pnk_amount = inventory["PNK"]
-        usd_amount = inventory["USD"]
-        
-        # Fetch current PNK price from Bitfinex API
-        pnk_price = fetch_ticker_price("tPNKUSD", logger=logger)
-        # Use mid_price as fallback if ticker fetch fails
-        if pnk_price <= 0:
-            pnk_price = mid_price
-            
-        # Calculate current metrics using PNK price from API instead of local mid_price
-        metrics = calculate_asset_metrics(pnk_amount, usd_amount, pnk_price)
-        
-        # Update assets state file
-        new_state = {
-            "mid_price": mid_price,
-            "pnk_price": pnk_price,
-            "pnk_amount": pnk_amount,
-            "usd_amount": usd_amount,
-            "total_value": metrics["total_value"]
-        }
-        atomic_write_state(assets_state_file, new_state)
+    orders_stage = stages["orders"]
+    if not orders_stage.ok:
+        return 1
+    rc, orders, stderr, order_source, book = orders_stage.value
+    if rc != 0:
+        FAILURES.inc(stage="list_orders")
+        log_event(
+            logger, 
+            "ERROR", 
+            "fetch_orders_failed", 
+            rc=rc, 
+            stderr=stderr, 
+            cmd=list_cmd
+        )
+        return 1
+
+    # Order churn since the previous run (compact delta events)
+    order_changes = track_order_changes(cfg, logger, orders)
         
-        # 8. Log the status report with all metrics for dashboards/alerts
+    # 2./3. Best bid and ask of the min-amount filtered book
+    best_bid = book.best_bid
+    best_ask = book.best_ask
+
+    # If still empty after the retry, log warning and return
+    if best_bid is None or best_ask is None:
         log_event(
             logger,
-            "INFO",
-            "strategy_status",
+            "WARNING",
+            "missing_best_prices_after_retry",
             best_bid=best_bid,
             best_ask=best_ask,
-            mid_price=mid_price,
-            pnk_price=pnk_price,
-            spread_percent=spread_percent,
-            bid_liquidity_usd_2pct=bid_liq_usd_2pct,
-            ask_liquidity_usd_2pct=ask_liq_usd_2pct,
-            buys_count=len(buy_prices),
-            sells_count=len(sell_prices),
-            # Asset metrics
-            pnk_amount=pnk_amount,
-            usd_amount=usd_amount,
-            total_value=metrics["total_value"],
-            pnk_proportion=f"{metrics['pnk_proportion']:.2f}",
-            usd_proportion=f"{metrics['usd_proportion']:.2f}",
-            # Previous state for comparison (optional but helpful for dashboards)
-            prev_total_value=prev_state.get("total_value")
+            cmd=list_cmd
         )
-        
-        return 0
+        return 0  # Returning 0 to avoid triggering error alerts, but stopping execution for this cycle
+    
+    # 4. Calculate spread percentage
+    spread_percent = book.spread_percent()
+    
+    # 5. Calculate mid price (average of best bid and best ask)
+    mid_price = calculate_mid_price(best_bid, best_ask)
+    
+    # 6. Depth profile (USD notional) within every configured band of mid price;
+    # the ±2% band is always included for the existing liquidity fields
+    bands = sorted(set(cfg["depth_bands"]) | {2.0})
+    with span("depth_profile"):
+        profile = depth_profile(orders, mid_price, bands, curve_step_pct=cfg["depth_curve_step_pct"] or None)
+    bid_liq_usd_2pct = profile["bid_usd"][bands.index(2.0)]
+    ask_liq_usd_2pct = profile["ask_usd"][bands.index(2.0)]
+
+    # Wider market around our orders (public book feed), when enabled
+    market_status = market_book_status(cfg, logger, market, book, bands)
+
+    # 7. Asset and Inventory Tracking (results of the concurrent stages)
+    
+    # Current inventory (balance cache or REST), else the last known balances; an
+    # amount is None only when it was never read, never 0 because a fetch failed
+    inventory = stages["inventory"].value if stages["inventory"].ok else {}
+    readings = inventory_readings(inventory, prev_state, {"pnk_amount": base, "usd_amount": quote})
+    pnk_amount = readings["pnk_amount"].amount if readings["pnk_amount"] else None
+    usd_amount = readings["usd_amount"].amount if readings["usd_amount"] else None
+    known = [r for r in readings.values() if r is not None]
+    inventory_as_of = min((r.as_of for r in known), default=None)
+    inventory_status = {
+        "inventory_source": ",".join(sorted({r.source for r in known})) or None,
+        "inventory_age_s": round(max(r.age_s for r in known), 3) if known else None,
+        "inventory_stale": len(known) < len(readings) or any(r.source in ("cache", "state") for r in known),
+    }
+    
+    # Every other wallet: this cycle's reading, else (inventory unreadable) the last
+    # known amount from the assets state
+    balances = {c: r.amount for c, r in inventory.items() if r is not None}
+    if not balances:
+        balances = {c: float(a["amount"]) for c, a in (prev_state.get("assets") or {}).items() if a.get("amount") is not None}
+    traded = {c: a for c, a in ((base, pnk_amount), (quote, usd_amount)) if a is not None}
+    balances = {**traded, **{c: a for c, a in balances.items() if c not in (base, quote)}}
+
+    # Value every balance in the quote from the batched tickers; the traded pair's
+    # price falls back to mid_price when no ticker priced it
+    prices = stages["tickers"].value if stages["tickers"].ok else None
+    with span("valuation"):
+        valuation = value_portfolio(
+            balances,
+            quote,
+            prices,
+            cfg["valuation_via"],
+            fallback_rates={base: mid_price},
+            requested=symbols,
+            logger=logger,
+        )
+    pnk_price = (valuation.assets.get(base) or {}).get("price") or mid_price
+
+    if pnk_amount is None or usd_amount is None:
+        metrics = {"total_value": None, "pnk_proportion": None, "usd_proportion": None}
+    else:
+        metrics = {
+            "total_value": valuation.total_value,
+            "pnk_proportion": valuation.assets[base]["proportion"],
+            "usd_proportion": valuation.assets[quote]["proportion"],
+        }
+    
+    # Update assets state file
+    new_state = {
+        "mid_price": mid_price,
+        "pnk_price": pnk_price,
+        "pnk_amount": pnk_amount,
+        "usd_amount": usd_amount,
+        "total_value": metrics["total_value"],
+        "inventory_as_of": inventory_as_of,
+        "valuation_quote": quote,
+        "assets": valuation.assets,
+    }
+    write_t0 = time.perf_counter()
+    with span("state_write"):
+        atomic_write_state(assets_state_file, new_state)
+    if cfg["series_file"]:
+        try:
+            with span("series_write"):
+                open_series_store(cfg["series_file"], cfg["series_capacity"]).append(
+                    "monitor",
+                    best_bid=best_bid,
+                    best_ask=best_ask,
+                    mid_price=mid_price,
+                    spread_percent=spread_percent,
+                    bid_liquidity_usd=bid_liq_usd_2pct,
+                    ask_liquidity_usd=ask_liq_usd_2pct,
+                    pnk_amount=pnk_amount,
+                    usd_amount=usd_amount,
+                    total_value=metrics["total_value"],
+                )
+        except Exception as e:
+            FAILURES.inc(stage="series_write")
+            log_event(logger, "WARNING", "series_write_failed", error=str(e), series_file=cfg["series_file"])
+    stage_ms["state_write"] = round((time.perf_counter() - write_t0) * 1000.0, 3)
+    
+    # 8. Log the status report with all metrics for dashboards/alerts
+    log_event(
+        logger,
+        "INFO",
+        "strategy_status",
+        symbol=cfg["symbol"],
+        best_bid=best_bid,
+        best_ask=best_ask,
+        mid_price=mid_price,
+        pnk_price=pnk_price,
+        spread_percent=spread_percent,
+        bid_liquidity_usd_2pct=bid_liq_usd_2pct,
+        ask_liquidity_usd_2pct=ask_liq_usd_2pct,
+        depth_profile=profile,
+        buys_count=book.bid_count,
+        sells_count=book.ask_count,
+        order_source=order_source,
+        **order_changes,
+        **market_status,
+        # Asset metrics
+        pnk_amount=pnk_amount,
+        usd_amount=usd_amount,
+        total_value=metrics["total_value"],
+        pnk_proportion=None if metrics["pnk_proportion"] is None else f"{metrics['pnk_proportion']:.2f}",
+        usd_proportion=None if metrics["usd_proportion"] is None else f"{metrics['usd_proportion']:.2f}",
+        assets=valuation.assets,
+        unpriced_assets=valuation.unpriced or None,
+        **inventory_status,
+        # Previous state for comparison (optional but helpful for dashboards)
+        prev_total_value=prev_state.get("total_value"),
+        # Where the cycle time went
+        stage_ms=stage_ms,
+        cycle_ms=round((time.perf_counter() - cycle_t0) * 1000.0, 3),
+    )
+
+    return 0
+
+def main() -> int:
+    cfg = get_env_config()
+    feed = None
+    market = None
+    
+    try:
+        # Initialize wide_logger with the status log file from env
+        logger = setup_logger(cfg["status_log_file"])
+        setup_metrics(cfg, "monitor")
+        # The market book connects while the order feed and cycle stages run
+        market = start_market_book(cfg, logger, wait=False)
+        feed = start_order_feed(cfg, logger)
+        with span("cycle"):
+            status = run_monitor_cycle(cfg, logger, feed, market)
+        RUNS.inc(status=status)
+        flush_metrics(cfg, "monitor")
+        return status
     except Exception as e:
         # Fallback print if logger setup or execution fails critically
         print(f"Critical error in monitor script: {e}", file=sys.stderr)
         return 1
+    finally:
+        if feed is not None:
+            feed.stop()
+        if market is not None:
+            market.stop()
 
 if __name__ == "__main__":
     sys.exit(main())
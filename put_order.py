@@ -1,6 +1,11 @@
+import argparse
+import json
 import os
-from decimal import Decimal, ROUND_DOWN
-from bfxapi import Client
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from hleper_functions.bfx_rest import MAX_MULTI_OPS, get_rest_session
+from hleper_functions.price_precision import format_price, format_prices
 from hleper_functions.wide_logger import setup_logger, log_event
 
 # Configuration: Update these with your Bitfinex API Key and Secret
@@ -9,59 +14,26 @@ from hleper_functions.wide_logger import setup_logger, log_event
 # export BITFINEX_API_SECRET='your_secret_here'
 API_KEY = os.getenv("BITFINEX_API_KEY", "YOUR_API_KEY")
 API_SECRET = os.getenv("BITFINEX_API_SECRET", "YOUR_API_SECRET")
+SYMBOL = os.getenv("HB_SYMBOL", "tPNKUSD")
 
 # Initialize wide logger
 logger = setup_logger()  # Standard stream handler for console output
 
 def get_bfx_client():
     """
-    Helper function to initialize the Bitfinex Client.
+    Helper function to get the shared (keep-alive) Bitfinex REST session.
     """
     if API_KEY == "YOUR_API_KEY" or API_SECRET == "YOUR_API_SECRET":
         log_event(logger, "WARNING", "api_key_not_set", msg="API_KEY or API_SECRET is not set correctly.")
     
-    return Client(
-        api_key=API_KEY,
-        api_secret=API_SECRET
-    )
+    return get_rest_session(API_KEY, API_SECRET)
 
 def format_bitfinex_price(price: float) -> str:
     """
     Formats the price according to Bitfinex's 5 significant digits rule.
-    Bitfinex truncates prices that exceed 5 significant digits.
+    Bitfinex truncates prices that exceed 5 significant digits (ROUND_DOWN).
     """
-    if price == 0:
-        return "0"
-    
-    # Use Decimal for precise handling
-    d_price = Decimal(str(price))
-    
-    # Calculate the number of digits before the decimal point
-    # log10 of the absolute value gives the magnitude
-    import math
-    magnitude = math.floor(math.log10(abs(float(d_price))))
-    
-    # Significant digits are counted from the first non-zero digit.
-    # We want 5 significant digits.
-    # The number of decimal places needed is (5 - 1 - magnitude)
-    decimals = 5 - 1 - magnitude
-    
-    # Bitfinex generally supports up to 5 significant digits.
-    # We use ROUND_DOWN to match Bitfinex's truncation behavior.
-    format_str = f"{{:.{max(0, decimals)}f}}"
-    formatted = format_str.format(d_price).rstrip('0').rstrip('.')
-    
-    # Double check significant digits count
-    sig_digits = len(formatted.replace('.', '').lstrip('0'))
-    if sig_digits > 5:
-        # If still over 5 (can happen with rounding), we need to truncate further
-        # This is a safe fallback
-        shift = 5 - sig_digits
-        # Implementation of truncation for significant digits is tricky with strings,
-        # but for Bitfinex 5 is the standard.
-        pass
-
-    return formatted
+    return format_price(price)
 
 def calculate_bfx_amount(amount: float, side: str) -> float:
     """
@@ -80,7 +52,7 @@ def calculate_bfx_amount(amount: float, side: str) -> float:
 
 def _execute_put_order(price: float, amount: float, side: str, symbol: str):
     """
-    Synchronous helper to submit the order using the bfxapi library.
+    Synchronous helper to submit the order over the shared REST session.
     """
     bfx = get_bfx_client()
     
@@ -97,11 +69,11 @@ def _execute_put_order(price: float, amount: float, side: str, symbol: str):
     try:
         # 'EXCHANGE LIMIT' is used for standard spot trading (no margin).
         # For margin trading, use 'LIMIT'.
-        response = bfx.rest.auth.submit_order(
+        response = bfx.submit_order(
+            type='EXCHANGE LIMIT',
             symbol=symbol,
-            price=formatted_price,
             amount=str(signed_amount),
-            type='EXCHANGE LIMIT'
+            price=formatted_price
         )
         # Convert response to string or dict if possible for logging
         log_event(logger, "INFO", "order_submission_success", 
@@ -114,7 +86,7 @@ def _execute_put_order(price: float, amount: float, side: str, symbol: str):
                   error=str(e))
         return None
 
-def put_order(price: float, amount: float, side: str, symbol: str = "tPNKUSD"):
+def put_order(price: float, amount: float, side: str, symbol: str = SYMBOL):
     """
     The main function to put an order on Bitfinex.
     
@@ -122,13 +94,169 @@ def put_order(price: float, amount: float, side: str, symbol: str = "tPNKUSD"):
     - price: The price at which to place the order.
     - amount: The quantity of the asset to buy or sell.
     - side: 'buy' or 'sell'.
-    - symbol: The trading pair symbol (default is 'tPNKUSD').
+    - symbol: The trading pair symbol (default: HB_SYMBOL, 'tPNKUSD').
     """
     return _execute_put_order(price, amount, side, symbol)
 
+def generate_ladder(start_price: float, step: float, count: int, size: float, side: str) -> List[Dict[str, Any]]:
+    """
+    count orders of size, starting at start_price and moving step away from the
+    market on every level: down for a buy ladder, up for a sell ladder.
+    """
+    direction = -1 if side.strip().lower() == "buy" else 1
+    calculate_bfx_amount(size, side)  # validates side
+    ladder = []
+    for i in range(count):
+        price = start_price + direction * i * abs(step)
+        if price <= 0:
+            raise ValueError(f"Ladder level {i} has a non-positive price ({price}); reduce --count or --step.")
+        ladder.append({"price": price, "amount": size, "side": side})
+    return ladder
+
+
+def load_ladder(path: str) -> List[Dict[str, Any]]:
+    """
+    Read a ladder file: a JSON list of {"price", "amount", "side"} objects, or one
+    `side,price,amount` line per order (blank lines and # comments are skipped).
+    """
+    with open(os.path.expanduser(path), "r", encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return [{"price": float(o["price"]), "amount": float(o["amount"]), "side": o["side"]} for o in json.loads(text)]
+    ladder = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            side, price, amount = [part.strip() for part in line.split(",")]
+            ladder.append({"price": float(price), "amount": float(amount), "side": side})
+    return ladder
+
+
+def put_ladder(
+    orders: Sequence[Dict[str, Any]],
+    symbol: str = SYMBOL,
+    batch_size: int = MAX_MULTI_OPS,
+    gid: Optional[int] = None,
+    dry_run: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Submit a whole ladder over one authenticated session, batch_size orders per
+    order/multi request. Each order is dict(price, amount, side). Returns one result
+    per order (index, side, price_sent, amount, ok, order_id, status, text).
+    """
+    batch_size = max(1, min(batch_size, MAX_MULTI_OPS))
+    ops = []
+    results: List[Dict[str, Any]] = []
+    prices_sent = format_prices([order["price"] for order in orders])
+    for i, (order, price_sent) in enumerate(zip(orders, prices_sent)):
+        if float(price_sent) <= 0:
+            raise ValueError(
+                f"Ladder level {i} price {order['price']} is sent as {price_sent!r}; nothing was submitted."
+            )
+        signed_amount = calculate_bfx_amount(order["amount"], order["side"])
+        fields = {"type": "EXCHANGE LIMIT", "symbol": symbol, "amount": str(signed_amount), "price": price_sent, "gid": gid}
+        ops.append(("on", fields))
+        results.append(
+            {"index": i, "side": order["side"].upper(), "price_sent": price_sent, "amount": signed_amount,
+             "ok": False, "order_id": None, "status": "NOT_SENT", "text": None}
+        )
+    batches = (len(ops) + batch_size - 1) // batch_size
+    log_event(logger, "INFO", "ladder_submission_start", symbol=symbol, orders=len(ops), batches=batches,
+              batch_size=batch_size, gid=gid, dry_run=dry_run)
+    if dry_run:
+        for result in results:
+            log_event(logger, "INFO", "ladder_order_planned", symbol=symbol, **result)
+        return results
+
+    bfx = get_bfx_client()
+    t0 = time.perf_counter()
+    # Batches go out one after another: Bitfinex rejects signed requests whose nonce
+    # arrives out of order, so overlapping them on one key gains nothing.
+    for b in range(batches):
+        lo, hi = b * batch_size, min((b + 1) * batch_size, len(ops))
+        tb = time.perf_counter()
+        try:
+            notification = bfx.order_multi(ops[lo:hi])
+            ops_done = notification.data or []
+            if notification.status != "SUCCESS" or not ops_done:
+                # The batch as a whole was rejected: every order in it carries the reason
+                for result in results[lo:hi]:
+                    result["status"] = notification.status or "ERROR"
+                    result["text"] = notification.text or "order/multi returned no per-order results"
+            for result, op in zip(results[lo:hi], ops_done):
+                result["status"] = op.status
+                result["text"] = op.text
+                result["ok"] = op.status == "SUCCESS"
+                result["order_id"] = getattr(op.data, "id", None)
+        except Exception as e:
+            for result in results[lo:hi]:
+                result["status"] = "ERROR"
+                result["text"] = str(e)
+        batch_ms = round((time.perf_counter() - tb) * 1000.0, 1)
+        for result in results[lo:hi]:
+            log_event(logger, "INFO" if result["ok"] else "ERROR", "ladder_order_result", symbol=symbol, **result)
+        ok = sum(1 for r in results[lo:hi] if r["ok"])
+        log_event(logger, "INFO", "ladder_batch_done", symbol=symbol, batch=b + 1, batches=batches,
+                  orders=hi - lo, ok=ok, failed=hi - lo - ok, batch_ms=batch_ms)
+
+    ok = sum(1 for r in results if r["ok"])
+    log_event(logger, "INFO" if ok == len(results) else "ERROR", "ladder_submission_end", symbol=symbol,
+              orders=len(results), ok=ok, failed=len(results) - ok, batches=batches,
+              duration_ms=round((time.perf_counter() - t0) * 1000.0, 1))
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Place one order or a whole ladder on Bitfinex (batched order/multi requests)"
+    )
+    parser.add_argument("--symbol", default=SYMBOL, help="trading pair (default: HB_SYMBOL)")
+    parser.add_argument(
+        "--order",
+        nargs=3,
+        action="append",
+        metavar=("SIDE", "PRICE", "AMOUNT"),
+        help="one order; repeat for an explicit ladder",
+    )
+    parser.add_argument("--ladder", help="ladder file: JSON list of {price, amount, side} or side,price,amount lines")
+    parser.add_argument("--side", choices=("buy", "sell"), help="side of a generated ladder")
+    parser.add_argument("--start-price", type=float, help="first level of a generated ladder")
+    parser.add_argument("--step", type=float, help="price distance between generated levels (away from the market)")
+    parser.add_argument("--count", type=int, help="number of generated levels")
+    parser.add_argument("--size", type=float, help="amount of every generated level")
+    parser.add_argument("--gid", type=int, default=None, help="group id for every order (cancel the ladder by gid)")
+    parser.add_argument("--batch-size", type=int, default=MAX_MULTI_OPS, help=f"orders per request (max {MAX_MULTI_OPS})")
+    parser.add_argument("--dry-run", action="store_true", help="log the formatted orders without sending them")
+    args = parser.parse_args(argv)
+    generated = (args.side, args.start_price, args.step, args.count, args.size)
+    if any(v is not None for v in generated) and any(v is None for v in generated):
+        parser.error("a generated ladder needs --side, --start-price, --step, --count and --size")
+    if not (args.order or args.ladder or args.side):
+        parser.error("nothing to place: give --order, --ladder or a generated ladder")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        orders: List[Dict[str, Any]] = []
+        for side, price, amount in args.order or []:
+            orders.append({"price": float(price), "amount": float(amount), "side": side})
+        if args.ladder:
+            orders.extend(load_ladder(args.ladder))
+        if args.side:
+            orders.extend(generate_ladder(args.start_price, args.step, args.count, args.size, args.side))
+        results = put_ladder(orders, args.symbol, args.batch_size, args.gid, args.dry_run)
+    except Exception as e:
+        log_event(logger, "ERROR", "ladder_failed", error=str(e))
+        return 1
+    if args.dry_run:
+        return 0
+    return 0 if all(r["ok"] for r in results) else 2
+
+
 if __name__ == "__main__":
-    # --- ONE-TIME COMMAND EXECUTION ---
-    # Example: Buy 1000 PNK at 0.0123
-    put_order(price=0.016390, amount=52, side='buy')
-    
-    log_event(logger, "INFO", "script_ready", msg="put_order.py has finished execution.")
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List, Optional
+
+from hleper_functions.helper_functions_spread import LIST_FORMATS
+from hleper_functions.spread_replay import (
+    SPREAD_EVENTS,
+    STATUS_EVENTS,
+    OrderFrames,
+    load_order_frames,
+    load_quote_frames,
+    run_sweep,
+    verify_against_reference,
+)
+
+
+def parse_grid(spec: str) -> List[float]:
+    """
+    "0.5,1,2" or an inclusive range "start:stop:step" (e.g. "0.25:3:0.25").
+    """
+    if ":" in spec:
+        start, stop, step = (float(part) for part in spec.split(":"))
+        if step <= 0:
+            raise ValueError(f"grid step must be positive: {spec}")
+        count = int(round((stop - start) / step)) + 1
+        return [round(start + i * step, 10) for i in range(max(0, count))]
+    return [float(part) for part in spec.split(",") if part.strip()]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Replay recorded order lists or spread events against a grid of kill-switch settings"
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--orders", nargs="+", metavar="PATH", help="recorded list outputs: files/directories (one frame per file, mtime = time) or *.jsonl frames")
+    source.add_argument("--events", nargs="+", metavar="LOG", help="JSON event logs (spread_ok / spread_threshold_breached)")
+    parser.add_argument("--list-format", choices=LIST_FORMATS, default=os.environ.get("HB_LIST_FORMAT", "table"), help="format of recorded list outputs")
+    parser.add_argument("--include-status", action="store_true", help="with --events, also replay monitor.py's strategy_status events")
+    parser.add_argument("--symbol", help="with --events, only this symbol's events")
+    parser.add_argument("--thresholds", default="0.25:5:0.25", help="spread %% thresholds: list or start:stop:step (default 0.25:5:0.25)")
+    parser.add_argument("--min-amounts", default="0", help="min order amounts (--orders only): list or start:stop:step")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: CPU count)")
+    parser.add_argument("--top", type=int, default=20, help="rows to print, fewest kills first (0 = all)")
+    parser.add_argument("--verify", type=int, default=0, metavar="N", help="check N random frames per min amount against the scalar spread code")
+    parser.add_argument("--output", help="write every setting with its kill times as JSON")
+    return parser.parse_args(argv)
+
+
+def _iso(ts: Optional[float]) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts)) if ts is not None else "-"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        thresholds = parse_grid(args.thresholds)
+        min_amounts = parse_grid(args.min_amounts)
+        t_load = time.perf_counter()
+        if args.orders:
+            frames = load_order_frames(args.orders, args.list_format)
+        else:
+            events = SPREAD_EVENTS + (STATUS_EVENTS if args.include_status else ())
+            frames = load_quote_frames(args.events, events, args.symbol)
+            if min_amounts != [0.0]:
+                print("note: logged events are already filtered by the min amount in force; --min-amounts is ignored", file=sys.stderr)
+        load_s = time.perf_counter() - t_load
+        if len(frames.ts) == 0:
+            print("no frames to replay", file=sys.stderr)
+            return 1
+        if args.verify and isinstance(frames, OrderFrames):
+            mismatches = verify_against_reference(frames, min_amounts, args.verify)
+            print(f"verify: {mismatches} mismatch(es) against split_filter_sort_orders/compute_spread_percent_mid")
+            if mismatches:
+                return 1
+
+        t_sweep = time.perf_counter()
+        results = run_sweep(frames, thresholds, min_amounts, args.workers)
+        sweep_s = time.perf_counter() - t_sweep
+    except Exception as e:
+        print(f"replay failed: {e}", file=sys.stderr)
+        return 1
+
+    n_frames = len(frames.ts)
+    span_s = float(frames.ts[-1] - frames.ts[0]) if n_frames > 1 else 0.0
+    settings = len(results)
+    print(
+        f"{n_frames} frames over {span_s / 3600.0:.1f} h ({_iso(frames.ts[0])} .. {_iso(frames.ts[-1])}); "
+        f"loaded in {load_s:.2f}s; {settings} settings swept in {sweep_s:.3f}s "
+        f"({n_frames * settings / max(sweep_s, 1e-9):,.0f} frame-checks/s, "
+        f"{span_s * settings / max(sweep_s, 1e-9):,.0f}x real time)"
+    )
+    ranked = sorted(results, key=lambda r: (r.kills, r.threshold, r.min_amount or 0.0))
+    shown = ranked if args.top == 0 else ranked[: args.top]
+    print(f"{'min_amount':>12} {'threshold%':>11} {'kills':>7} {'breach_frames':>14}  first_kill            last_kill")
+    for r in shown:
+        min_amount = "recorded" if r.min_amount is None else f"{r.min_amount:g}"
+        first = r.kill_times[0] if r.kill_times else None
+        last = r.kill_times[-1] if r.kill_times else None
+        print(f"{min_amount:>12} {r.threshold:>11g} {r.kills:>7} {r.breach_frames:>14}  {_iso(first):<21} {_iso(last)}")
+
+    if args.output:
+        report = {
+            "frames": n_frames,
+            "start": _iso(frames.ts[0]),
+            "end": _iso(frames.ts[-1]),
+            "sweep_s": sweep_s,
+            "source": "orders" if args.orders else "events",
+            "recorded_min_amount": None if args.orders else frames.min_amount,
+            "results": [
+                {
+                    "min_amount": r.min_amount,
+                    "threshold": r.threshold,
+                    "kills": r.kills,
+                    "breach_frames": r.breach_frames,
+                    "kill_times": [_iso(t) for t in r.kill_times],
+                }
+                for r in results
+            ],
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
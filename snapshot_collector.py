@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+from typing import Any, Dict, List, Optional
+from hleper_functions.wide_logger import setup_logger, log_event
+from hleper_functions.balance_cache import BalancePublisher, WalletFeed, start_wallet_feed
+from hleper_functions.helper_functions_monitor import fetch_inventory
+from hleper_functions.order_feed import OrderFeed, start_order_feed
+from hleper_functions.order_snapshot import SnapshotWriter
+from hleper_functions.order_source import load_open_orders
+
+MIN_INTERVAL_S = 0.25
+
+
+def get_env_config() -> Dict[str, Any]:
+    """
+    Load configuration from environment variables.
+    """
+    event_log_file = os.environ.get("SNAPSHOT_EVENT_LOG_FILE", "~/hummingbot_master/logs/snapshot_collector.log")
+    snapshot_file = os.environ.get("HB_SNAPSHOT_FILE", "~/hummingbot_master/states/orders.snapshot")
+    interval_s = float(os.environ.get("HB_SNAPSHOT_INTERVAL_S", "1.0"))
+    symbol = os.environ.get("HB_SYMBOL", "tPNKUSD")
+    list_cmd = os.environ.get("HB_LIST_CMD", f"bitfinex-maker-kit list --symbol {symbol}")
+    list_format = os.environ.get("HB_LIST_FORMAT", "table").strip().lower()
+    timeout_s = int(os.environ.get("HB_CMD_TIMEOUT", "60"))
+    order_source = os.environ.get("HB_ORDER_SOURCE", "cli").strip().lower()
+    ws_host = os.environ.get("HB_WS_HOST", "wss://api.bitfinex.com/ws/2")
+    ws_ready_timeout_s = float(os.environ.get("HB_WS_READY_TIMEOUT_S", "5"))
+    ws_max_age_s = float(os.environ.get("HB_WS_MAX_AGE_S", "30"))
+    api_key = os.environ.get("BITFINEX_API_KEY", "")
+    api_secret = os.environ.get("BITFINEX_API_SECRET", "")
+    balance_cache_file = os.environ.get("HB_BALANCE_CACHE_FILE", "")
+    balance_reconcile_s = float(os.environ.get("HB_BALANCE_RECONCILE_S", "300"))
+
+    return {
+        "event_log_file": event_log_file,
+        "snapshot_file": snapshot_file,
+        "interval_s": interval_s,
+        "list_cmd": list_cmd,
+        "list_format": list_format,
+        "timeout_s": timeout_s,
+        "symbol": symbol,
+        "order_source": order_source,
+        "ws_host": ws_host,
+        "ws_ready_timeout_s": ws_ready_timeout_s,
+        "ws_max_age_s": ws_max_age_s,
+        "api_key": api_key,
+        "api_secret": api_secret,
+        "balance_cache_file": balance_cache_file,
+        "balance_reconcile_s": balance_reconcile_s,
+    }
+
+
+def collect_once(
+    cfg: Dict[str, Any],
+    writer: SnapshotWriter,
+    logger: logging.Logger,
+    feed: Optional[OrderFeed] = None,
+    balances: Optional[BalancePublisher] = None,
+) -> int:
+    """
+    Fetch and parse the book once and publish it. Failed fetches are not published,
+    so readers see the snapshot go stale and fetch for themselves. The balance
+    cache, when enabled, is refreshed first.
+    """
+    if balances is not None:
+        try:
+            balances.tick()
+        except Exception as e:
+            log_event(logger, "ERROR", "balance_cache_failed", error=str(e), balance_cache_file=cfg["balance_cache_file"])
+    t0 = time.perf_counter()
+    # The collector is the source of the snapshot, so it never reads it back
+    rc, orders, stderr, order_source = load_open_orders({**cfg, "snapshot_file": ""}, feed)
+    if rc != 0:
+        log_event(
+            logger,
+            "ERROR",
+            "snapshot_fetch_failed",
+            rc=rc,
+            cmd=cfg["list_cmd"],
+            stderr=stderr,
+            cycle_ms=round((time.perf_counter() - t0) * 1000.0, 3),
+        )
+        return 1
+    seq = writer.publish(orders, order_source)
+    log_event(
+        logger,
+        "INFO",
+        "snapshot_published",
+        seq=seq,
+        orders_count=len(orders),
+        order_source=order_source,
+        cycle_ms=round((time.perf_counter() - t0) * 1000.0, 3),
+    )
+    return 0
+
+
+async def run_daemon(
+    cfg: Dict[str, Any],
+    writer: SnapshotWriter,
+    logger: logging.Logger,
+    interval_s: float,
+    feed: Optional[OrderFeed] = None,
+    balances: Optional[BalancePublisher] = None,
+) -> int:
+    """
+    Publish a fresh snapshot every interval_s seconds until SIGINT/SIGTERM.
+    """
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    log_event(
+        logger,
+        "INFO",
+        "daemon_start",
+        mode="snapshot_collector",
+        interval_s=interval_s,
+        snapshot_file=cfg["snapshot_file"],
+        list_cmd=cfg["list_cmd"],
+        order_source=cfg["order_source"],
+        balance_cache_file=cfg["balance_cache_file"],
+    )
+    cycles = 0
+    while not stop.is_set():
+        started = loop.time()
+        try:
+            await loop.run_in_executor(None, collect_once, cfg, writer, logger, feed, balances)
+        except Exception as e:
+            log_event(logger, "ERROR", "daemon_cycle_failed", cycle=cycles, error=str(e))
+        cycles += 1
+        delay = interval_s - (loop.time() - started)
+        if delay > 0:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    log_event(logger, "INFO", "daemon_stop", cycles=cycles)
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Publish one shared open-order snapshot for spread.py and monitor.py")
+    parser.add_argument("--once", action="store_true", help="publish a single snapshot and exit (cron mode)")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help=f"seconds between snapshots (default: HB_SNAPSHOT_INTERVAL_S, min {MIN_INTERVAL_S})",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    cfg = get_env_config()
+    feed = None
+    wallet_feed: Optional[WalletFeed] = None
+    writer = None
+    try:
+        logger = setup_logger(cfg["event_log_file"])
+        writer = SnapshotWriter(cfg["snapshot_file"])
+        feed = start_order_feed(cfg, logger)
+        balances = None
+        if cfg["balance_cache_file"]:
+            wallet_feed = start_wallet_feed(cfg, logger)
+            balances = BalancePublisher(
+                cfg["balance_cache_file"],
+                wallet_feed,
+                lambda: fetch_inventory(cfg["api_key"], cfg["api_secret"], logger=logger, currencies=None),
+                cfg["balance_reconcile_s"],
+                logger,
+            )
+        if args.once:
+            return collect_once(cfg, writer, logger, feed, balances)
+        interval_s = max(MIN_INTERVAL_S, args.interval if args.interval is not None else cfg["interval_s"])
+        return asyncio.run(run_daemon(cfg, writer, logger, interval_s, feed, balances))
+    except Exception as e:
+        print(f"Critical error in snapshot collector: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if feed is not None:
+            feed.stop()
+        if wallet_feed is not None:
+            wallet_feed.stop()
+        if writer is not None:
+            writer.close()
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -1,29 +1,60 @@
+import argparse
+import asyncio
+import logging
 import os
+import signal
 import sys
-from typing import Any, Dict
-from hleper_functions.wide_logger import setup_logger, log_event
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+from hleper_functions.wide_logger import bind_logger, setup_logger, log_event
 from hleper_functions.helper_function import (
     atomic_write_state,
     kill_screen_session,
     run_cancel_command,
 )
-from hleper_functions.helper_functions_spread import (
-    run_list_command,
-    parse_orders_from_text,
-    split_filter_sort_orders,
-    compute_spread_percent_mid,
-)
+from hleper_functions.bfx_rest import BfxRestSession
+from hleper_functions.markets import load_markets, market_config
+from hleper_functions.kill_switch import CancelOutcome, cancel_symbol_orders, get_cancel_session
+from hleper_functions.metrics import BREACHES, FAILURES, RUNS, flush_metrics, observe_ms, setup_metrics, span
+from hleper_functions.order_feed import OrderFeed, start_order_feed
+from hleper_functions.order_source import build_order_book, load_open_orders
+from hleper_functions.orders import Orders
+from hleper_functions.rate_limiter import get_rate_limiter
+from hleper_functions.timeseries_store import open_series_store
+
+# Lower bound for the daemon polling interval; anything faster just hammers the list command.
+MIN_DAEMON_INTERVAL_S = 0.25
 
 
 def get_env_config() -> Dict[str, Any]:
     state_file = os.environ.get("SPREAD_STATE_FILE", "~/hummingbot_master/states/spread.state")
     event_log_file = os.environ.get("SPREAD_EVENT_LOG_FILE", "~/hummingbot_master/logs/spread_log_monitor.log")
     screen_session = os.environ.get("HB_SCREEN_SESSION", "hummingbot")
-    cancel_cmd = os.environ.get("HB_CANCEL_CMD", "bitfinex-maker-kit cancel --symbol tPNKUSD")
-    list_cmd = os.environ.get("HB_LIST_CMD", "bitfinex-maker-kit list --symbol tPNKUSD")
+    symbol = os.environ.get("HB_SYMBOL", "tPNKUSD")
+    cancel_cmd = os.environ.get("HB_CANCEL_CMD", f"bitfinex-maker-kit cancel --symbol {symbol}")
+    list_cmd = os.environ.get("HB_LIST_CMD", f"bitfinex-maker-kit list --symbol {symbol}")
     min_order_amount = float(os.environ.get("HB_MIN_ORDER_AMOUNT", "0"))
     spread_percent_threshold = float(os.environ.get("HB_SPREAD_PERCENT_THRESHOLD", "0.5"))
     timeout_s = int(os.environ.get("HB_CMD_TIMEOUT", "60"))
+    daemon_interval_s = float(os.environ.get("HB_DAEMON_INTERVAL_S", "1.0"))
+    markets_file = os.environ.get("HB_MARKETS_FILE", "")
+    market_workers = int(os.environ.get("HB_MARKET_WORKERS", "8"))
+    order_source = os.environ.get("HB_ORDER_SOURCE", "cli").strip().lower()
+    list_format = os.environ.get("HB_LIST_FORMAT", "table").strip().lower()
+    snapshot_file = os.environ.get("HB_SNAPSHOT_FILE", "")
+    snapshot_max_age_s = float(os.environ.get("HB_SNAPSHOT_MAX_AGE_S", "5"))
+    ws_host = os.environ.get("HB_WS_HOST", "wss://api.bitfinex.com/ws/2")
+    ws_ready_timeout_s = float(os.environ.get("HB_WS_READY_TIMEOUT_S", "5"))
+    ws_max_age_s = float(os.environ.get("HB_WS_MAX_AGE_S", "30"))
+    api_key = os.environ.get("BITFINEX_API_KEY", "")
+    api_secret = os.environ.get("BITFINEX_API_SECRET", "")
+    series_file = os.environ.get("HB_SERIES_FILE", "")
+    series_capacity = int(os.environ.get("HB_SERIES_CAPACITY", "200000"))
+    fast_cancel = os.environ.get("HB_FAST_CANCEL", "1").strip().lower() in ("1", "true", "yes")
+    fast_cancel_rounds = int(os.environ.get("HB_FAST_CANCEL_ROUNDS", "3"))
+    metrics_port = int(os.environ.get("HB_METRICS_PORT", "0") or 0)
+    metrics_textfile_dir = os.environ.get("HB_METRICS_TEXTFILE_DIR", "")
 
     return {
         "state_file": state_file,
@@ -34,21 +65,64 @@ def get_env_config() -> Dict[str, Any]:
         "min_order_amount": min_order_amount,
         "spread_percent_threshold": spread_percent_threshold,
         "timeout_s": timeout_s,
+        "daemon_interval_s": daemon_interval_s,
+        "symbol": symbol,
+        "markets_file": markets_file,
+        "market_workers": market_workers,
+        "order_source": order_source,
+        "list_format": list_format,
+        "snapshot_file": snapshot_file,
+        "snapshot_max_age_s": snapshot_max_age_s,
+        "ws_host": ws_host,
+        "ws_ready_timeout_s": ws_ready_timeout_s,
+        "ws_max_age_s": ws_max_age_s,
+        "api_key": api_key,
+        "api_secret": api_secret,
+        "series_file": series_file,
+        "series_capacity": series_capacity,
+        "fast_cancel": fast_cancel,
+        "fast_cancel_rounds": fast_cancel_rounds,
+        "metrics_port": metrics_port,
+        "metrics_textfile_dir": metrics_textfile_dir,
     }
 
 
-def main() -> int:
-    cfg = get_env_config()
+def run_spread_check(
+    cfg: Dict[str, Any],
+    logger: logging.Logger,
+    emit_run_start: bool = True,
+    feed: Optional[OrderFeed] = None,
+    cancel_session: Optional[BfxRestSession] = None,
+) -> int:
+    """
+    Run one list -> parse -> spread -> kill/cancel cycle and return its exit status.
+    Orders come from the websocket feed when it is ready, else from the list command.
+    Every terminal event carries cycle_ms, the wall time spent in this cycle so far.
+    """
+    with span("cycle"):
+        status = _spread_check_cycle(cfg, logger, emit_run_start, feed, cancel_session)
+    RUNS.inc(status=status)
+    return status
+
+
+def _spread_check_cycle(
+    cfg: Dict[str, Any],
+    logger: logging.Logger,
+    emit_run_start: bool,
+    feed: Optional[OrderFeed],
+    cancel_session: Optional[BfxRestSession],
+) -> int:
     state_file = cfg["state_file"]
-    event_log_file = cfg["event_log_file"]
     timeout_s = cfg["timeout_s"]
-    session_name = cfg["screen_session"]
-    cancel_cmd = cfg["cancel_cmd"]
     list_cmd = cfg["list_cmd"]
     min_order_amount = cfg["min_order_amount"]
     spread_percent_threshold = cfg["spread_percent_threshold"]
-    try:
-        logger = setup_logger(event_log_file)
+    t0 = time.perf_counter()
+
+    def cycle_ms() -> float:
+        return round((time.perf_counter() - t0) * 1000.0, 3)
+
+    if emit_run_start:
         log_event(
             logger,
             "INFO",
@@ -60,123 +134,434 @@ def main() -> int:
             spread_threshold_percent=spread_percent_threshold,
             timeout_s=timeout_s,
         )
-        # Run list command, parse orders, compute spread; treat threshold breach as "match"
-        rc_list, out_list, err_list = run_list_command(list_cmd, timeout_s)
-        if rc_list != 0:
-            log_event(
-                logger,
-                "ERROR",
-                "list_orders_failed",
-                rc=rc_list,
-                cmd=list_cmd,
-                stderr=err_list,
-            )
-            return 1
-        orders = parse_orders_from_text(out_list)
-        buy_prices_desc, sell_prices_asc = split_filter_sort_orders(orders, min_order_amount)
-        best_bid = buy_prices_desc[0] if buy_prices_desc else None
-        best_ask = sell_prices_asc[0] if sell_prices_asc else None
-        spread_percent = compute_spread_percent_mid(best_bid, best_ask)
-        matched = (
-            spread_percent is not None
-            and (spread_percent < 0.0 or spread_percent >= spread_percent_threshold)
-        )
-        state = (
-            f"best_bid={best_bid} best_ask={best_ask} spread%={spread_percent:.6f} "
-            f"threshold%={spread_percent_threshold} buys={len(buy_prices_desc)} sells={len(sell_prices_asc)}"
-            if spread_percent is not None
-            else "insufficient_book_depth"
+    # Load open orders (ws feed or list command), compute spread; treat threshold breach as "match"
+    load_t0 = time.perf_counter()
+    rc_list, orders, err_list, order_source = load_open_orders(cfg, feed)
+    # Command execution and parsing overlap (streamed), so they share one stage per source
+    observe_ms(f"orders_{order_source}", (time.perf_counter() - load_t0) * 1000.0)
+    if rc_list != 0:
+        FAILURES.inc(stage="list_orders")
+        log_event(
+            logger,
+            "ERROR",
+            "list_orders_failed",
+            rc=rc_list,
+            cmd=list_cmd,
+            stderr=err_list,
+            cycle_ms=cycle_ms(),
         )
-        # Persist a minimal state note for traceability
-        try:
+        return 1
+    with span("book_build"):
+        book = build_order_book(cfg, orders, order_source, min_order_amount, feed)
+    best_bid = book.best_bid
+    best_ask = book.best_ask
+    spread_percent = book.spread_percent()
+    matched = (
+        spread_percent is not None
+        and (spread_percent < 0.0 or spread_percent >= spread_percent_threshold)
+    )
+    state = (
+        f"best_bid={best_bid} best_ask={best_ask} spread%={spread_percent:.6f} "
+        f"threshold%={spread_percent_threshold} buys={book.bid_count} sells={book.ask_count}"
+        if spread_percent is not None
+        else "insufficient_book_depth"
+    )
+    # Persist a minimal state note for traceability
+    try:
+        with span("state_write"):
             atomic_write_state(state_file, {"state": state})
+    except Exception as e:
+        FAILURES.inc(stage="state_write")
+        log_event(logger, "WARNING", "state_write_failed", error=str(e), state_file=state_file)
+        # Continue anyway
+    if cfg["series_file"]:
+        try:
+            with span("series_write"):
+                open_series_store(cfg["series_file"], cfg["series_capacity"]).append(
+                    "spread",
+                    best_bid=best_bid,
+                    best_ask=best_ask,
+                    mid_price=book.mid_price(),
+                    spread_percent=spread_percent,
+                )
         except Exception as e:
-            log_event(logger, "WARNING", "state_write_failed", error=str(e), state_file=state_file)
-            # Continue anyway
-
-        if not matched:
-            log_event(
-                logger,
-                "INFO",
-                "spread_ok",
-                best_bid=best_bid,
-                best_ask=best_ask,
-                spread_percent=spread_percent,
-                threshold_percent=spread_percent_threshold,
-                buys_count=len(buy_prices_desc),
-                sells_count=len(sell_prices_asc),
-            )
-            return 0
+            FAILURES.inc(stage="series_write")
+            log_event(logger, "WARNING", "series_write_failed", error=str(e), series_file=cfg["series_file"])
 
+    if not matched:
         log_event(
             logger,
-            "WARNING",
-            "spread_threshold_breached",
+            "INFO",
+            "spread_ok",
             best_bid=best_bid,
             best_ask=best_ask,
             spread_percent=spread_percent,
             threshold_percent=spread_percent_threshold,
-            buys_count=len(buy_prices_desc),
-            sells_count=len(sell_prices_asc),
+            buys_count=book.bid_count,
+            sells_count=book.ask_count,
+            order_source=order_source,
+            cycle_ms=cycle_ms(),
+        )
+        return 0
+
+    breach_t0 = time.perf_counter()
+    BREACHES.inc(symbol=cfg["symbol"])
+    log_event(
+        logger,
+        "WARNING",
+        "spread_threshold_breached",
+        best_bid=best_bid,
+        best_ask=best_ask,
+        spread_percent=spread_percent,
+        threshold_percent=spread_percent_threshold,
+        buys_count=book.bid_count,
+        sells_count=book.ask_count,
+        order_source=order_source,
+        cycle_ms=cycle_ms(),
+    )
+
+    return execute_kill_switch(cfg, logger, orders, breach_t0, t0, cancel_session)
+
+
+def execute_kill_switch(
+    cfg: Dict[str, Any],
+    logger: logging.Logger,
+    orders: Union[List[dict], Orders],
+    breach_t0: float,
+    cycle_t0: float,
+    cancel_session: Optional[BfxRestSession] = None,
+) -> int:
+    """
+    Stop the bot and pull every order for the symbol. With a cancel session the orders
+    are cancelled in-process in parallel with the screen kill, then re-checked once the
+    bot is gone (it may have quoted again meanwhile). The cancel CLI is the fallback when
+    there is no session or the in-process cancel fails. kill_switch_done reports each
+    step and breach_to_flat_ms, the time from detection to a verified empty order list.
+    """
+    timeout_s = cfg["timeout_s"]
+    session_name = cfg["screen_session"]
+    cancel_cmd = cfg["cancel_cmd"]
+    symbol = cfg["symbol"]
+
+    def since_breach_ms() -> float:
+        return round((time.perf_counter() - breach_t0) * 1000.0, 3)
+
+    def timed_kill() -> Tuple[Tuple[int, str, str], float]:
+        started = time.perf_counter()
+        result = kill_screen_session(session_name, timeout_s)
+        return result, round((time.perf_counter() - started) * 1000.0, 3)
+
+    fast: Optional[CancelOutcome] = None
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="kill_switch") as executor:
+        screen_future = executor.submit(timed_kill)
+        fast_future = None
+        if cancel_session is not None:
+            known_ids = [o.get("id") for o in orders]
+            fast_future = executor.submit(
+                cancel_symbol_orders, cancel_session, symbol, known_ids, cfg["fast_cancel_rounds"]
+            )
+        (rc1, out1, err1), screen_ms = screen_future.result()
+        if fast_future is not None:
+            fast = fast_future.result()
+
+    observe_ms("screen_kill", screen_ms)
+    if rc1 == 0:
+        log_event(
+            logger,
+            "INFO",
+            "screen_killed",
+            session=session_name,
+            rc=rc1,
+            stdout=out1,
+            stderr=err1,
+            duration_ms=screen_ms,
+        )
+    else:
+        FAILURES.inc(stage="screen_kill")
+        log_event(
+            logger,
+            "ERROR",
+            "screen_kill_failed",
+            session=session_name,
+            rc=rc1,
+            stdout=out1,
+            stderr=err1,
+            duration_ms=screen_ms,
         )
 
-        rc1, out1, err1 = kill_screen_session(session_name, timeout_s)
-        if rc1 == 0:
+    verify: Optional[CancelOutcome] = None
+    if fast is not None:
+        observe_ms("fast_cancel", fast.duration_ms)
+        if not fast.ok:
+            FAILURES.inc(stage="fast_cancel")
+        log_event(
+            logger,
+            "INFO" if fast.ok else "ERROR",
+            "fast_cancel_ok" if fast.ok else "fast_cancel_failed",
+            symbol=symbol,
+            cancel_requested=fast.cancel_requested,
+            remaining=fast.remaining,
+            rounds=fast.rounds,
+            error=fast.error,
+            duration_ms=fast.duration_ms,
+        )
+        if fast.error is None and cancel_session is not None:
+            # The bot may have placed orders until the screen session was gone
+            verify = cancel_symbol_orders(cancel_session, symbol, None, cfg["fast_cancel_rounds"])
+            observe_ms("fast_cancel_verify", verify.duration_ms)
+            if not verify.ok:
+                FAILURES.inc(stage="fast_cancel_verify")
+            log_event(
+                logger,
+                "INFO" if verify.ok else "ERROR",
+                "fast_cancel_verified" if verify.ok else "fast_cancel_verify_failed",
+                symbol=symbol,
+                cancel_requested=verify.cancel_requested,
+                remaining=verify.remaining,
+                rounds=verify.rounds,
+                error=verify.error,
+                duration_ms=verify.duration_ms,
+            )
+    fast_ok = verify is not None and verify.ok
+    breach_to_flat_ms = since_breach_ms() if fast_ok else None
+
+    cli_ms = None
+    rc2: Optional[int] = 0 if fast_ok else None
+    if not fast_ok and rc1 == 0:
+        cli_t0 = time.perf_counter()
+        limiter = get_rate_limiter()
+        if limiter is not None:
+            limiter.acquire("cancel", "cli:cancel")
+        rc2, out2, err2 = run_cancel_command(cancel_cmd, timeout_s)
+        cli_ms = round((time.perf_counter() - cli_t0) * 1000.0, 3)
+        observe_ms("cancel_command", cli_ms)
+        if rc2 == 0:
             log_event(
                 logger,
                 "INFO",
-                "screen_killed",
-                session=session_name,
-                rc=rc1,
-                stdout=out1,
-                stderr=err1,
+                "cancel_command_ok",
+                rc=rc2,
+                stdout=out2,
+                stderr=err2,
+                duration_ms=cli_ms,
             )
         else:
+            FAILURES.inc(stage="cancel_command")
             log_event(
                 logger,
                 "ERROR",
-                "screen_kill_failed",
-                session=session_name,
-                rc=rc1,
-                stdout=out1,
-                stderr=err1,
+                "cancel_command_failed",
+                rc=rc2,
+                stdout=out2,
+                stderr=err2,
+                duration_ms=cli_ms,
             )
 
-        if rc1 == 0:
-            rc2, out2, err2 = run_cancel_command(cancel_cmd, timeout_s)
-            if rc2 == 0:
-                log_event(
-                    logger,
-                    "INFO",
-                    "cancel_command_ok",
-                    rc=rc2,
-                    stdout=out2,
-                    stderr=err2,
+    log_event(
+        logger,
+        "INFO" if fast_ok or rc2 == 0 else "ERROR",
+        "kill_switch_done",
+        symbol=symbol,
+        cancel_method="api" if fast_ok else ("cli" if cli_ms is not None else "none"),
+        screen_ms=screen_ms,
+        fast_cancel_ms=fast.duration_ms if fast is not None else None,
+        verify_ms=verify.duration_ms if verify is not None else None,
+        cli_cancel_ms=cli_ms,
+        breach_to_flat_ms=breach_to_flat_ms,
+        breach_to_done_ms=since_breach_ms(),
+    )
+
+    # Non-zero exit if any action failed
+    status = 0 if (rc1 == 0 and rc2 == 0) else 2
+    log_event(
+        logger,
+        "INFO" if status == 0 else "ERROR",
+        "run_end",
+        status=status,
+        cycle_ms=round((time.perf_counter() - cycle_t0) * 1000.0, 3),
+    )
+    return status
+
+
+def run_markets_check(
+    market_cfgs: List[Dict[str, Any]],
+    logger: logging.Logger,
+    pool: Executor,
+    emit_run_start: bool = True,
+    feed: Optional[OrderFeed] = None,
+    cancel_session: Optional[BfxRestSession] = None,
+) -> int:
+    """
+    Run the spread check of every market concurrently on the bounded pool. Each
+    market's events carry its symbol; markets_run_end reports every status and the
+    worst one is returned (2 action failed > 1 check failed > 0).
+    """
+    t0 = time.perf_counter()
+    futures = {
+        mcfg["symbol"]: pool.submit(
+            run_spread_check,
+            mcfg,
+            bind_logger(logger, symbol=mcfg["symbol"]),
+            emit_run_start,
+            feed,
+            cancel_session,
+        )
+        for mcfg in market_cfgs
+    }
+    statuses: Dict[str, int] = {}
+    for symbol, future in futures.items():
+        try:
+            statuses[symbol] = future.result()
+        except Exception as e:
+            statuses[symbol] = 1
+            FAILURES.inc(stage="cycle")
+            log_event(logger, "ERROR", "market_check_failed", symbol=symbol, error=str(e))
+    status = max(statuses.values()) if statuses else 0
+    log_event(
+        logger,
+        "INFO" if status == 0 else "ERROR",
+        "markets_run_end",
+        status=status,
+        statuses=statuses,
+        markets_count=len(statuses),
+        cycle_ms=round((time.perf_counter() - t0) * 1000.0, 3),
+    )
+    return status
+
+
+async def run_daemon(
+    cfg: Dict[str, Any],
+    logger: logging.Logger,
+    interval_s: float,
+    feed: Optional[OrderFeed] = None,
+    cancel_session: Optional[BfxRestSession] = None,
+    market_cfgs: Optional[List[Dict[str, Any]]] = None,
+    pool: Optional[Executor] = None,
+) -> int:
+    """
+    Keep one process alive and run the spread check (of every market, when
+    market_cfgs is given) every interval_s seconds. The blocking check runs in the
+    default executor; SIGINT/SIGTERM stop the loop after the in-flight cycle finishes.
+    """
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Signal handlers are only available on the main thread of Unix event loops
+            pass
+
+    log_event(
+        logger,
+        "INFO",
+        "daemon_start",
+        mode="spread_check",
+        interval_s=interval_s,
+        state_file=cfg["state_file"],
+        list_cmd=cfg["list_cmd"],
+        min_order_amount=cfg["min_order_amount"],
+        spread_threshold_percent=cfg["spread_percent_threshold"],
+        timeout_s=cfg["timeout_s"],
+        order_source=cfg["order_source"],
+        fast_cancel=cancel_session is not None,
+        markets=[m["symbol"] for m in market_cfgs] if market_cfgs else None,
+    )
+    if cancel_session is not None:
+        # Keep a warm, authenticated connection ready for the breach path
+        try:
+            cancel_session.warm_up()
+        except Exception as e:
+            log_event(logger, "WARNING", "fast_cancel_warm_up_failed", error=str(e))
+    cycles = 0
+    last_status = 0
+    while not stop.is_set():
+        started = loop.time()
+        try:
+            if market_cfgs:
+                last_status = await loop.run_in_executor(
+                    None, run_markets_check, market_cfgs, logger, pool, False, feed, cancel_session
                 )
             else:
-                log_event(
-                    logger,
-                    "ERROR",
-                    "cancel_command_failed",
-                    rc=rc2,
-                    stdout=out2,
-                    stderr=err2,
+                last_status = await loop.run_in_executor(
+                    None, run_spread_check, cfg, logger, False, feed, cancel_session
                 )
-        else:
-            rc2 = None
+        except Exception as e:
+            last_status = 1
+            FAILURES.inc(stage="cycle")
+            log_event(logger, "ERROR", "daemon_cycle_failed", cycle=cycles, error=str(e))
+        cycles += 1
+        try:
+            flush_metrics(cfg, "spread")
+        except Exception as e:
+            log_event(logger, "WARNING", "metrics_flush_failed", error=str(e))
+        delay = interval_s - (loop.time() - started)
+        if delay > 0:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
 
-        # Non-zero exit if any action failed
-        status = 0 if (rc1 == 0 and rc2 == 0) else 2
-        log_event(
-            logger,
-            "INFO" if status == 0 else "ERROR",
-            "run_end",
-            status=status,
-        )
+    log_event(logger, "INFO", "daemon_stop", cycles=cycles, last_status=last_status)
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Hummingbot spread monitor / kill switch")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep running and check the spread every --interval seconds instead of once",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help=f"daemon check interval in seconds (default: HB_DAEMON_INTERVAL_S, min {MIN_DAEMON_INTERVAL_S})",
+    )
+    parser.add_argument(
+        "--markets",
+        default=None,
+        help="JSON file of markets to check concurrently (default: HB_MARKETS_FILE; unset = HB_SYMBOL only)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    cfg = get_env_config()
+    feed = None
+    pool = None
+    try:
+        logger = setup_logger(cfg["event_log_file"])
+        setup_metrics(cfg, "spread")
+        markets_file = args.markets or cfg["markets_file"]
+        market_cfgs = [market_config(cfg, m) for m in load_markets(markets_file)] if markets_file else None
+        symbols = [m["symbol"] for m in market_cfgs] if market_cfgs else None
+        feed = start_order_feed(cfg, logger, symbols)
+        cancel_session = get_cancel_session(cfg)
+        if market_cfgs:
+            pool = ThreadPoolExecutor(
+                max_workers=max(1, min(cfg["market_workers"], len(market_cfgs))), thread_name_prefix="market"
+            )
+        if args.daemon:
+            interval_s = args.interval if args.interval is not None else cfg["daemon_interval_s"]
+            interval_s = max(MIN_DAEMON_INTERVAL_S, interval_s)
+            return asyncio.run(run_daemon(cfg, logger, interval_s, feed, cancel_session, market_cfgs, pool))
+        if market_cfgs:
+            status = run_markets_check(market_cfgs, logger, pool, feed=feed, cancel_session=cancel_session)
+        else:
+            status = run_spread_check(cfg, logger, feed=feed, cancel_session=cancel_session)
+        flush_metrics(cfg, "spread")
         return status
     except Exception:
         # Ensure no exception prevents next cron run
         return 1
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False)
+        if feed is not None:
+            feed.stop()
 
 
 if __name__ == "__main__":
@@ -184,4 +569,3 @@ if __name__ == "__main__":
         sys.exit(main())
     except KeyboardInterrupt:
         sys.exit(130)
-
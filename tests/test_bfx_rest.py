@@ -0,0 +1,138 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+from typing import Any, List
+
+import pytest
+
+from bfxapi.exceptions import InvalidCredentialError
+from bfxapi.rest.exceptions import GenericError, RequestParameterError
+
+from hleper_functions.bfx_rest import BfxRestSession, RateLimitError
+from hleper_functions.fake_bfx_rest import FakeBfxRestServer, RawResponse
+
+TICKER = [0.016, 100.0, 0.0161, 120.0, 0.0001, 0.01, 0.016, 5000.0, 0.017, 0.015]
+
+
+def order_row(order_id: int, amount: float, price: float) -> List[Any]:
+    """An auth/r/orders style order row (32 fields)."""
+    row: List[Any] = [None] * 32
+    row[0], row[3], row[4], row[5], row[6], row[7] = order_id, "tPNKUSD", 1, 2, amount, amount
+    row[8], row[13], row[16] = "EXCHANGE LIMIT", "ACTIVE", price
+    return row
+
+
+@pytest.fixture
+def server():
+    server = FakeBfxRestServer(routes={"ticker/tPNKUSD": TICKER})
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def session(server):
+    session = BfxRestSession("key", "secret", host=server.url, timeout_s=5.0, public_ttl_s=0.3)
+    yield session
+    session.close()
+
+
+def requests_to(server: FakeBfxRestServer, path: str) -> int:
+    return sum(1 for r in server.received if r[1] == path)
+
+
+def test_ticker_cache_hit_and_expiry(server, session):
+    first = session.get_t_ticker("tPNKUSD")
+    second = session.get_t_ticker("tPNKUSD")
+    assert first.last_price == second.last_price == 0.016
+    assert requests_to(server, "ticker/tPNKUSD") == 1
+
+    time.sleep(0.35)
+    session.get_t_ticker("tPNKUSD")
+    assert requests_to(server, "ticker/tPNKUSD") == 2
+
+
+def test_concurrent_callers_share_one_request(server, session):
+    def slow_ticker(*_: Any) -> List[float]:
+        time.sleep(0.2)
+        return TICKER
+
+    server.routes["ticker/tPNKUSD"] = slow_ticker
+    prices: List[float] = []
+    threads = [threading.Thread(target=lambda: prices.append(session.get_t_ticker("tPNKUSD").last_price)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5.0)
+
+    assert prices == [0.016] * 8
+    assert requests_to(server, "ticker/tPNKUSD") == 1
+
+
+def test_signed_order_multi(server, session):
+    server.routes["auth/w/order/multi"] = [
+        1700000000000, "ow-req", None, None,
+        [
+            [1700000000001, "on-req", None, None, order_row(11, 50.0, 0.016), None, "SUCCESS", "Submitting 1 orders."],
+            [1700000000002, "on-req", None, None, None, None, "ERROR", "Invalid order: minimum size"],
+        ],
+        None, "SUCCESS", "Submitting 2 order operations.",
+    ]
+    ops = [
+        ("on", {"type": "EXCHANGE LIMIT", "symbol": "tPNKUSD", "amount": "50", "price": "0.016", "gid": None}),
+        ("on", {"type": "EXCHANGE LIMIT", "symbol": "tPNKUSD", "amount": "0.1", "price": "0.0159"}),
+    ]
+    notification = session.order_multi(ops)
+
+    assert notification.status == "SUCCESS"
+    assert [op.status for op in notification.data] == ["SUCCESS", "ERROR"]
+    assert notification.data[0].data.id == 11
+    assert notification.data[1].data is None
+    assert notification.data[1].text == "Invalid order: minimum size"
+
+    method, path, _, body, headers = server.received[-1]
+    assert (method, path) == ("POST", "auth/w/order/multi")
+    # None fields are left out of the signed body
+    assert body == {"ops": [["on", {k: v for k, v in fields.items() if v is not None}] for _, fields in ops]}
+    raw = json.dumps(body)
+    expected = hmac.new(b"secret", f"/api/v2/auth/w/order/multi{headers['bfx-nonce']}{raw}".encode(), hashlib.sha384)
+    assert headers["bfx-apikey"] == "key"
+    assert headers["bfx-signature"] == expected.hexdigest()
+
+
+def test_order_multi_nonces_increase(server, session):
+    server.routes["auth/w/order/multi"] = [1, "ow-req", None, None, [], None, "SUCCESS", "ok"]
+    for _ in range(3):
+        session.order_multi([("oc", {"id": 1})])
+    nonces = [int(r[4]["bfx-nonce"]) for r in server.received]
+    assert nonces == sorted(nonces) and len(set(nonces)) == 3
+
+
+@pytest.mark.parametrize(
+    "response, error",
+    [
+        (["error", 10020, "symbol: invalid"], RequestParameterError),
+        (["error", 10100, "apikey: invalid"], InvalidCredentialError),
+        (["error", 11010, "ratelimit: error"], RateLimitError),
+        ({"error": "ERR_RATE_LIMIT"}, RateLimitError),
+        (["error", 10000, "unknown error"], GenericError),
+        (RawResponse(429, "Too Many Requests", "text/plain"), RateLimitError),
+        (RawResponse(502, "<html><body>Bad Gateway</body></html>"), GenericError),
+        (RawResponse(503, "not json", "application/json"), GenericError),
+        (RawResponse(404, '{"message": "not found"}', "application/json"), GenericError),
+    ],
+)
+def test_error_mapping(server, session, response, error):
+    server.routes["ticker/tPNKUSD"] = response
+    with pytest.raises(error):
+        session.get("ticker/tPNKUSD")
+
+
+def test_failed_loads_are_not_cached(server, session):
+    server.routes["ticker/tPNKUSD"] = RawResponse(502, "<html>Bad Gateway</html>")
+    with pytest.raises(GenericError):
+        session.get_t_ticker("tPNKUSD")
+    server.routes["ticker/tPNKUSD"] = TICKER
+    assert session.get_t_ticker("tPNKUSD").last_price == 0.016
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+from hleper_functions.helper_function import run_stages_concurrently
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_stages_collect_values_errors_and_deadlines():
+    release = threading.Event()
+
+    def boom() -> None:
+        raise RuntimeError("boom")
+
+    results = run_stages_concurrently(
+        {"fast": lambda: 42, "fails": boom, "hangs": lambda: release.wait(10.0)},
+        {"fast": 1.0, "fails": 1.0, "hangs": 0.2},
+    )
+    release.set()
+    assert results["fast"].ok and results["fast"].value == 42
+    assert (results["fails"].ok, results["fails"].error, results["fails"].timed_out) == (False, "boom", False)
+    assert (results["hangs"].ok, results["hangs"].timed_out) == (False, True)
+    assert results["hangs"].duration_ms < 1000.0
+
+
+def test_max_workers_bounds_concurrency():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def stage() -> None:
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.pop()
+
+    results = run_stages_concurrently({f"s{i}": stage for i in range(6)}, {}, max_workers=2)
+    assert all(r.ok for r in results.values())
+    assert max(peak) == 2
+
+
+def test_hanging_stage_does_not_keep_the_process_alive():
+    script = textwrap.dedent(
+        """
+        import time
+        from hleper_functions.helper_function import run_stages_concurrently
+
+        results = run_stages_concurrently({"ok": lambda: 1, "stuck": lambda: time.sleep(30)}, {"ok": 1.0, "stuck": 0.2})
+        print(results["ok"].ok, results["stuck"].timed_out)
+        """
+    )
+    t0 = time.monotonic()
+    proc = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=20, cwd=REPO_ROOT)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.split() == ["True", "True"]
+    assert time.monotonic() - t0 < 10.0
@@ -0,0 +1,17 @@
+import pytest
+
+from hleper_functions.helper_functions_spread import iter_orders_from_lines
+
+JSON_LINES = [
+    '{"id": 1, "amount": 0, "price": 0.016}',
+    '{"id": 2, "amount": -2.5, "price": 0.0161}',
+    '{"id": 3, "amount": "0.0", "price": 0.0159, "side": "buy"}',
+    '{"id": 4, "amount": 10, "price": 0.0158}',
+]
+CSV_LINES = ["id,amount,price", "1,0,0.016", "2,-2.5,0.0161", "3,0.0,0.0159", "4,10,0.0158"]
+
+
+@pytest.mark.parametrize("fmt, lines", [("json", JSON_LINES), ("csv", CSV_LINES)])
+def test_zero_amounts_are_dropped(fmt, lines):
+    orders = list(iter_orders_from_lines(lines, fmt))
+    assert [(o["id"], o["side"], o["amount"]) for o in orders] == [(2, "SELL", 2.5), (4, "BUY", 10.0)]
@@ -0,0 +1,166 @@
+import json
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import pytest
+
+from hleper_functions.fake_bfx_ws import FakeBfxWsServer
+from hleper_functions.market_book import BOOK_CHECKSUM_FLAG, MarketBook, MarketBookFeed, book_checksum
+
+
+def wait_until(condition: Callable[[], bool], timeout_s: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class ExchangeBook:
+    """The exchange's side of the book: price -> [price, count, amount], checksummed on the JSON text it sends."""
+
+    def __init__(self, rows: List[List[Any]]) -> None:
+        self.rows = {row[0]: row for row in rows}
+
+    def set(self, price: float, count: int, amount: float) -> List[Any]:
+        if count:
+            self.rows[price] = [price, count, amount]
+        else:
+            self.rows.pop(price, None)
+        return [price, count, amount]
+
+    def snapshot(self) -> List[List[Any]]:
+        return sorted(self.rows.values())
+
+    def checksum(self) -> int:
+        bids = sorted((r for r in self.rows.values() if r[2] > 0), key=lambda r: -r[0])
+        asks = sorted((r for r in self.rows.values() if r[2] < 0), key=lambda r: r[0])
+        text = lambda rows: [(json.dumps(r[0]), json.dumps(r[2])) for r in rows]
+        return book_checksum(text(bids), text(asks))
+
+
+@pytest.fixture
+def exchange() -> ExchangeBook:
+    return ExchangeBook(
+        [[0.016 - i * 0.00001, 1 + i % 3, 100.5 + i] for i in range(30)]
+        + [[0.0161 + i * 0.00001, 1 + i % 2, -(120.25 + i)] for i in range(30)]
+    )
+
+
+@pytest.fixture
+def feed_and_server(exchange: ExchangeBook):
+    channels: List[int] = []
+
+    def on_subscribe(chan_id: int, message: Dict[str, Any]) -> List[Any]:
+        channels.append(chan_id)
+        return [[chan_id, exchange.snapshot()], [chan_id, "cs", exchange.checksum()]]
+
+    server = FakeBfxWsServer(on_subscribe=on_subscribe)
+    server.start()
+    feed = MarketBookFeed("tPNKUSD", host=server.url)
+    feed.start()
+    assert feed.wait_ready(5.0)
+    yield feed, server, channels
+    feed.stop()
+    server.stop()
+
+
+def push_delta(server: FakeBfxWsServer, exchange: ExchangeBook, chan_id: int, price: float, count: int, amount: float) -> None:
+    server.push([chan_id, exchange.set(price, count, amount)])
+    server.push([chan_id, "cs", exchange.checksum()])
+
+
+def local_levels(feed: MarketBookFeed) -> Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]:
+    with feed._lock:
+        return feed.book.levels("BUY"), feed.book.levels("SELL")
+
+
+def exchange_levels(exchange: ExchangeBook) -> Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]:
+    bids = sorted(((r[0], r[2]) for r in exchange.rows.values() if r[2] > 0), reverse=True)
+    asks = sorted((r[0], -r[2]) for r in exchange.rows.values() if r[2] < 0)
+    return bids, asks
+
+
+def test_book_checksum_known_vectors():
+    assert book_checksum([("6000", "1.5")], [("6001", "-2")]) == -8321212
+    # Sides of different lengths interleave until the shorter one runs out
+    assert book_checksum([("0.016", "100.5"), ("0.0159", "40")], [("0.0161", "-120")]) == -402465873
+
+
+def test_book_checksum_uses_best_25_levels():
+    bids = [(str(100 - i), "1") for i in range(30)]
+    asks = [(str(101 + i), "-1") for i in range(30)]
+    assert book_checksum(bids, asks) == book_checksum(bids[:25], asks[:25])
+    assert book_checksum(bids, asks) != book_checksum(bids[:24], asks[:25])
+
+
+def test_market_book_checksum_matches_feed_text():
+    book = MarketBook()
+    book.apply_snapshot([["6000", 1, "1.5"], ["6001", 2, "-2"]])
+    assert book.checksum() == -8321212
+
+
+def test_level_moves_to_the_other_side():
+    book = MarketBook()
+    book.apply_snapshot([["0.016", 1, "100"], ["0.0161", 1, "-50"]])
+    book.apply("0.0161", 2, "30")  # the ask level is now a bid
+    assert book.best_bid == 0.0161
+    assert book.best_ask is None
+    assert book.amount_at("BUY", 0.0161) == 30.0
+    assert book.amount_at("SELL", 0.0161) == 0.0
+    assert book.checksum() == book_checksum([("0.0161", "30"), ("0.016", "100")], [])
+
+
+def test_feed_enables_checksums_before_subscribing(feed_and_server):
+    feed, server, _ = feed_and_server
+    events = [m.get("event") for m in server.received]
+    assert server.received[0] == {"event": "conf", "flags": BOOK_CHECKSUM_FLAG}
+    assert events.index("conf") < events.index("subscribe")
+
+
+def test_feed_snapshot_deltas_and_checksums(feed_and_server, exchange):
+    feed, server, channels = feed_and_server
+    chan_id = channels[-1]
+    assert wait_until(lambda: feed.checksums_ok == 1)
+
+    push_delta(server, exchange, chan_id, 0.016, 4, 250.75)  # update a bid
+    push_delta(server, exchange, chan_id, 0.01605, 1, 12.5)  # new best bid
+    push_delta(server, exchange, chan_id, 0.0161, 0, -1)  # remove the best ask
+    push_delta(server, exchange, chan_id, 0.01608, 2, -7.25)  # new best ask
+    assert wait_until(lambda: feed.checksums_ok == 5)
+
+    assert feed.checksum_mismatches == 0
+    assert local_levels(feed) == exchange_levels(exchange)
+    metrics = feed.metrics(bands=[1.0])
+    assert metrics["best_bid"] == 0.01605
+    assert metrics["best_ask"] == 0.01608
+
+
+def test_feed_level_switching_sides(feed_and_server, exchange):
+    feed, server, channels = feed_and_server
+    chan_id = channels[-1]
+    # A bid at the best ask's price replaces that ask
+    push_delta(server, exchange, chan_id, 0.0161, 3, 44.0)
+    assert wait_until(lambda: feed.checksums_ok == 2)
+    assert feed.checksum_mismatches == 0
+    assert local_levels(feed) == exchange_levels(exchange)
+    assert feed.book.best_bid == 0.0161
+
+
+def test_feed_checksum_mismatch_resubscribes_and_restores(feed_and_server, exchange):
+    feed, server, channels = feed_and_server
+    chan_id = channels[-1]
+    assert wait_until(lambda: feed.checksums_ok == 1)
+
+    # A level only the local book sees, then the exchange's true checksum
+    server.push([chan_id, [0.0159999, 1, 5.0]])
+    server.push([chan_id, "cs", exchange.checksum()])
+
+    assert wait_until(lambda: feed.resyncs == 1 and len(channels) == 2 and feed.ready())
+    assert feed.checksum_mismatches == 1
+    assert {"event": "unsubscribe", "chanId": chan_id} in server.received
+    assert wait_until(lambda: feed.checksums_ok == 2)
+    assert local_levels(feed) == exchange_levels(exchange)
+    with feed._lock:
+        assert feed.book.checksum() == exchange.checksum()
@@ -0,0 +1,83 @@
+import random
+from typing import Any, Dict, List
+
+from hleper_functions.order_book import OrderBook
+
+
+def state(book: OrderBook) -> Dict[str, Any]:
+    return {
+        "bids": book.levels("BUY"),
+        "asks": book.levels("SELL"),
+        "bid_prices": book.bid_prices(),
+        "ask_prices": book.ask_prices(),
+        "counts": (book.bid_count, book.ask_count),
+    }
+
+
+def test_insert_update_remove_by_id():
+    book = OrderBook(min_amount=10.0)
+    book.upsert(1, "BUY", 50.0, 0.016)
+    book.upsert(2, "buy", 20.0, 0.016)
+    book.upsert(3, "SELL", 30.0, 0.0162)
+    book.upsert(4, "SELL", 5.0, 0.0161)  # below min_amount: known but not indexed
+    assert (book.best_bid, book.best_ask) == (0.016, 0.0162)
+    assert book.amount_at("BUY", 0.016) == 70.0
+    assert len(book) == 4 and 4 in book
+
+    book.upsert(4, "SELL", 12.0, 0.0161)  # resized across the threshold
+    assert book.best_ask == 0.0161
+    book.upsert(1, "BUY", 50.0, 0.0159)  # moved to another level
+    assert book.levels("BUY") == [(0.016, 20.0), (0.0159, 50.0)]
+    book.upsert(3, "BUY", 30.0, 0.01595)  # switched sides
+    assert book.levels("SELL") == [(0.0161, 12.0)]
+    assert book.bid_prices() == [0.016, 0.01595, 0.0159]
+
+    assert book.remove(2) and not book.remove(2)
+    assert book.best_bid == 0.01595
+    book.remove(4)
+    assert book.best_ask is None and book.ask_count == 0
+    assert book.spread_percent() is None
+
+
+def test_level_amount_has_no_drift_from_repeated_updates():
+    book = OrderBook()
+    book.upsert("anchor", "BUY", 0.2, 1.0)
+    for i in range(1000):
+        book.upsert(i, "BUY", 0.1, 1.0)
+        book.upsert(i, "BUY", 0.7, 1.0)
+        book.remove(i)
+    assert book.amount_at("BUY", 1.0) == 0.2
+    # A single add/remove already leaves float residue without rounding
+    book.upsert("x", "BUY", 0.1, 1.0)
+    book.upsert("y", "BUY", 0.2, 1.0)
+    book.remove("y")
+    assert book.amount_at("BUY", 1.0) == 0.3
+
+
+def test_incremental_book_matches_a_rebuild():
+    rng = random.Random(7)
+    orders: Dict[int, Dict[str, Any]] = {}
+    book = OrderBook(min_amount=1.0)
+    for _ in range(5000):
+        order_id = rng.randrange(200)
+        if order_id in orders and rng.random() < 0.3:
+            del orders[order_id]
+            book.remove(order_id)
+            continue
+        side = rng.choice(["BUY", "SELL"])
+        price = round((0.0150 if side == "BUY" else 0.0165) + rng.randrange(20) * 0.00001, 8)
+        order = {"id": order_id, "side": side, "amount": round(rng.uniform(0.1, 500.0), rng.randint(0, 8)), "price": price}
+        orders[order_id] = order
+        book.apply(order)
+    assert state(book) == state(OrderBook.from_orders(list(orders.values()), min_amount=1.0))
+
+
+def test_copy_is_independent():
+    book = OrderBook.from_orders([{"id": 1, "side": "BUY", "amount": 5.0, "price": 1.0}])
+    snapshot: List[Any] = book.levels("BUY")
+    copy = book.copy()
+    book.upsert(2, "BUY", 3.0, 1.1)
+    book.remove(1)
+    assert copy.levels("BUY") == snapshot and len(copy) == 1
+    copy.upsert(3, "SELL", 1.0, 2.0)
+    assert book.best_ask is None
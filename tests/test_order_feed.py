@@ -0,0 +1,144 @@
+import time
+from typing import Any, Callable, List
+
+import pytest
+
+from hleper_functions.fake_bfx_ws import FakeBfxWsServer
+from hleper_functions.order_book import OrderBook
+from hleper_functions.order_feed import OrderFeed
+from hleper_functions.order_source import load_open_orders
+
+LIST_TABLE = """ID        TYPE            SIDE  AMOUNT  PRICE    CREATED
+1001      EXCHANGE LIMIT  BUY   100.0   0.0160   2025-01-01 10:00:00
+1003      EXCHANGE LIMIT  SELL  80.0    0.0161   2025-01-01 10:00:00
+"""
+
+
+def order_row(order_id: int, amount: float, price: float, symbol: str = "tPNKUSD", status: str = "ACTIVE") -> List[Any]:
+    """A websocket order row (32 fields: ID, GID, CID, SYMBOL, ..., AMOUNT, ..., STATUS, ..., PRICE, ...)."""
+    row: List[Any] = [None] * 32
+    row[0], row[2], row[3], row[6], row[7], row[8], row[13], row[16] = (
+        order_id, 1, symbol, amount, amount, "EXCHANGE LIMIT", status, price
+    )
+    return row
+
+
+def wait_until(condition: Callable[[], bool], timeout_s: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def ids(feed: OrderFeed) -> List[int]:
+    return sorted(o["id"] for o in feed.orders())
+
+
+@pytest.fixture
+def snapshot() -> List[List[Any]]:
+    return [order_row(1, 10.0, 0.016), order_row(2, -5.0, 0.017), order_row(3, 1.0, 60000.0, symbol="tBTCUSD")]
+
+
+@pytest.fixture
+def server(snapshot):
+    server = FakeBfxWsServer(on_auth=lambda: [[0, "os", list(snapshot)]])
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def feed(server):
+    feed = OrderFeed("tPNKUSD", "key", "secret", host=server.url)
+    feed.start()
+    assert feed.wait_ready(5.0)
+    yield feed
+    feed.stop()
+
+
+def test_snapshot(feed, server):
+    auth = next(m for m in server.received if m.get("event") == "auth")
+    assert auth["apiKey"] == "key"
+    assert sorted(feed.orders(), key=lambda o: o["id"]) == [
+        {"id": 1, "type": "EXCHANGE LIMIT", "side": "BUY", "amount": 10.0, "price": 0.016},
+        {"id": 2, "type": "EXCHANGE LIMIT", "side": "SELL", "amount": 5.0, "price": 0.017},
+    ]
+
+
+def test_deltas(feed, server):
+    server.push([0, "on", order_row(4, -3.0, 0.0165)])
+    server.push([0, "on", order_row(5, 2.0, 61000.0, symbol="tBTCUSD")])  # other symbol: ignored
+    server.push([0, "ou", order_row(1, 7.5, 0.0159)])
+    server.push([0, "oc", order_row(2, -5.0, 0.017, status="CANCELED")])
+    server.push([0, "hb"])
+    assert wait_until(lambda: ids(feed) == [1, 4])
+
+    orders = {o["id"]: o for o in feed.orders()}
+    assert orders[1]["amount"] == 7.5 and orders[1]["price"] == 0.0159
+    assert orders[4]["side"] == "SELL" and orders[4]["amount"] == 3.0
+
+    # A fill reported on `ou` with an EXECUTED status removes the order too
+    server.push([0, "ou", order_row(4, 0.0, 0.0165, status="EXECUTED @ 0.0165(-3.0)")])
+    assert wait_until(lambda: ids(feed) == [1])
+
+
+def test_book_follows_deltas(feed, server):
+    book = feed.book("tPNKUSD", min_amount=2.0)
+    assert (book.best_bid, book.best_ask) == (0.016, 0.017)
+
+    server.push([0, "on", order_row(4, 3.0, 0.0162)])
+    server.push([0, "on", order_row(5, 1.0, 0.0163)])  # below min_amount
+    server.push([0, "ou", order_row(2, -5.0, 0.0168)])
+    server.push([0, "oc", order_row(1, 10.0, 0.016, status="CANCELED")])
+    assert wait_until(lambda: ids(feed) == [2, 4, 5])
+
+    book = feed.book("tPNKUSD", min_amount=2.0)
+    assert book.levels("BUY") == [(0.0162, 3.0)]
+    assert book.levels("SELL") == [(0.0168, 5.0)]
+    # The feed's book is updated in place, not rebuilt: a fresh build agrees with it
+    assert book.levels("BUY") == OrderBook.from_orders(feed.orders(), 2.0).levels("BUY")
+
+    # A new snapshot replaces the book
+    server.push([0, "os", [order_row(7, -2.5, 0.0171)]])
+    assert wait_until(lambda: ids(feed) == [7])
+    book = feed.book("tPNKUSD", min_amount=2.0)
+    assert (book.best_bid, book.levels("SELL")) == (None, [(0.0171, 2.5)])
+
+
+def test_reconnect_replaces_orders_with_the_new_snapshot(feed, server, snapshot):
+    server.push([0, "on", order_row(9, 1.0, 0.015)])
+    assert wait_until(lambda: 9 in ids(feed))
+
+    snapshot[:] = [order_row(2, -5.0, 0.017), order_row(8, 4.0, 0.0158)]
+    server.drop_clients()
+    assert wait_until(lambda: ids(feed) == [2, 8] and feed.ready(), timeout_s=10.0)
+
+
+def test_stale_feed_falls_back_to_the_list_command(server, tmp_path, monkeypatch):
+    monkeypatch.setenv("HB_RATE_LIMIT_FILE", "")
+    listing = tmp_path / "list.txt"
+    listing.write_text(LIST_TABLE)
+    cfg = {"symbol": "tPNKUSD", "list_cmd": f"cat {listing}", "timeout_s": 5, "list_format": "table"}
+
+    feed = OrderFeed("tPNKUSD", "key", "secret", host=server.url, max_age_s=0.3)
+    feed.start()
+    try:
+        assert feed.wait_ready(5.0)
+        rc, orders, _, source = load_open_orders(cfg, feed)
+        assert (rc, source) == (0, "ws")
+        assert sorted(o["id"] for o in orders) == [1, 2]
+
+        # No message (not even a heartbeat) within max_age_s: the feed is stale
+        assert wait_until(lambda: not feed.ready())
+        rc, orders, _, source = load_open_orders(cfg, feed)
+        assert (rc, source) == (0, "cli")
+        assert sorted(orders.ids.tolist()) == [1001, 1003]
+
+        # A message brings it back
+        server.push([0, "hb"])
+        assert wait_until(feed.ready)
+        assert load_open_orders(cfg, feed)[3] == "ws"
+    finally:
+        feed.stop()
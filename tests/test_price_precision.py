@@ -0,0 +1,94 @@
+import random
+from decimal import ROUND_DOWN, Decimal
+from typing import List
+
+import pytest
+
+from benchmarks.legacy_price_format import format_bitfinex_price as legacy_format_bitfinex_price
+from hleper_functions.price_precision import (
+    MAX_DECIMALS,
+    SIG_DIGITS,
+    format_price,
+    format_prices,
+    snap_prices,
+    tick_size_decimal,
+)
+
+SAMPLES = 20000
+
+
+def reference_format(price: float) -> str:
+    """Exact truncation of the price's shortest repr."""
+    if price == 0:
+        return "0"
+    d = Decimal(repr(price))
+    exponent = d.adjusted()
+    quantum = Decimal(1).scaleb(-min(SIG_DIGITS - 1 - exponent, MAX_DECIMALS))
+    text = format(d.quantize(quantum, rounding=ROUND_DOWN), "f")
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+
+def random_prices(n: int, seed: int) -> List[float]:
+    """
+    Log-uniform prices from 1e-9 to 1e9, a third of them already on the tick grid and
+    a few negative, so both the truncating and the pass-through paths are exercised.
+    """
+    rng = random.Random(seed)
+    prices = []
+    for i in range(n):
+        p = 10 ** rng.uniform(-9, 9)
+        if i % 3 == 0:
+            p = float(reference_format(p))
+        sig = rng.randint(1, 12)
+        p = float(f"{p:.{sig}g}")
+        prices.append(-p if i % 50 == 0 else p)
+    prices.extend([1e-4, 1e-5, 0.1, 1.0, 10.0, 99999.0, 100000.0, 0.016390, 0.0163919, 0.0])
+    return prices
+
+
+@pytest.fixture(scope="module")
+def prices() -> List[float]:
+    return random_prices(SAMPLES, seed=1)
+
+
+def test_format_price_matches_decimal_truncation(prices):
+    mismatches = [(p, format_price(p), reference_format(p)) for p in prices if format_price(p) != reference_format(p)]
+    assert mismatches == []
+
+
+def test_array_versions_match_format_price(prices):
+    scalar = [format_price(p) for p in prices]
+    assert format_prices(prices) == scalar
+    assert snap_prices(prices).tolist() == [float(s) for s in scalar]
+
+
+def test_results_are_on_the_tick_grid(prices):
+    off_grid = [(p, format_price(p)) for p in prices if p and Decimal(format_price(p)) % tick_size_decimal(p) != 0]
+    assert off_grid == []
+
+
+def test_against_the_legacy_function(prices):
+    legacy_wrong = 0
+    compared = 0
+    for price in prices:
+        exponent = Decimal(repr(price)).adjusted() if price else 0
+        if price == 0 or SIG_DIGITS - 1 - exponent > MAX_DECIMALS:
+            continue  # the legacy function had no 8-decimal limit
+        new = format_price(price)
+        legacy = legacy_format_bitfinex_price(price)
+        if abs(Decimal(legacy) - Decimal(repr(price))) > tick_size_decimal(price):
+            # e.g. 120000 -> "12": rstrip('0') also ate integer zeros
+            legacy_wrong += 1
+            continue
+        compared += 1
+        if Decimal(repr(abs(price))) == abs(Decimal(reference_format(price))):
+            assert legacy == new, f"on-grid {price!r}"
+        assert abs(Decimal(new)) <= abs(Decimal(legacy)), f"{price!r}: {new!r} exceeds legacy {legacy!r}"
+    assert compared > legacy_wrong > 0
+
+
+def test_legacy_strips_integer_zeros():
+    assert legacy_format_bitfinex_price(120000.0) == "12"
+    assert format_price(120000.0) == "120000"